@@ -12,5 +12,6 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'Project_RoomBookingSystem.settings')
+os.environ.setdefault('BOOKING_ASYNC_VIEWS', '1')
 
 application = get_asgi_application()
@@ -10,6 +10,7 @@ For the full list of settings and their values, see
 https://docs.djangoproject.com/en/5.2/ref/settings/
 """
 
+import os
 from pathlib import Path
 
 from django.conf.global_settings import AUTH_USER_MODEL
@@ -48,11 +49,14 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'booking_app.metrics.QueryMetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
     'django.contrib.auth.middleware.AuthenticationMiddleware',
     'django.contrib.messages.middleware.MessageMiddleware',
+    'booking_app.audit.AuditLogMiddleware',
+    'booking_app.routing.ReadYourWritesMiddleware',
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
@@ -68,6 +72,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'booking_app.context_processors.unread_notifications',
             ],
         },
     },
@@ -75,6 +80,29 @@ TEMPLATES = [
 
 WSGI_APPLICATION = 'Project_RoomBookingSystem.wsgi.application'
 
+# Serve the read-heavy pages with async views (booking_app.async_views).
+# asgi.py turns this on; under WSGI the sync views avoid a per-request event loop.
+ASYNC_VIEWS = os.environ.get('BOOKING_ASYNC_VIEWS') == '1'
+
+# Live notification streams (ASGI only) poll the database this often for
+# notifications delivered by the outbox worker.
+LIVE_NOTIFICATIONS_POLL_SECONDS = 5
+
+# booking_app.metrics: warn when a request runs one SQL shape more than this
+# many times (usually an N+1). /metrics is open to admins, and to scrapers
+# sending "Authorization: Bearer <METRICS_TOKEN>" when the token is set.
+REPEATED_QUERY_THRESHOLD = 10
+METRICS_TOKEN = os.environ.get('BOOKING_METRICS_TOKEN')
+# Each process writes its request totals and cache hit/miss counts to the cache this often (seconds)
+METRICS_FLUSH_SECONDS = 10
+
+# Retention (manage.py archive_old_rows): notifications and audit log entries
+# older than this many days are moved into gzipped NDJSON files under
+# ARCHIVE_DIR and deleted from the database. None keeps a table's rows forever.
+NOTIFICATION_RETENTION_DAYS = 180
+ACTION_LOG_RETENTION_DAYS = 365
+ARCHIVE_DIR = os.environ.get('BOOKING_ARCHIVE_DIR', BASE_DIR / 'archive')
+
 
 # Database
 # https://docs.djangoproject.com/en/5.2/ref/settings/#databases
@@ -90,6 +118,46 @@ DATABASES = {
     }
 }
 
+# Optional read replica of the same database. Views decorated with
+# booking_app.routing.replica_reads read from it; writes and all other reads
+# use 'default'. After a POST a client reads from 'default' for
+# READ_YOUR_WRITES_SECONDS so it sees its own changes.
+DB_REPLICA_HOST = os.environ.get('DB_REPLICA_HOST')
+if DB_REPLICA_HOST:
+    DATABASES['replica'] = {
+        **DATABASES['default'],
+        'HOST': DB_REPLICA_HOST,
+        'TEST': {'MIRROR': 'default'},
+    }
+
+DATABASE_ROUTERS = ['booking_app.routing.PrimaryReplicaRouter']
+READ_YOUR_WRITES_SECONDS = 10
+
+# Cache
+# Per-process memory by default. With several worker processes, set
+# BOOKING_CACHE_DIR so they share one file-based cache: version bumps made by
+# one process are then seen by all, and hit/miss counters are site-wide.
+
+BOOKING_CACHE_DIR = os.environ.get('BOOKING_CACHE_DIR')
+if BOOKING_CACHE_DIR:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+            'LOCATION': BOOKING_CACHE_DIR,
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+            'LOCATION': 'booking-app',
+        }
+    }
+
+# Seconds a cached room/room type/user snapshot may live; signals normally
+# invalidate it sooner.
+CATALOG_CACHE_TIMEOUT = 300
+
 # Password validation
 # https://docs.djangoproject.com/en/5.2/ref/settings/#auth-password-validators
 
@@ -7,7 +7,7 @@ from .models import *
 models_list = [
     Role, User, Profile, RoomType, Room,
     Facility, RoomFeature, RoomRoomFeature,
-    Booking, RoomAvailability, Notification,
+    Booking, BookingSeries, RoomAvailability, Notification, NotificationOutbox,
     ActionLog, Product
 ]
 
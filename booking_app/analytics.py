@@ -0,0 +1,155 @@
+from datetime import datetime, time, timedelta
+
+import numpy as np
+from django.utils import timezone
+
+from .caching import get_or_build, get_version
+from .catalog import CATALOG_NAMESPACE
+from .conflicts import MAX_BOOKING_LENGTH
+from .freeslots import SLOT_MINUTES, SLOTS_PER_DAY, get_week_matrix, room_rows
+from .models import Booking
+from .summaries import status_counts_by_room_type
+
+STATS_NAMESPACE = 'booking_stats'
+
+# Bookings that actually used the room; pending ones may still be rejected
+USED_STATUSES = ('approved', 'completed')
+MAX_RANGE_DAYS = 92
+PEAK_HOURS = 3
+
+
+# ----------------- OCCUPANCY MATRIX -----------------
+def _midnights(first_day, days):
+    """Epoch seconds of local midnight for each day plus the one after the range."""
+    return np.array([
+        timezone.make_aware(datetime.combine(first_day + timedelta(days=d), time.min)).timestamp()
+        for d in range(days + 1)
+    ])
+
+
+def _slot_positions(ts, midnights, round_up=False):
+    """
+    Index of each epoch timestamp on the flattened (days x slots) axis,
+    clipped to the range. Counted from the local midnight of its own day,
+    so slots line up with wall-clock time across DST changes.
+    """
+    days = len(midnights) - 1
+    day = np.searchsorted(midnights, ts, side='right') - 1
+    offset = (ts - midnights[day.clip(0, days)]) / (SLOT_MINUTES * 60)
+    offset = np.ceil(offset) if round_up else np.floor(offset)
+    pos = day.clip(0, days) * SLOTS_PER_DAY + offset.clip(0, SLOTS_PER_DAY)
+    pos[day < 0] = 0
+    return pos.clip(0, days * SLOTS_PER_DAY).astype(np.int64)
+
+
+def occupancy_matrix(room_ids, rows, first_day, days):
+    """
+    (rooms x days x slots) boolean array, True where one of `rows`
+    (room_id, start_time, end_time) covers the slot.
+    """
+    total = days * SLOTS_PER_DAY
+    if not rows or not len(room_ids):
+        return np.zeros((len(room_ids), days, SLOTS_PER_DAY), dtype=bool)
+
+    midnights = _midnights(first_day, days)
+    row, known = room_rows(room_ids, np.array([r[0] for r in rows], dtype=np.int64))
+    first = _slot_positions(np.array([r[1].timestamp() for r in rows]), midnights)
+    last = _slot_positions(np.array([r[2].timestamp() for r in rows]), midnights, round_up=True)
+    hit = known & (first < last)
+
+    # Difference array over the flattened day/slot axis, so bookings that
+    # cross midnight need no special case
+    diff = np.zeros((len(room_ids), total + 1), dtype=np.int32)
+    np.add.at(diff, (row[hit], first[hit]), 1)
+    np.add.at(diff, (row[hit], last[hit]), -1)
+    return (np.cumsum(diff[:, :total], axis=1) > 0).reshape(len(room_ids), days, SLOTS_PER_DAY)
+
+
+# ----------------- UTILIZATION -----------------
+def _percent(part, whole):
+    return round(100.0 * float(part) / float(whole), 1) if whole else 0.0
+
+
+def build_utilization(first_day, last_day):
+    """
+    Utilization figures for the local dates first_day..last_day inclusive,
+    as plain dicts/lists (cacheable, template friendly). One bookings query
+    for the occupancy matrix; booking counts come from DailyBookingSummary.
+
+    Utilization is the share of open room slots (RoomAvailability) covered
+    by approved or completed bookings.
+    """
+    days = (last_day - first_day).days + 1
+    matrix = get_week_matrix()
+    rooms = matrix['rooms']
+    range_start = timezone.make_aware(datetime.combine(first_day, time.min))
+    range_end = timezone.make_aware(datetime.combine(last_day + timedelta(days=1), time.min))
+
+    used = list(
+        Booking.objects.filter(
+            start_time__gt=range_start - MAX_BOOKING_LENGTH,
+            start_time__lt=range_end,
+            end_time__gt=range_start,
+            status__in=USED_STATUSES,
+        )
+        .values_list('room_id', 'start_time', 'end_time')
+    )
+
+    weekdays = [(first_day + timedelta(days=d)).weekday() for d in range(days)]
+    open_slots = matrix['week'][:, weekdays, :]
+    occupied = occupancy_matrix(matrix['room_ids'], used, first_day, days) & open_slots
+
+    open_per_room = open_slots.sum(axis=(1, 2))
+    used_per_room = occupied.sum(axis=(1, 2))
+
+    # Peak hours: booked room-slots per hour of day across the whole range
+    used_by_hour = occupied.sum(axis=(0, 1)).reshape(24, -1).sum(axis=1)
+    open_by_hour = open_slots.sum(axis=(0, 1)).reshape(24, -1).sum(axis=1)
+    peak_hours = [
+        {'hour': int(h), 'utilization': _percent(used_by_hour[h], open_by_hour[h])}
+        for h in np.argsort(-used_by_hour, kind='stable')[:PEAK_HOURS] if used_by_hour[h]
+    ]
+
+    return {
+        'first_day': first_day,
+        'last_day': last_day,
+        'utilization': _percent(used_per_room.sum(), open_per_room.sum()),
+        'peak_hours': peak_hours,
+        'room_types': _room_type_stats(rooms, open_per_room, used_per_room, first_day, last_day),
+        'idle_rooms': [rooms[i] for i in np.flatnonzero((open_per_room > 0) & (used_per_room == 0))],
+    }
+
+
+def _room_type_stats(rooms, open_per_room, used_per_room, first_day, last_day):
+    """
+    Per room type: utilization, and the approved/cancelled share of the
+    bookings that start inside the range.
+    """
+    names = sorted({r['room_type_name'] for r in rooms})
+    room_type = np.array([names.index(r['room_type_name']) for r in rooms], dtype=np.int64)
+    open_per_type = np.bincount(room_type, weights=open_per_room, minlength=len(names))
+    used_per_type = np.bincount(room_type, weights=used_per_room, minlength=len(names))
+
+    counts = status_counts_by_room_type(first_day, last_day)
+    stats = []
+    for i, name in enumerate(names):
+        by_status = {status: counts.get((name, status), (0, 0))[0] for status, _ in Booking.STATUS_CHOICES}
+        total = sum(by_status.values())
+        stats.append({
+            'name': name,
+            'utilization': _percent(used_per_type[i], open_per_type[i]),
+            'bookings': total,
+            'approved_rate': _percent(by_status['approved'], total),
+            'cancelled_rate': _percent(by_status['cancelled'], total),
+        })
+    return stats
+
+
+def get_utilization(first_day, last_day):
+    """
+    Cached build_utilization() for the range. Entries are dropped when
+    bookings change (STATS_NAMESPACE) or rooms change (catalog version).
+    """
+    part = f"{first_day:%Y%m%d}-{last_day:%Y%m%d}:c{get_version(CATALOG_NAMESPACE)}"
+    return get_or_build(STATS_NAMESPACE, lambda: build_utilization(first_day, last_day),
+                        timeout=600, part=part)
@@ -4,3 +4,6 @@ from django.apps import AppConfig
 class BookingAppConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'booking_app'
+
+    def ready(self):
+        from . import metrics, signals  # noqa: F401  (connects receivers)
@@ -0,0 +1,146 @@
+import gzip
+import json
+import os
+from collections import Counter
+from datetime import timedelta
+from pathlib import Path
+
+from django.conf import settings
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db import transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from .inbox import add_unread
+from .models import ActionLog, Notification
+
+# Retention for the append-only tables.
+#
+# Rows older than their table's retention period are moved, batch_size at a
+# time in id order, into gzipped NDJSON files under ARCHIVE_DIR/<table>/,
+# named after the first and last id they hold. Each batch is locked, written
+# (to a temporary name, fsynced, then renamed) and deleted in one short
+# transaction, so a crash can at worst leave rows that are archived and still
+# in the database; the next run archives them again and search_archive()
+# skips the duplicates.
+
+# table name -> (model, timestamp field, retention setting)
+ARCHIVED_TABLES = {
+    'notifications': (Notification, 'notification_timestamp', 'NOTIFICATION_RETENTION_DAYS'),
+    'action_logs': (ActionLog, 'action_timestamp', 'ACTION_LOG_RETENTION_DAYS'),
+}
+
+
+def archive_dir(table):
+    return Path(settings.ARCHIVE_DIR) / table
+
+
+def retention_cutoff(table, days=None):
+    """Rows of `table` older than this are archived; None if retention is off."""
+    if days is None:
+        days = getattr(settings, ARCHIVED_TABLES[table][2], None)
+    return None if days is None else timezone.now() - timedelta(days=days)
+
+
+def _columns(model):
+    return [field.attname for field in model._meta.concrete_fields]
+
+
+def _write(path, rows):
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'wb') as raw:
+        with gzip.open(raw, 'wt', encoding='utf-8') as f:
+            for row in rows:
+                f.write(json.dumps(row, cls=DjangoJSONEncoder) + "\n")
+        raw.flush()
+        os.fsync(raw.fileno())
+    os.replace(tmp, path)
+
+
+# ----------------- ARCHIVING -----------------
+def last_id(table):
+    """
+    Highest id in `table` (0 if empty), one index lookup. Rows added after a
+    run starts are newer than its cutoff, so the run stops here instead of
+    scanning the rest of the table for old rows on its last batch.
+    """
+    model = ARCHIVED_TABLES[table][0]
+    return model.objects.order_by('-id').values_list('id', flat=True).first() or 0
+
+
+def archive_batch(table, cutoff, after_id=0, batch_size=5000, max_id=None):
+    """
+    Archive and delete the first batch_size rows of `table` with an id in
+    (after_id, max_id] and a timestamp before cutoff. Returns (last id
+    handled, rows archived); (None, 0) when there are none left. Walks the
+    primary key, so pass the returned id back in as after_id to continue.
+    max_id defaults to last_id(table); pass the value taken at the start of a
+    run to keep every batch within the same range.
+    """
+    model, timestamp, _ = ARCHIVED_TABLES[table]
+    if max_id is None:
+        max_id = last_id(table)
+    old = model.objects.filter(**{f'{timestamp}__lt': cutoff})
+    # Found without locking, so the scan doesn't lock the newer rows it passes
+    ids = list(
+        old.filter(id__gt=after_id, id__lte=max_id).order_by('id').values_list('id', flat=True)[:batch_size]
+    )
+    if not ids:
+        return None, 0
+
+    with transaction.atomic():
+        rows = list(old.select_for_update().filter(id__in=ids).order_by('id').values(*_columns(model)))
+        if not rows:
+            return ids[-1], 0
+
+        first, last = rows[0]['id'], rows[-1]['id']
+        directory = archive_dir(table)
+        directory.mkdir(parents=True, exist_ok=True)
+        _write(directory / f"{first:012d}-{last:012d}.ndjson.gz", rows)
+
+        model.objects.filter(id__in=[row['id'] for row in rows]).delete()
+        if model is Notification:
+            # Deleted unread notifications must leave the badge counts too
+            archived = Counter(row['user_id'] for row in rows if row['notification_status'] == 'unread')
+            add_unread({user_id: -count for user_id, count in archived.items()})
+    return last, len(rows)
+
+
+# ----------------- SEARCH -----------------
+def archive_files(table, min_id=None, max_id=None):
+    """Archive files of `table` in id order, skipping those outside [min_id, max_id]."""
+    for path in sorted(archive_dir(table).glob('*.ndjson.gz')):
+        first, last = (int(part) for part in path.name.split('.')[0].split('-'))
+        if (min_id is not None and last < min_id) or (max_id is not None and first > max_id):
+            continue
+        yield path
+
+
+def search_archive(table, user_id=None, since=None, until=None, contains=None, min_id=None, max_id=None):
+    """
+    Archived rows of `table` (dicts, timestamps as ISO strings) matching
+    every filter given: user, timestamp in [since, until), text contained in
+    the message/action, id in [min_id, max_id]. Streams the files, so it
+    reads only the id range asked for but is otherwise a scan.
+    """
+    model, timestamp, _ = ARCHIVED_TABLES[table]
+    text_field = 'notification_message' if model is Notification else 'action'
+    last_id = 0
+    for path in archive_files(table, min_id, max_id):
+        with gzip.open(path, 'rt', encoding='utf-8') as f:
+            for line in f:
+                row = json.loads(line)
+                if row['id'] <= last_id:
+                    continue  # archived twice after an interrupted run
+                last_id = row['id']
+                if min_id is not None and row['id'] < min_id or max_id is not None and row['id'] > max_id:
+                    continue
+                if user_id is not None and row['user_id'] != user_id:
+                    continue
+                if contains and contains.lower() not in row[text_field].lower():
+                    continue
+                if since or until:
+                    moment = parse_datetime(row[timestamp])
+                    if since and moment < since or until and moment >= until:
+                        continue
+                yield row
@@ -0,0 +1,188 @@
+"""
+Async versions of the read-heavy pages, routed instead of the sync ones when
+settings.ASYNC_VIEWS is on (the ASGI entry point turns it on). Session and
+database reads use the async APIs; template rendering and cache builders,
+which may touch the ORM synchronously, run via sync_to_async.
+"""
+from datetime import date
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.shortcuts import redirect, render
+from django.utils import timezone
+from django.utils.decorators import method_decorator
+from django.views import View
+
+from . import views
+from .catalog import get_room_catalog, get_room_list, get_room_type_list, get_user_list
+from .conditional import (
+    booking_pages_version, conditional_page, home_version, notifications_version,
+    room_list_version, room_type_list_version, user_list_version,
+)
+from .forms import BookingFilterForm
+from .inbox import request_unread_count
+from .live import latest_notification_id, notification_events
+from .models import Notification
+from .pagination import akeyset_paginate
+from .queries import booking_rows, bucket_by_day, filter_bookings, user_bookings, user_past_bookings
+from .routing import replica_reads
+
+arender = sync_to_async(render)
+
+
+class AsyncReadView(View):
+    """
+    Async page whose reads may go to the replica. Subclasses add
+    conditional_page (see conditional.py) around the inherited dispatch.
+    """
+
+    @method_decorator(replica_reads)
+    async def dispatch(self, request, *args, **kwargs):
+        return await super().dispatch(request, *args, **kwargs)
+
+
+# ------------------ HOME ------------------
+@method_decorator(conditional_page(home_version), name='dispatch')
+class HomeView(AsyncReadView):
+    template_name = views.HomeView.template_name
+
+    async def get(self, request):
+        if not await request.session.aget('user_id'):
+            return redirect('login')
+
+        return await arender(request, self.template_name, {
+            'rooms_with_availability': await sync_to_async(get_room_catalog)(),
+            'today': date.today(),
+        })
+
+
+# ------------------ BOOKINGS ------------------
+@method_decorator(conditional_page(booking_pages_version), name='dispatch')
+class BookingListView(AsyncReadView):
+    template_name = views.BookingListView.template_name
+
+    async def get(self, request):
+        user_id = await request.session.aget('user_id')
+        if not user_id:
+            return redirect('login')
+
+        today = timezone.localdate()
+
+        if await request.session.aget('role_name') == 'Admin':
+            filter_form = BookingFilterForm(request.GET or None)
+            bookings = booking_rows()
+            # Validating the room/user choices queries the database
+            if await sync_to_async(filter_form.is_valid)():
+                bookings = filter_bookings(bookings, filter_form.cleaned_data)
+            page = await akeyset_paginate(
+                bookings, 'start_time', request.GET.get('cursor'), page_size=views.BOOKING_PAGE_SIZE,
+            )
+            return await arender(request, self.template_name, {
+                "filter_form": filter_form,
+                "page": page,
+                "today": today,
+            })
+
+        current = [booking async for booking in user_bookings(user_id, today)]
+        _, today_bookings, future_bookings = bucket_by_day(current, today)
+        past_page = await akeyset_paginate(
+            user_past_bookings(user_id, today), 'start_time', request.GET.get('cursor'),
+            page_size=views.BOOKING_PAGE_SIZE, descending=True,
+        )
+        return await arender(request, self.template_name, {
+            "past_page": past_page,
+            "today_bookings": today_bookings,
+            "future_bookings": future_bookings,
+            "today": today,
+            **views.user_booking_window_context(today),
+        })
+
+
+# ------------------ NOTIFICATIONS -------------------
+@method_decorator(conditional_page(notifications_version), name='dispatch')
+class NotificationsView(AsyncReadView):
+    template_name = views.NotificationsView.template_name
+
+    async def get(self, request):
+        user_id = await request.session.aget('user_id')
+        if not user_id:
+            return redirect('login')
+
+        notifications = Notification.objects.filter(user_id=user_id)
+        unread_only = request.GET.get('status') == 'unread'
+        if unread_only:
+            notifications = notifications.filter(notification_status='unread')
+
+        page = await akeyset_paginate(
+            notifications, 'notification_timestamp', request.GET.get('cursor'),
+            page_size=views.NOTIFICATION_PAGE_SIZE, descending=True,
+        )
+        return await arender(request, self.template_name, {
+            'notifications': page.items,
+            'page': page,
+            'unread_only': unread_only,
+            'unread_count': await sync_to_async(request_unread_count)(request),
+        })
+
+
+class NotificationStreamView(View):
+    """
+    Server-sent events with the user's new notifications. Resumes after the
+    Last-Event-ID header (sent by EventSource on reconnect) or ?last_id=;
+    a fresh connection starts after the newest existing notification.
+    """
+
+    async def get(self, request):
+        user_id = await request.session.aget('user_id')
+        if not user_id:
+            return HttpResponse(status=401)
+        if not settings.ASYNC_VIEWS:
+            # A stream would hold a WSGI worker for as long as the tab is open;
+            # 204 tells EventSource not to reconnect.
+            return HttpResponse(status=204)
+
+        last_id = request.headers.get('Last-Event-ID') or request.GET.get('last_id')
+        try:
+            last_id = int(last_id)
+        except (TypeError, ValueError):
+            last_id = await latest_notification_id(user_id)
+
+        response = StreamingHttpResponse(notification_events(user_id, last_id), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'  # let nginx pass events through unbuffered
+        return response
+
+
+# ------------------ ADMIN LISTS ------------------
+class _AdminSnapshotView(AsyncReadView):
+    """Admin-only page rendering one cached snapshot (see catalog.py)."""
+    context_name = None
+    snapshot = None
+
+    async def get(self, request):
+        if await request.session.aget('role_name') != 'Admin':
+            return redirect('home')
+        rows = await sync_to_async(self.snapshot)()
+        return await arender(request, self.template_name, {self.context_name: rows})
+
+
+@method_decorator(conditional_page(room_list_version), name='dispatch')
+class RoomListView(_AdminSnapshotView):
+    template_name = views.RoomListView.template_name
+    context_name = 'rooms'
+    snapshot = staticmethod(get_room_list)
+
+
+@method_decorator(conditional_page(room_type_list_version), name='dispatch')
+class RoomTypeListView(_AdminSnapshotView):
+    template_name = views.RoomTypeListView.template_name
+    context_name = 'types'
+    snapshot = staticmethod(get_room_type_list)
+
+
+@method_decorator(conditional_page(user_list_version), name='dispatch')
+class UserListView(_AdminSnapshotView):
+    template_name = views.UserListView.template_name
+    context_name = 'users'
+    snapshot = staticmethod(get_user_list)
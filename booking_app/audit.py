@@ -0,0 +1,128 @@
+import atexit
+import logging
+import threading
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.db import connection
+
+from .models import ActionLog
+
+logger = logging.getLogger(__name__)
+
+# Entries logged while a request is being handled are collected here and
+# written with one bulk_create when the request finishes (AuditLogMiddleware).
+_request_buffer = ContextVar('audit_request_buffer', default=None)
+
+
+def write_entries(entries):
+    """
+    bulk_create a list of unsaved ActionLog objects; never raises. If the
+    batch fails (e.g. an entry's user was deleted meanwhile) the entries are
+    retried one by one so the rest still land.
+    """
+    if not entries:
+        return 0
+    try:
+        ActionLog.objects.bulk_create(entries, batch_size=500)
+        return len(entries)
+    except Exception:
+        pass
+
+    written = 0
+    for entry in entries:
+        try:
+            entry.save(force_insert=True)
+            written += 1
+        except Exception:
+            logger.exception("Failed to write audit log entry %r", entry.action)
+    return written
+
+
+class BackgroundAuditWriter:
+    """
+    Process-wide buffer for entries logged outside a request (management
+    commands, worker threads). A daemon thread flushes it every `interval`
+    seconds or once `max_size` entries are waiting; an atexit hook flushes
+    whatever is left on shutdown.
+    """
+
+    def __init__(self, interval=2.0, max_size=500):
+        self.interval = interval
+        self.max_size = max_size
+        self._entries = []
+        self._lock = threading.Lock()
+        self._wakeup = threading.Event()
+        self._thread = None
+
+    def add(self, entry):
+        with self._lock:
+            self._entries.append(entry)
+            full = len(self._entries) >= self.max_size
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='audit-writer', daemon=True)
+                self._thread.start()
+        if full:
+            self._wakeup.set()
+
+    def flush(self):
+        with self._lock:
+            entries, self._entries = self._entries, []
+        return write_entries(entries)
+
+    def _run(self):
+        while True:
+            self._wakeup.wait(self.interval)
+            self._wakeup.clear()
+            self.flush()
+            connection.close()
+
+
+background_writer = BackgroundAuditWriter(
+    interval=getattr(settings, 'AUDIT_FLUSH_INTERVAL', 2.0),
+    max_size=getattr(settings, 'AUDIT_FLUSH_MAX_SIZE', 500),
+)
+atexit.register(background_writer.flush)
+
+
+def record(user_id, action):
+    """Buffer one ActionLog entry (request buffer if active, else background)."""
+    entry = ActionLog(user_id=user_id, action=action[:255])
+    buffer = _request_buffer.get()
+    if buffer is not None:
+        buffer.append(entry)
+    else:
+        background_writer.add(entry)
+
+
+class AuditLogMiddleware:
+    """Open a per-request audit buffer and flush it once the response is built."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self._acall(request)
+        token = _request_buffer.set([])
+        try:
+            return self.get_response(request)
+        finally:
+            entries = _request_buffer.get()
+            _request_buffer.reset(token)
+            write_entries(entries)
+
+    async def _acall(self, request):
+        token = _request_buffer.set([])
+        try:
+            return await self.get_response(request)
+        finally:
+            entries = _request_buffer.get()
+            _request_buffer.reset(token)
+            if entries:
+                await sync_to_async(write_entries)(entries)
@@ -0,0 +1,242 @@
+import atexit
+import os
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone as dt_timezone
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import F, Value
+from django.db.models.functions import Greatest
+from django.utils import timezone
+
+from .models import NamespaceVersion
+from .routing import primary_reads
+
+
+# ----------------- VERSIONED KEYS -----------------
+# Each namespace (e.g. 'room_catalog') has a version: the time of its last
+# change, in microseconds. Data is stored under "<namespace>:v<version>", so
+# a bump orphans every old entry at once and they simply expire. Pages also
+# use the versions as ETag markers and their time as Last-Modified.
+#
+# With a shared cache the versions live in it. A per-process cache never sees
+# another process's bumps, so there they live in the NamespaceVersion table
+# instead, read with one primary-key lookup.
+
+def _version_key(namespace):
+    return f"{namespace}:version"
+
+
+def cache_is_shared():
+    """
+    Whether every server process (and management command) uses the same
+    cache, so a version bump made by one is seen by all. The per-process
+    memory cache is not; versions are kept in the database then.
+    """
+    backend = settings.CACHES['default']['BACKEND']
+    return not backend.endswith(('.LocMemCache', '.DummyCache'))
+
+
+def _now_us():
+    return int(timezone.now().timestamp() * 1_000_000)
+
+
+def version_time(version):
+    """The aware datetime of a version, i.e. of the namespace's last change."""
+    return datetime.fromtimestamp(version / 1_000_000, tz=dt_timezone.utc)
+
+
+def _cached_versions(namespaces):
+    keys = {_version_key(namespace): namespace for namespace in namespaces}
+    versions = {keys[key]: version for key, version in cache.get_many(keys).items()}
+    for key, namespace in keys.items():
+        if namespace not in versions:
+            # Evicted or never bumped: anything newer than the entries it guarded
+            cache.add(key, _now_us(), timeout=None)
+            versions[namespace] = cache.get(key)
+    return versions
+
+
+def _stored_versions(namespaces):
+    with primary_reads():
+        rows = NamespaceVersion.objects.filter(namespace__in=namespaces).values_list('namespace', 'version')
+        versions = dict(rows)
+        missing = [namespace for namespace in namespaces if namespace not in versions]
+        if missing:
+            NamespaceVersion.objects.bulk_create(
+                [NamespaceVersion(namespace=namespace, version=_now_us()) for namespace in missing],
+                ignore_conflicts=True,
+            )
+            versions.update(rows.filter(namespace__in=missing))
+    return versions
+
+
+# Versions read while one page is served (see conditional_page), so its
+# ETag and the snapshots it renders agree and cost a single lookup.
+_page_versions = ContextVar('page_versions', default=None)
+
+
+@contextmanager
+def page_versions():
+    token = _page_versions.set({})
+    try:
+        yield
+    finally:
+        _page_versions.reset(token)
+
+
+def get_versions(*namespaces):
+    """{namespace: version}, in one cache or database round trip."""
+    memo = _page_versions.get()
+    if memo is None:
+        return _cached_versions(namespaces) if cache_is_shared() else _stored_versions(namespaces)
+    missing = [namespace for namespace in namespaces if namespace not in memo]
+    if missing:
+        memo.update(_cached_versions(missing) if cache_is_shared() else _stored_versions(missing))
+    return {namespace: memo[namespace] for namespace in namespaces}
+
+
+def get_version(namespace):
+    return get_versions(namespace)[namespace]
+
+
+def bump_version(namespace):
+    memo = _page_versions.get()
+    if memo is not None:
+        memo.pop(namespace, None)
+    now = _now_us()
+    if cache_is_shared():
+        # Not atomic, but two racing bumps both leave a version nobody has used
+        cache.set(_version_key(namespace), max(now, (cache.get(_version_key(namespace)) or 0) + 1), timeout=None)
+        return
+    stored = NamespaceVersion.objects.filter(namespace=namespace)
+    if not stored.update(version=Greatest(F('version') + 1, Value(now))):
+        NamespaceVersion.objects.bulk_create([NamespaceVersion(namespace=namespace, version=now)],
+                                             ignore_conflicts=True)
+
+
+def bump_version_on_commit(namespace):
+    """Bump after the surrounding transaction commits, so a reader can't
+    rebuild from pre-commit data and store it under the new version."""
+    transaction.on_commit(lambda: bump_version(namespace))
+
+
+def get_or_build(namespace, builder, timeout=300, part=''):
+    """
+    Cached result of builder() for the namespace's current version. `part`
+    stores several derived values under one namespace (same invalidation).
+    """
+    key = f"{namespace}:{part}:v{get_version(namespace)}" if part else f"{namespace}:v{get_version(namespace)}"
+    value = cache.get(key)
+    if value is None:
+        count(namespace, 'misses')
+        with primary_reads():  # never cache a lagging replica's view of the data
+            value = builder()
+        cache.set(key, value, timeout=timeout)
+    else:
+        count(namespace, 'hits')
+    return value
+
+
+# ----------------- HIT/MISS COUNTERS -----------------
+# Counted in process memory, like the request metrics (see metrics.py): an
+# incr per read would be a read-and-rewrite of a file on FileBasedCache. Each
+# process writes its counts as one snapshot every METRICS_FLUSH_SECONDS and
+# at exit, and cache_stats() sums them. A reset starts a new epoch; each
+# process drops its counts when its next flush sees it.
+
+_STATS_PROCESSES_KEY = 'cache_stats:processes'
+_STATS_EPOCH_KEY = 'cache_stats:epoch'
+STATS_SNAPSHOT_TIMEOUT = 24 * 60 * 60
+
+
+class ProcessCounts:
+    """This process's hit/miss counts and the cache key they are flushed to."""
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.key = f"cache_stats:process:{uuid.uuid4().hex}"
+        self.epoch = cache.get(_STATS_EPOCH_KEY)
+        self.counts = Counter()
+        self.flushed_at = time.monotonic()
+
+
+_stats_lock = threading.Lock()
+_process_counts = None
+
+
+def _counts():
+    # Rebuilt in a forked worker, so it doesn't flush its parent's counts
+    global _process_counts
+    if _process_counts is None or _process_counts.pid != os.getpid():
+        _process_counts = ProcessCounts()
+    return _process_counts
+
+
+def _flush_seconds():
+    return getattr(settings, 'METRICS_FLUSH_SECONDS', 10)
+
+
+def count(namespace, kind):
+    with _stats_lock:
+        counts = _counts()
+        counts.counts[(namespace, kind)] += 1
+        due = time.monotonic() - counts.flushed_at >= _flush_seconds()
+    if due:
+        flush_cache_stats()
+
+
+def flush_cache_stats():
+    """Write this process's counts to the cache, first dropping them if a reset happened."""
+    epoch = cache.get(_STATS_EPOCH_KEY)
+    with _stats_lock:
+        counts = _counts()
+        if counts.epoch != epoch:
+            counts.epoch = epoch
+            counts.counts.clear()
+        snapshot = dict(counts.counts)
+        counts.flushed_at = time.monotonic()
+    if not snapshot:
+        return
+    cache.set(counts.key, {'epoch': epoch, 'counts': snapshot}, timeout=STATS_SNAPSHOT_TIMEOUT)
+    keys = cache.get(_STATS_PROCESSES_KEY) or []
+    if counts.key not in keys:
+        cache.set(_STATS_PROCESSES_KEY, keys + [counts.key], timeout=None)
+
+
+atexit.register(flush_cache_stats)
+
+
+def cache_stats():
+    """{namespace: {'hits', 'misses', 'hit_rate'}} since the last reset."""
+    flush_cache_stats()
+    epoch = cache.get(_STATS_EPOCH_KEY)
+    keys = cache.get(_STATS_PROCESSES_KEY) or []
+    snapshots = cache.get_many(keys)
+    if len(snapshots) < len(keys):
+        cache.set(_STATS_PROCESSES_KEY, [key for key in keys if key in snapshots], timeout=None)
+
+    totals = Counter()
+    for snapshot in snapshots.values():
+        if snapshot['epoch'] == epoch:
+            totals.update(snapshot['counts'])
+    stats = {}
+    for namespace in sorted({namespace for namespace, _ in totals}):
+        hits, misses = totals[(namespace, 'hits')], totals[(namespace, 'misses')]
+        stats[namespace] = {
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': round(hits / (hits + misses), 3) if hits + misses else None,
+        }
+    return stats
+
+
+def reset_cache_stats():
+    cache.set(_STATS_EPOCH_KEY, uuid.uuid4().hex, timeout=None)
+    flush_cache_stats()
@@ -0,0 +1,78 @@
+from django.conf import settings
+from django.db.models import Prefetch
+
+from .caching import get_or_build
+from .models import Room, RoomAvailability, RoomType, User
+
+CATALOG_NAMESPACE = 'room_catalog'
+ROOM_TYPES_NAMESPACE = 'room_types'
+USERS_NAMESPACE = 'user_list'
+
+
+def _timeout():
+    return getattr(settings, 'CATALOG_CACHE_TIMEOUT', 300)
+
+
+# ----------------- ROOMS -----------------
+def build_room_catalog():
+    """
+    Rooms with their type name and availability rows as plain dicts.
+    Two queries total (rooms + room types joined, availability prefetched).
+    """
+    rooms = (
+        Room.objects
+        .select_related('room_type')
+        .prefetch_related(Prefetch('roomavailability_set', queryset=RoomAvailability.objects.order_by('id')))
+        .order_by('id')
+    )
+    return [
+        {
+            'room': {
+                'id': room.id,
+                'room_number': room.room_number,
+                'room_type_name': room.room_type.room_type_name,
+                'capacity': room.capacity,
+            },
+            'availability': [
+                {
+                    'day_of_week': avail.day_of_week,
+                    'start_time': avail.start_time,
+                    'end_time': avail.end_time,
+                }
+                for avail in room.roomavailability_set.all()
+            ],
+        }
+        for room in rooms
+    ]
+
+
+def get_room_catalog():
+    """Cached catalog snapshot; invalidated by signals in booking_app.signals."""
+    return get_or_build(CATALOG_NAMESPACE, build_room_catalog, timeout=_timeout())
+
+
+def get_room_list():
+    """Room dicts (id, room_number, room_type_name, capacity) from the catalog."""
+    return [item['room'] for item in get_room_catalog()]
+
+
+# ----------------- ROOM TYPES -----------------
+def build_room_type_list():
+    return list(RoomType.objects.order_by('id').values('id', 'room_type_name', 'room_type_description'))
+
+
+def get_room_type_list():
+    return get_or_build(ROOM_TYPES_NAMESPACE, build_room_type_list, timeout=_timeout())
+
+
+# ----------------- USERS -----------------
+def build_user_list():
+    """Users with their role name, one joined query. No password hashes."""
+    return [
+        {'id': row['id'], 'name': row['name'], 'email': row['email'], 'role_name': row['role__role_name']}
+        for row in User.objects.order_by('id').values('id', 'name', 'email', 'role__role_name')
+    ]
+
+
+def get_user_list():
+    return get_or_build(USERS_NAMESPACE, build_user_list, timeout=_timeout())
@@ -0,0 +1,135 @@
+import hashlib
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, sync_to_async
+from django.conf import settings
+from django.contrib.messages import get_messages
+from django.db.models import Max, Min
+from django.utils import timezone
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+from .analytics import STATS_NAMESPACE
+from .caching import get_version, get_versions, page_versions, version_time
+from .catalog import CATALOG_NAMESPACE, ROOM_TYPES_NAMESPACE, USERS_NAMESPACE
+from .inbox import request_unread_count
+from .models import ActionLog, Notification
+
+# Conditional GET for the read-only pages.
+#
+# Each page declares a version function returning cheap markers of the data
+# it shows, cache namespace versions or an indexed MIN/MAX over the rows, and
+# the time of the newest change they record. The ETag hashes the markers
+# together with everything the base template shows (user, role, unread
+# badge, CSRF cookie) and the full URL, so an unchanged page gets a 304
+# before the view runs. Last-Modified is sent too, but only If-None-Match
+# is honoured: a date can't tell when the badge or the session changed.
+# Responses are `private, no-cache`: browsers must revalidate and shared
+# caches never store a per-user page.
+
+
+# ----------------- PAGE VERSIONS -----------------
+def namespace_versions(*namespaces):
+    """Version function for pages built only from cached snapshots."""
+    def version(request):
+        versions = get_versions(*namespaces)
+        return list(versions.values()), version_time(max(versions.values()))
+    return version
+
+
+home_version = namespace_versions(CATALOG_NAMESPACE)
+
+# Booking list and dashboard: any booking change bumps STATS_NAMESPACE, and
+# rows show room numbers and user names
+booking_pages_version = namespace_versions(STATS_NAMESPACE, CATALOG_NAMESPACE, USERS_NAMESPACE)
+
+
+def notifications_version(request):
+    # Read/unread changes are covered by the unread count in every ETag
+    marks = (
+        Notification.objects.filter(user_id=request.session['user_id'])
+        .aggregate(first=Min('id'), last=Max('id'), newest=Max('notification_timestamp'))
+    )
+    return [marks['first'], marks['last']], marks['newest']
+
+
+def audit_log_version(request):
+    # Rows show user names, which only the users namespace tracks
+    marks = ActionLog.objects.aggregate(first=Min('id'), last=Max('id'), newest=Max('action_timestamp'))
+    users = get_version(USERS_NAMESPACE)
+    changed = version_time(users)
+    return [marks['first'], marks['last'], users], max(changed, marks['newest'] or changed)
+
+
+room_list_version = namespace_versions(CATALOG_NAMESPACE)
+room_type_list_version = namespace_versions(ROOM_TYPES_NAMESPACE)
+user_list_version = namespace_versions(USERS_NAMESPACE)
+
+
+# ----------------- VALIDATORS -----------------
+def page_validators(request, version):
+    """
+    (ETag, Last-Modified) for the current user's view of this page, or
+    (None, None) when the page must always be rendered (not a GET, logged
+    out, or flash messages waiting).
+    """
+    user_id = request.session.get('user_id')
+    if request.method not in ('GET', 'HEAD') or not user_id or len(get_messages(request)):
+        return None, None
+    markers, last_modified = version(request)
+
+    key = [
+        user_id,
+        request.session.get('role_name'),
+        request.session.get('user_name'),
+        request_unread_count(request),
+        request.COOKIES.get(settings.CSRF_COOKIE_NAME, ''),
+        timezone.localdate().isoformat(),
+        request.get_full_path(),
+        markers,
+    ]
+    return quote_etag(hashlib.sha1(repr(key).encode()).hexdigest()), last_modified
+
+
+def _not_modified(request, etag):
+    return get_conditional_response(request, etag=etag) if etag else None
+
+
+def _finish(request, etag, last_modified, response):
+    patch_cache_control(response, private=True, no_cache=True)
+    # A page rendered from a lagging replica may predate the versions in its
+    # ETag, so only primary-rendered pages get one
+    if etag and (response.status_code == 304 or (response.status_code == 200 and not getattr(request, 'used_replica', False))):
+        response.headers['ETag'] = etag
+        if last_modified is not None:
+            response.headers['Last-Modified'] = http_date(last_modified.timestamp())
+    return response
+
+
+def conditional_page(version):
+    """
+    Answer GET/HEAD with 304 Not Modified when the client's If-None-Match
+    still matches, otherwise run the view. Use instead of never_cache with
+    method_decorator(conditional_page(...), name='dispatch'), outside
+    replica_reads so the versions come from the primary. Works for async
+    views too.
+    """
+    def decorator(view):
+        if iscoroutinefunction(view):
+            async def wrapper(request, *args, **kwargs):
+                with page_versions():
+                    etag, last_modified = await sync_to_async(page_validators)(request, version)
+                    response = _not_modified(request, etag)
+                    if response is None:
+                        response = await view(request, *args, **kwargs)
+                return _finish(request, etag, last_modified, response)
+        else:
+            def wrapper(request, *args, **kwargs):
+                with page_versions():
+                    etag, last_modified = page_validators(request, version)
+                    response = _not_modified(request, etag)
+                    if response is None:
+                        response = view(request, *args, **kwargs)
+                return _finish(request, etag, last_modified, response)
+        return wraps(view)(wrapper)
+    return decorator
@@ -0,0 +1,237 @@
+import time
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import timedelta
+
+from django.core.exceptions import ValidationError
+from django.db import OperationalError, transaction
+
+from .models import Booking, Room, RoomAvailability
+
+# Bookings in these states hold their slot; cancelled/completed ones do not.
+ACTIVE_STATUSES = ('pending', 'approved')
+
+# Lock waits that end in a deadlock or timeout are retried this many times,
+# sleeping LOCK_RETRY_DELAY * attempt seconds in between.
+LOCK_RETRIES = 3
+LOCK_RETRY_DELAY = 0.05
+
+# Upper bound on a booking's length. It gives the overlap query a lower bound
+# on start_time, so the index scan stays bounded however many bookings a room has.
+# The database enforces it too (constraint booking_max_length; migration 0016
+# split the longer rows saved before it existed).
+MAX_BOOKING_LENGTH = timedelta(days=1)
+
+
+# ----------------- DATABASE CHECKS -----------------
+def overlapping_bookings(room, start, end, exclude_id=None):
+    """
+    Active bookings for `room` that overlap the half-open range [start, end).
+    Served by the (room, start_time, end_time) index as a single range scan.
+    """
+    qs = Booking.objects.filter(
+        room=room,
+        start_time__gt=start - MAX_BOOKING_LENGTH,
+        start_time__lt=end,
+        end_time__gt=start,
+        status__in=ACTIVE_STATUSES,
+    )
+    if exclude_id is not None:
+        qs = qs.exclude(id=exclude_id)
+    return qs
+
+
+def has_conflict(room, start, end, exclude_id=None):
+    return overlapping_bookings(room, start, end, exclude_id).exists()
+
+
+def availability_windows(room, day_of_week):
+    """(start_time, end_time) pairs for a room on a weekday name, e.g. 'Monday'."""
+    return list(
+        RoomAvailability.objects
+        .filter(room=room, day_of_week=day_of_week)
+        .values_list('start_time', 'end_time')
+    )
+
+
+def fits_availability(windows, start, end):
+    return any(start.time() >= w_start and end.time() <= w_end for w_start, w_end in windows)
+
+
+def length_error(start, end):
+    if end <= start:
+        return "End time must be later than start time."
+    if end - start > MAX_BOOKING_LENGTH:
+        return "Bookings cannot be longer than 24 hours."
+    return None
+
+
+def availability_error(windows, start, end):
+    if not windows:
+        return "This room has no availability on that day."
+    if not fits_availability(windows, start, end):
+        return "Booking must be within the room’s available time periods."
+    return None
+
+
+CONFLICT_MESSAGE = "This room is already booked for part of that time."
+
+
+def validate_booking(room, start, end, exclude_id=None, check_overlap=True):
+    """
+    Raise ValidationError unless [start, end) sits inside one of the room's
+    availability windows and (optionally) does not overlap an active booking.
+    Costs at most two queries regardless of how many bookings the room has.
+    """
+    error = length_error(start, end)
+    if error is None:
+        error = availability_error(availability_windows(room, start.strftime("%A")), start, end)
+    if error:
+        raise ValidationError(error)
+
+    if check_overlap and has_conflict(room, start, end, exclude_id):
+        raise ValidationError(CONFLICT_MESSAGE)
+
+
+# ----------------- LOCKED WRITES -----------------
+def with_room_locks(room_ids, func, retries=LOCK_RETRIES):
+    """
+    Run func() in a new transaction that first locks the rooms' rows with
+    SELECT ... FOR UPDATE, so bookings for one room are written one at a
+    time while other rooms proceed in parallel. Rows are locked in id order
+    so two callers locking overlapping sets can't deadlock each other;
+    deadlocks and lock wait timeouts (OperationalError) are retried. The
+    transaction must be the outermost one: the lock has to come before any
+    read so that checks made under it see every booking committed before it
+    was granted.
+    """
+    room_ids = sorted(set(room_ids))
+    for attempt in range(retries + 1):
+        try:
+            with transaction.atomic(durable=True):
+                locked = Room.objects.select_for_update().filter(pk__in=room_ids).order_by('id')
+                list(locked.values_list('id', flat=True))
+                return func()
+        except OperationalError:
+            if attempt == retries:
+                raise
+            time.sleep(LOCK_RETRY_DELAY * (attempt + 1))
+
+
+def with_room_lock(room_id, func, retries=LOCK_RETRIES):
+    """with_room_locks() for a single room."""
+    return with_room_locks([room_id], func, retries)
+
+
+def save_booking_locked(booking, on_saved=None, check_overlap=True):
+    """
+    Save a booking validated outside the lock, repeating the overlap check
+    under the room lock; raises ValidationError if another request took the
+    slot meanwhile. on_saved(booking) runs in the same transaction.
+    """
+    def save():
+        if check_overlap and has_conflict(booking.room_id, booking.start_time, booking.end_time, booking.pk):
+            raise ValidationError(CONFLICT_MESSAGE)
+        booking.save()
+        if on_saved is not None:
+            on_saved(booking)
+        return booking
+
+    return with_room_lock(booking.room_id, save)
+
+
+# ----------------- IN-MEMORY INDEX -----------------
+class RoomIntervalIndex:
+    """
+    Per-room sorted interval index for validating many bookings at once.
+
+    Intervals for a room are kept merged into disjoint spans sorted by start,
+    so an overlap test is one bisect and inserts keep the lists sorted.
+    Load it once with the existing bookings, then check/add candidate rows.
+    """
+
+    def __init__(self):
+        self._starts = {}
+        self._ends = {}
+
+    @classmethod
+    def for_rooms(cls, room_ids, start=None, end=None):
+        """Build an index from the active bookings of `room_ids` in one query."""
+        index = cls()
+        qs = Booking.objects.filter(room_id__in=room_ids, status__in=ACTIVE_STATUSES)
+        if start is not None:
+            qs = qs.filter(end_time__gt=start)
+        if end is not None:
+            qs = qs.filter(start_time__lt=end)
+        rows = qs.order_by('room_id', 'start_time').values_list('room_id', 'start_time', 'end_time')
+        for room_id, b_start, b_end in rows.iterator(chunk_size=5000):
+            index.add(room_id, b_start, b_end)
+        return index
+
+    def overlaps(self, room_id, start, end):
+        starts = self._starts.get(room_id)
+        if not starts:
+            return False
+        # Last span starting before `end`; spans are disjoint so its end is the max.
+        i = bisect_left(starts, end) - 1
+        return i >= 0 and self._ends[room_id][i] > start
+
+    def add(self, room_id, start, end):
+        starts = self._starts.setdefault(room_id, [])
+        ends = self._ends.setdefault(room_id, [])
+
+        # Merge with every span that touches [start, end).
+        lo = bisect_left(ends, start)
+        hi = bisect_right(starts, end)
+        if lo < hi:
+            start = min(start, starts[lo])
+            end = max(end, ends[hi - 1])
+        starts[lo:hi] = [start]
+        ends[lo:hi] = [end]
+
+    def try_add(self, room_id, start, end):
+        """Add the interval unless it overlaps; returns True if it was added."""
+        if self.overlaps(room_id, start, end):
+            return False
+        self.add(room_id, start, end)
+        return True
+
+    def __len__(self):
+        return sum(len(s) for s in self._starts.values())
+
+
+class BatchValidator:
+    """
+    Validate many candidate bookings in memory: availability for the rooms
+    is loaded in one query and their active bookings in another, then each
+    candidate is checked against both and against the candidates accepted
+    before it.
+    """
+
+    def __init__(self, room_ids, start=None, end=None):
+        room_ids = set(room_ids)
+        self.windows = defaultdict(list)
+        rows = RoomAvailability.objects.filter(room_id__in=room_ids).values_list(
+            'room_id', 'day_of_week', 'start_time', 'end_time',
+        )
+        for room_id, day, w_start, w_end in rows:
+            self.windows[(room_id, day)].append((w_start, w_end))
+
+        if start is not None:
+            start = start - MAX_BOOKING_LENGTH
+        self.index = RoomIntervalIndex.for_rooms(room_ids, start, end)
+
+    def check(self, room_id, start, end, status='pending'):
+        """
+        Return an error message, or None after reserving [start, end) so
+        later candidates in the batch conflict with it.
+        """
+        error = length_error(start, end)
+        if error is None:
+            error = availability_error(self.windows.get((room_id, start.strftime("%A"))), start, end)
+        if error:
+            return error
+
+        if status in ACTIVE_STATUSES and not self.index.try_add(room_id, start, end):
+            return CONFLICT_MESSAGE
+        return None
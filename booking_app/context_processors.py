@@ -0,0 +1,9 @@
+from .inbox import request_unread_count
+
+
+def unread_notifications(request):
+    """Navbar badge count, read from the user's counter once per request."""
+    user_id = request.session.get('user_id') if hasattr(request, 'session') else None
+    if not user_id:
+        return {}
+    return {'unread_notifications': request_unread_count(request)}
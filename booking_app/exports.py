@@ -0,0 +1,85 @@
+import csv
+import json
+from datetime import date, datetime
+
+from django.http import StreamingHttpResponse
+
+EXPORT_FORMATS = ('csv', 'ndjson')
+
+
+class _Echo:
+    """File-like object whose write() just hands the line back to csv.writer."""
+
+    def write(self, value):
+        return value
+
+
+def chunked_values(queryset, fields, chunk_size=2000):
+    """
+    Yield value tuples for `fields` (which must start with 'id') in id order,
+    one keyset-bounded query per chunk. Unlike a single .iterator() this keeps
+    memory flat on MySQL too, whose driver buffers a whole result set.
+    """
+    last_id = 0
+    while True:
+        rows = list(
+            queryset.filter(id__gt=last_id)
+            .order_by('id')
+            .values_list(*fields)[:chunk_size]
+        )
+        if not rows:
+            return
+        yield from rows
+        last_id = rows[-1][0]
+
+
+def _iso(value):
+    return value.isoformat() if isinstance(value, (date, datetime)) else value
+
+
+def _csv_lines(header, rows):
+    writer = csv.writer(_Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow([_iso(v) for v in row])
+
+
+def _ndjson_lines(header, rows):
+    for row in rows:
+        yield json.dumps(dict(zip(header, row)), default=_iso) + '\n'
+
+
+def streaming_export(filename, fmt, header, rows):
+    """StreamingHttpResponse of `rows` (an iterable of tuples) as CSV or NDJSON."""
+    if fmt == 'ndjson':
+        response = StreamingHttpResponse(_ndjson_lines(header, rows), content_type='application/x-ndjson')
+    else:
+        fmt = 'csv'
+        response = StreamingHttpResponse(_csv_lines(header, rows), content_type='text/csv')
+    response['Content-Disposition'] = f'attachment; filename="{filename}.{fmt}"'
+    return response
+
+
+def write_export(stream, fmt, header, rows):
+    """Same output as streaming_export, written to an open text file."""
+    lines = _ndjson_lines(header, rows) if fmt == 'ndjson' else _csv_lines(header, rows)
+    count = -1 if fmt != 'ndjson' else 0  # don't count the CSV header
+    for line in lines:
+        stream.write(line)
+        count += 1
+    return count
+
+
+# ----------------- BOOKINGS -----------------
+BOOKING_EXPORT_HEADER = [
+    'id', 'room_number', 'room_type', 'user_name', 'user_email', 'start_time', 'end_time', 'status',
+]
+BOOKING_EXPORT_FIELDS = [
+    'id', 'room__room_number', 'room__room_type__room_type_name', 'user__name', 'user__email',
+    'start_time', 'end_time', 'status',
+]
+
+
+def booking_export_rows(queryset, chunk_size=2000):
+    """Booking tuples joined with room, room type and user; no model instances."""
+    return chunked_values(queryset, BOOKING_EXPORT_FIELDS, chunk_size=chunk_size)
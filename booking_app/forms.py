@@ -4,6 +4,10 @@ from django.core.exceptions import ValidationError
 from django.forms import modelformset_factory
 from booking_app.models import Booking, Room, Role, RoomAvailability
 from booking_app.models import Room, RoomType, User
+from booking_app.conflicts import ACTIVE_STATUSES, validate_booking
+from booking_app.models import BookingSeries
+from booking_app.series import MAX_OCCURRENCES, check_occurrences, expand_occurrences, occurrence_count
+from booking_app.analytics import MAX_RANGE_DAYS
 
 
 from django.forms import modelformset_factory
@@ -81,6 +85,11 @@ class BookingForm(forms.ModelForm):
             'end_time': forms.DateTimeInput(attrs={'type': 'datetime-local'}),
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Room labels show the room type
+        self.fields['room'].queryset = Room.objects.select_related('room_type')
+
     def clean(self):
         cleaned_data = super().clean()
         room = cleaned_data.get('room')
@@ -90,24 +99,8 @@ class BookingForm(forms.ModelForm):
         if not room or not start or not end:
             return cleaned_data
 
-        # Get weekday code from start_time (Mon, Tue, etc.)
-        weekday_code = start.strftime("%A")  # e.g. "Mon"
-
-        # Find availability slots for that room/day
-        availabilities = RoomAvailability.objects.filter(room=room, day_of_week=weekday_code)
-
-        if not availabilities.exists():
-            raise forms.ValidationError("This room has no availability on that day.")
-
-        # Check if booking fits inside ANY availability slot
-        valid_slot = False
-        for avail in availabilities:
-            if start.time() >= avail.start_time and end.time() <= avail.end_time:
-                valid_slot = True
-                break
-
-        if not valid_slot:
-            raise forms.ValidationError("Booking must be within the room’s available time periods.")
+        # Availability window + overlap with existing pending/approved bookings
+        validate_booking(room, start, end, exclude_id=self.instance.pk)
 
         return cleaned_data
 
@@ -120,6 +113,11 @@ class AdminBookingForm(forms.ModelForm):
             'end_time': forms.DateTimeInput(attrs={'type': 'datetime-local'}),
         }
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        # Room labels show the room type
+        self.fields['room'].queryset = Room.objects.select_related('room_type')
+
     def clean(self):
         cleaned_data = super().clean()
         room = cleaned_data.get('room')
@@ -129,24 +127,13 @@ class AdminBookingForm(forms.ModelForm):
         if not room or not start or not end:
             return cleaned_data
 
-        # Get weekday code from start_time (Mon, Tue, etc.)
-        weekday_code = start.strftime("%A")  # e.g. "Mon"
-
-        # Find availability slots for that room/day
-        availabilities = RoomAvailability.objects.filter(room=room, day_of_week=weekday_code)
-
-        if not availabilities.exists():
-            raise forms.ValidationError("This room has no availability on that day.")
-
-        # Check if booking fits inside ANY availability slot
-        valid_slot = False
-        for avail in availabilities:
-            if start.time() >= avail.start_time and end.time() <= avail.end_time:
-                valid_slot = True
-                break
-
-        if not valid_slot:
-            raise forms.ValidationError("Booking must be within the room’s available time periods.")
+        # Only bookings that will hold the slot need the overlap check
+        status = cleaned_data.get('status') or 'pending'
+        validate_booking(
+            room, start, end,
+            exclude_id=self.instance.pk,
+            check_overlap=status in ACTIVE_STATUSES,
+        )
 
         return cleaned_data
 
@@ -200,4 +187,121 @@ class UserCreateForm(forms.ModelForm):
 
         if commit:
             user.save()
-        return user
\ No newline at end of file
+        return user
+
+class BookingFilterForm(forms.Form):
+    room = forms.ModelChoiceField(queryset=Room.objects.select_related('room_type').order_by('room_number'), required=False)
+    user = forms.ModelChoiceField(queryset=User.objects.order_by('name'), required=False)
+    status = forms.ChoiceField(choices=[('', 'Any status')] + Booking.STATUS_CHOICES, required=False)
+    date_from = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+    date_to = forms.DateField(required=False, widget=forms.DateInput(attrs={'type': 'date'}))
+
+
+
+class UtilizationRangeForm(forms.Form):
+    prefix = 'stats'
+
+    date_from = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}), label="From")
+    date_to = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}), label="To")
+
+    def clean(self):
+        cleaned_data = super().clean()
+        date_from = cleaned_data.get('date_from')
+        date_to = cleaned_data.get('date_to')
+        if date_from and date_to:
+            if date_to < date_from:
+                raise ValidationError("End date must not be before start date.")
+            if (date_to - date_from).days + 1 > MAX_RANGE_DAYS:
+                raise ValidationError(f"Choose a range of at most {MAX_RANGE_DAYS} days.")
+        return cleaned_data
+
+
+
+class AuditLogFilterForm(forms.Form):
+    user = forms.ModelChoiceField(queryset=User.objects.order_by('name'), required=False)
+    action = forms.CharField(required=False, max_length=255, label="Action starts with")
+    since = forms.DateTimeField(required=False, widget=forms.DateTimeInput(attrs={'type': 'datetime-local'}))
+    until = forms.DateTimeField(required=False, widget=forms.DateTimeInput(attrs={'type': 'datetime-local'}))
+
+
+
+class BookingSeriesForm(forms.ModelForm):
+    skip_conflicts = forms.BooleanField(
+        required=False,
+        label="Skip dates that are unavailable (otherwise nothing is booked)",
+    )
+
+    class Meta:
+        model = BookingSeries
+        fields = ['room', 'start_time', 'end_time', 'interval_days', 'until']
+        labels = {
+            'start_time': "First start",
+            'end_time': "First end",
+            'interval_days': "Repeat every N days (7 = weekly)",
+            'until': "Repeat until",
+        }
+        widgets = {
+            'start_time': forms.DateTimeInput(attrs={'type': 'datetime-local'}),
+            'end_time': forms.DateTimeInput(attrs={'type': 'datetime-local'}),
+            'until': forms.DateInput(attrs={'type': 'date'}),
+        }
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fields['room'].queryset = Room.objects.select_related('room_type')
+        self.occurrences = []
+
+    def clean_interval_days(self):
+        interval = self.cleaned_data['interval_days']
+        if interval < 1:
+            raise ValidationError("Repeat interval must be at least one day.")
+        return interval
+
+    def clean(self):
+        cleaned_data = super().clean()
+        room = cleaned_data.get('room')
+        start = cleaned_data.get('start_time')
+        end = cleaned_data.get('end_time')
+        interval = cleaned_data.get('interval_days')
+        until = cleaned_data.get('until')
+
+        if not room or not start or not end or not interval or not until:
+            return cleaned_data
+        if until < timezone.localtime(start).date():
+            raise ValidationError("'Repeat until' must not be before the first booking.")
+        count = occurrence_count(start, interval, until)
+        if count > MAX_OCCURRENCES:
+            raise ValidationError(
+                f"A series can have at most {MAX_OCCURRENCES} bookings; this one would have {count}. "
+                f"Choose an earlier 'Repeat until' date or a longer interval."
+            )
+
+        # Expand in memory and validate every date in one pass
+        occurrences = expand_occurrences(start, end, interval, until)
+        ok, problems = check_occurrences(room, occurrences)
+        if problems and not cleaned_data.get('skip_conflicts'):
+            raise ValidationError([
+                f"{timezone.localtime(when):%a %Y-%m-%d %H:%M}: {message}" for when, message in problems
+            ])
+        if not ok:
+            raise ValidationError("None of the dates in this series can be booked.")
+
+        self.occurrences = ok
+        return cleaned_data
+
+
+
+class FreeRoomSearchForm(forms.Form):
+    date = forms.DateField(widget=forms.DateInput(attrs={'type': 'date'}))
+    days = forms.IntegerField(min_value=1, max_value=31, initial=1, label="Number of days")
+    start_time = forms.TimeField(widget=forms.TimeInput(attrs={'type': 'time'}), label="From")
+    end_time = forms.TimeField(widget=forms.TimeInput(attrs={'type': 'time'}), label="To")
+    min_capacity = forms.IntegerField(min_value=0, required=False, label="Minimum capacity")
+
+    def clean(self):
+        cleaned_data = super().clean()
+        start = cleaned_data.get('start_time')
+        end = cleaned_data.get('end_time')
+        if start and end and end <= start:
+            raise ValidationError("End time must be later than start time.")
+        return cleaned_data
@@ -0,0 +1,164 @@
+from datetime import datetime, timedelta
+
+import numpy as np
+from django.db import connections
+from django.db.models import Q
+from django.utils import timezone
+
+from .caching import get_or_build
+from .catalog import CATALOG_NAMESPACE, get_room_catalog
+from .conflicts import ACTIVE_STATUSES, MAX_BOOKING_LENGTH
+from .models import Booking
+
+SLOT_MINUTES = 15
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+def _minutes(t):
+    return t.hour * 60 + t.minute
+
+
+def _seconds(t):
+    return t.hour * 3600 + t.minute * 60 + t.second
+
+
+# ----------------- WEEKLY AVAILABILITY MATRIX -----------------
+def build_week_matrix():
+    """
+    Room metadata, a (rooms x 7 weekdays x slots) boolean array that is True
+    where RoomAvailability says the room is open (for utilization figures),
+    and the availability windows themselves as parallel arrays (for exact
+    searches). Built from the cached room catalog, so it costs no queries
+    when the catalog is warm.
+    """
+    catalog = get_room_catalog()
+    week = np.zeros((len(catalog), 7, SLOTS_PER_DAY), dtype=bool)
+    windows = []
+    for i, item in enumerate(catalog):
+        for avail in item['availability']:
+            if avail['day_of_week'] not in WEEKDAYS:
+                continue
+            day = WEEKDAYS.index(avail['day_of_week'])
+            windows.append((i, day, _seconds(avail['start_time']), _seconds(avail['end_time'])))
+            # Only slots wholly inside the window count as open
+            first = -(-_minutes(avail['start_time']) // SLOT_MINUTES)
+            end_minutes = _minutes(avail['end_time'])
+            last = SLOTS_PER_DAY if end_minutes >= 24 * 60 - 1 else end_minutes // SLOT_MINUTES
+            week[i, day, first:last] = True
+
+    rooms = [item['room'] for item in catalog]
+    windows = np.array(windows, dtype=np.int64).reshape(-1, 4)
+    return {
+        'rooms': rooms,
+        'room_ids': np.array([r['id'] for r in rooms], dtype=np.int64),
+        'capacity': np.array([r['capacity'] for r in rooms], dtype=np.int64),
+        'week': week,
+        # Window i is open on weekday window_days[i] of row window_rows[i]
+        'window_rows': windows[:, 0],
+        'window_days': windows[:, 1],
+        'window_starts': windows[:, 2],
+        'window_ends': windows[:, 3],
+    }
+
+
+def get_week_matrix():
+    # Shares the catalog's version, so room/availability edits rebuild it too
+    return get_or_build(CATALOG_NAMESPACE, build_week_matrix, timeout=300, part='week_slots')
+
+
+def room_rows(room_ids, ids):
+    """
+    Matrix row for each id in `ids`, given the matrix's (non-empty)
+    `room_ids` array, plus a mask that is False for ids not in the matrix.
+    """
+    order = np.argsort(room_ids)
+    pos = np.searchsorted(room_ids, ids, sorter=order).clip(0, len(room_ids) - 1)
+    row = order[pos]
+    return row, room_ids[row] == ids
+
+
+def booking_edges(queryset):
+    """
+    (room ids, start, end) arrays for a values_list('room_id', 'start_time',
+    'end_time') queryset, with times as epoch seconds. Read from a plain
+    cursor: the ORM turning every value into an aware datetime costs more
+    than the rest of a search, while the naive UTC datetimes the database
+    drivers return convert to datetime64 in one numpy call.
+    """
+    sql, params = queryset.query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(sql, params)
+        rows = cursor.fetchall()
+    if not rows:
+        return np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0)
+
+    room_ids, starts, ends = zip(*rows)
+
+    def seconds(values):
+        return np.array(values, dtype='datetime64[us]').astype(np.int64) / 1e6
+    return np.array(room_ids, dtype=np.int64), seconds(starts), seconds(ends)
+
+
+# ----------------- SEARCH -----------------
+def search_free_rooms(first_day, days, start_time, end_time, min_capacity=0):
+    """
+    Rooms that are open and unbooked for [start_time, end_time) local time
+    on each of `days` consecutive days from `first_day`.
+
+    Returns (rooms, free, dates) where `free` is a (rooms x days) boolean
+    array aligned with the `rooms` dicts and `dates`; only rooms free on at
+    least one day and with enough capacity are included. A room is open when
+    one availability window contains the whole range and busy when an active
+    booking overlaps it, both compared exactly (as validate_booking does),
+    not on the slot grid. One bookings query per search.
+    """
+    matrix = get_week_matrix()
+    dates = [first_day + timedelta(days=d) for d in range(days)]
+    weekdays = [d.weekday() for d in dates]
+    win_starts = [timezone.make_aware(datetime.combine(d, start_time)) for d in dates]
+    win_ends = [timezone.make_aware(datetime.combine(d, end_time)) for d in dates]
+
+    # Open: some window on that weekday contains [start_time, end_time)
+    fits = (matrix['window_starts'] <= _seconds(start_time)) & (matrix['window_ends'] >= _seconds(end_time))
+    open_week = np.zeros((len(matrix['rooms']), 7), dtype=bool)
+    open_week[matrix['window_rows'][fits], matrix['window_days'][fits]] = True
+
+    free = open_week[:, weekdays] & ~_busy_days(matrix['room_ids'], win_starts, win_ends)
+    free &= (matrix['capacity'] >= min_capacity)[:, None]
+
+    keep = np.flatnonzero(free.any(axis=1))
+    return [matrix['rooms'][i] for i in keep], free[keep], dates
+
+
+def _busy_days(room_ids, win_starts, win_ends):
+    """(rooms x days) boolean array, True where an active booking overlaps that day's window."""
+    busy = np.zeros((len(room_ids), len(win_starts)), dtype=bool)
+    if not len(room_ids) or win_ends[0] <= win_starts[0]:
+        return busy
+
+    overlap = Q()
+    for ws, we in zip(win_starts, win_ends):
+        overlap |= Q(start_time__gt=ws - MAX_BOOKING_LENGTH, start_time__lt=we, end_time__gt=ws)
+    # The outer start_time bounds let the per-day OR run as one index range scan
+    b_rooms, b_start, b_end = booking_edges(
+        Booking.objects.filter(
+            overlap,
+            start_time__gt=win_starts[0] - MAX_BOOKING_LENGTH,
+            start_time__lt=win_ends[-1],
+            status__in=ACTIVE_STATUSES,
+        )
+        .values_list('room_id', 'start_time', 'end_time')
+    )
+    if not len(b_rooms):
+        return busy
+
+    # Map booking rooms onto matrix rows; bookings for unknown rooms are dropped
+    row, known = room_rows(room_ids, b_rooms)
+    w_start = np.array([ws.timestamp() for ws in win_starts])
+    w_end = np.array([we.timestamp() for we in win_ends])
+    # Half-open overlap of every (booking, day) pair
+    hit = (b_start[:, None] < w_end[None, :]) & (b_end[:, None] > w_start[None, :]) & known[:, None]
+    b_idx, d_idx = np.nonzero(hit)
+    busy[row[b_idx], d_idx] = True
+    return busy
@@ -0,0 +1,79 @@
+from collections import Counter, defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Notification, User
+from .routing import primary_reads
+
+# Each user's unread count is stored on User.unread_notifications, so the
+# navbar badge is a primary-key lookup rather than a COUNT. Writers adjust it
+# with F() updates in the same transaction that adds, reads or deletes the
+# notifications, which keeps it exact under concurrent writers whatever the
+# cache backend. `manage.py recount_unread` recomputes it after changes made
+# behind the application's back (the admin site, hand-written SQL).
+
+
+def unread_count(user_id):
+    with primary_reads():
+        count = User.objects.filter(pk=user_id).values_list('unread_notifications', flat=True).first()
+    return count or 0
+
+
+async def aunread_count(user_id):
+    """unread_count() for async views."""
+    with primary_reads():
+        count = await User.objects.filter(pk=user_id).values_list('unread_notifications', flat=True).afirst()
+    return count or 0
+
+
+def request_unread_count(request):
+    """
+    unread_count() for the session's user, looked up once per request: the
+    ETag, the view and the navbar badge all show it.
+    """
+    if not hasattr(request, '_unread_count'):
+        request._unread_count = unread_count(request.session['user_id'])
+    return request._unread_count
+
+
+def add_unread(deltas):
+    """
+    Adjust the counters by {user_id: delta}, one UPDATE per distinct delta.
+    Call inside the transaction that changed the notifications.
+    """
+    by_delta = defaultdict(list)
+    for user_id, delta in deltas.items():
+        if delta:
+            by_delta[delta].append(user_id)
+    for delta, user_ids in by_delta.items():
+        User.objects.filter(id__in=user_ids).update(unread_notifications=F('unread_notifications') + delta)
+
+
+def new_unread_counts(notifications):
+    """{user_id: unread notifications} among `notifications`."""
+    return Counter(n.user_id for n in notifications if n.notification_status == 'unread')
+
+
+def recount_unread():
+    """Recompute every user's counter from Notification in one UPDATE."""
+    unread = (
+        Notification.objects.filter(user_id=OuterRef('pk'), notification_status='unread')
+        .order_by().values('user_id').annotate(n=Count('id')).values('n')
+    )
+    return User.objects.update(unread_notifications=Coalesce(Subquery(unread), 0))
+
+
+def mark_read(user_id, ids=None):
+    """
+    Mark the user's unread notifications (all, or just `ids`) as read with
+    a single UPDATE. Returns the number of rows changed.
+    """
+    qs = Notification.objects.filter(user_id=user_id, notification_status='unread')
+    if ids is not None:
+        qs = qs.filter(id__in=ids)
+    with transaction.atomic():
+        updated = qs.update(notification_status='read')
+        add_unread({user_id: -updated})
+    return updated
@@ -0,0 +1,77 @@
+import asyncio
+import json
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import connection
+from django.db.models import Max
+
+from .inbox import aunread_count
+from .models import Notification
+
+# Live notification streams (server-sent events).
+#
+# Notifications are written by `process_outbox`, never by the server process
+# holding the stream, so there is nothing in-process to wait on: each stream
+# polls the database for rows newer than the last one it sent, every
+# LIVE_NOTIFICATIONS_POLL_SECONDS. The query only reads the user's rows past
+# that id, so an idle stream costs one cheap query per interval.
+#
+# The ORM calls of a request run in one thread, and its connection is only
+# closed when the request finishes, i.e. when the tab closes. The stream
+# closes it after each poll instead, so open tabs don't each hold one.
+
+STREAM_BATCH = 50
+RETRY_MS = 3000
+
+
+def _poll_seconds():
+    return getattr(settings, 'LIVE_NOTIFICATIONS_POLL_SECONDS', 5)
+
+
+# ----------------- STREAM -----------------
+async def latest_notification_id(user_id):
+    result = await Notification.objects.filter(user_id=user_id).aaggregate(last_id=Max('id'))
+    return result['last_id'] or 0
+
+
+def _close_connection():
+    # Never inside a transaction (a test case's, say): that would roll it back
+    if not connection.in_atomic_block:
+        connection.close()
+
+
+def _event(name, data, event_id=None):
+    lines = [f"id: {event_id}"] if event_id is not None else []
+    lines += [f"event: {name}", f"data: {json.dumps(data)}"]
+    return "\n".join(lines) + "\n\n"
+
+
+async def notification_events(user_id, last_id):
+    """
+    Server-sent events for the user's notifications with id > last_id, as
+    they arrive. Each batch ends with an `unread` event for the navbar badge.
+    """
+    yield f"retry: {RETRY_MS}\n\n"
+    while True:
+        rows = [
+            n async for n in
+            Notification.objects.filter(user_id=user_id, id__gt=last_id).order_by('id')[:STREAM_BATCH]
+        ]
+        for n in rows:
+            last_id = n.id
+            yield _event('notification', {
+                'id': n.id,
+                'message': n.notification_message,
+                'status': n.notification_status,
+                'timestamp': n.notification_timestamp.isoformat(),
+            }, event_id=n.id)
+        if rows:
+            yield _event('unread', await aunread_count(user_id))
+        if len(rows) == STREAM_BATCH:
+            continue
+
+        await sync_to_async(_close_connection)()
+        await asyncio.sleep(_poll_seconds())
+        if not rows:
+            yield ": keep-alive\n\n"
@@ -0,0 +1,50 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from booking_app.archive import ARCHIVED_TABLES, archive_dir, archive_batch, last_id, retention_cutoff
+
+
+class Command(BaseCommand):
+    help = (
+        "Move notifications and audit log entries older than their retention "
+        "period (NOTIFICATION_RETENTION_DAYS, ACTION_LOG_RETENTION_DAYS) into "
+        "gzipped NDJSON files under ARCHIVE_DIR, deleting them from the "
+        "database in batches. Safe to interrupt and rerun (for cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--table', choices=sorted(ARCHIVED_TABLES), action='append',
+                            help="Only this table (repeatable; default: all).")
+        parser.add_argument('--days', type=int, help="Override the configured retention.")
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument('--sleep', type=float, default=0.0, help="Seconds to pause between batches.")
+        parser.add_argument('--dry-run', action='store_true', help="Only count the rows that would be archived.")
+
+    def handle(self, *args, **options):
+        for table in options['table'] or sorted(ARCHIVED_TABLES):
+            cutoff = retention_cutoff(table, options['days'])
+            if cutoff is None:
+                self.stdout.write(f"{table}: no retention configured, skipped.")
+                continue
+
+            model, timestamp, _ = ARCHIVED_TABLES[table]
+            if options['dry_run']:
+                count = model.objects.filter(**{f'{timestamp}__lt': cutoff}).count()
+                self.stdout.write(f"{table}: {count} row(s) older than {cutoff:%Y-%m-%d %H:%M}.")
+                continue
+
+            started = time.perf_counter()
+            after_id, total = 0, 0
+            max_id = last_id(table)
+            while True:
+                after_id, archived = archive_batch(table, cutoff, after_id, options['batch_size'], max_id)
+                if after_id is None:
+                    break
+                total += archived
+                if options['sleep']:
+                    time.sleep(options['sleep'])
+            self.stdout.write(self.style.SUCCESS(
+                f"{table}: archived {total} row(s) to {archive_dir(table)} "
+                f"in {time.perf_counter() - started:.1f}s."
+            ))
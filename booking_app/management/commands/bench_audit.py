@@ -0,0 +1,49 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from booking_app.audit import write_entries
+from booking_app.models import ActionLog, Role, User
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare ActionLog throughput: one INSERT per action (the old "
+        "log_action) versus the buffered bulk writer. Rows are written in "
+        "autocommit mode like real requests and deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--entries', type=int, default=5000)
+        parser.add_argument('--per-request', type=int, default=20,
+                            help="Actions per simulated request for the buffered run.")
+
+    def handle(self, *args, **options):
+        n = options['entries']
+        per_request = max(1, options['per_request'])
+
+        role, created_role = Role.objects.get_or_create(role_name='Bench')
+        user = User.objects.create(name='bench', email='bench-audit@example.invalid',
+                                   password_hash='-', role=role)
+        try:
+            t0 = time.perf_counter()
+            for i in range(n):
+                ActionLog.objects.create(user=user, action=f"bench direct {i}")
+            direct = time.perf_counter() - t0
+
+            t0 = time.perf_counter()
+            for start in range(0, n, per_request):
+                write_entries([
+                    ActionLog(user=user, action=f"bench buffered {i}")
+                    for i in range(start, min(n, start + per_request))
+                ])
+            buffered = time.perf_counter() - t0
+        finally:
+            user.delete()  # cascades to the bench ActionLog rows
+            if created_role:
+                role.delete()
+
+        self.stdout.write(f"direct:   {n / direct:>10.0f} entries/s ({direct:.2f}s)")
+        self.stdout.write(f"buffered: {n / buffered:>10.0f} entries/s ({buffered:.2f}s, "
+                          f"{per_request} per flush)")
+        self.stdout.write(f"speedup:  {direct / buffered:.1f}x")
@@ -0,0 +1,179 @@
+import random
+import threading
+import time
+from collections import Counter
+from datetime import datetime, time as dtime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test import Client, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from booking_app.conflicts import ACTIVE_STATUSES
+from booking_app.models import Booking, NotificationOutbox, Role, Room, RoomAvailability, RoomType, User
+
+TYPE_NAME = 'Contention'
+EMAIL_DOMAIN = 'contention.example.com'
+PASSWORD = 'contention'
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+def _percentile(samples, fraction):
+    samples = sorted(samples)
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))] if samples else 0.0
+
+
+class Command(BaseCommand):
+    help = (
+        "Fire many simultaneous booking requests (POST /bookings/create/) "
+        "from many threads at a few rooms, whose candidate slots overlap, "
+        "and check that no room ends up double-booked. Reports throughput, "
+        "latency and time spent waiting for the room row lock. Creates its "
+        "own rooms and users and deletes them afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=3)
+        parser.add_argument('--slots', type=int, default=6,
+                            help="Candidate start times per room, 30 minutes apart, each one hour long.")
+        parser.add_argument('--requests', type=int, default=300)
+        parser.add_argument('--threads', type=int, default=32)
+        parser.add_argument('--users', type=int, default=20)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--keep', action='store_true', help="Keep the generated rooms, users and bookings.")
+
+    def handle(self, *args, **options):
+        if Room.objects.filter(room_type__room_type_name=TYPE_NAME).exists():
+            raise CommandError(f"Rooms of type {TYPE_NAME!r} already exist; remove them (or a --keep run) first.")
+
+        rooms, users = self._setup(options['rooms'], options['users'])
+        try:
+            with override_settings(ALLOWED_HOSTS=['testserver']):
+                outcomes, latencies, lock_waits, elapsed = self._fire(rooms, users, options)
+            self._report(rooms, outcomes, latencies, lock_waits, elapsed)
+        finally:
+            if not options['keep']:
+                self._cleanup(rooms, users)
+
+    # ----------------- SETUP -----------------
+    def _setup(self, room_count, user_count):
+        with transaction.atomic():
+            room_type = RoomType.objects.create(room_type_name=TYPE_NAME)
+            rooms = [Room.objects.create(room_number=f"CT{n}", room_type=room_type, capacity=4)
+                     for n in range(room_count)]
+            RoomAvailability.objects.bulk_create([
+                RoomAvailability(room=room, day_of_week=day, start_time=dtime(0), end_time=dtime(23, 59))
+                for room in rooms for day in WEEKDAYS
+            ])
+            role, _ = Role.objects.get_or_create(role_name='User')
+            users = [User.objects.create(name=f"Contention {n}", email=f"user{n}@{EMAIL_DOMAIN}",
+                                         password_hash=PASSWORD, role=role)
+                     for n in range(user_count)]
+        return rooms, users
+
+    def _cleanup(self, rooms, users):
+        with transaction.atomic():
+            bookings = Booking.objects.filter(room__in=rooms)
+            NotificationOutbox.objects.filter(booking__in=bookings).delete()
+            bookings.delete()
+            User.objects.filter(id__in=[u.id for u in users]).delete()
+            RoomType.objects.filter(room_type_name=TYPE_NAME).delete()
+
+    # ----------------- LOAD -----------------
+    def _fire(self, rooms, users, options):
+        rng = random.Random(options['seed'])
+        day = timezone.localdate() + timedelta(days=7)
+        first = timezone.make_aware(datetime.combine(day, dtime(9)))
+        jobs = []
+        for _ in range(options['requests']):
+            start = first + timedelta(minutes=30 * rng.randrange(options['slots']))
+            jobs.append((rng.choice(rooms).id, start, start + timedelta(hours=1)))
+
+        lock = threading.Lock()
+        outcomes, latencies, lock_waits = Counter(), [], []
+        next_job = iter(jobs)
+        threads = min(options['threads'], len(jobs))
+        ready = threading.Barrier(threads + 1)
+        fmt = '%Y-%m-%dT%H:%M'
+
+        def time_lock_waits(execute, sql, params, many, context):
+            if 'FOR UPDATE' not in sql:
+                return execute(sql, params, many, context)
+            t0 = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                with lock:
+                    lock_waits.append(time.perf_counter() - t0)
+
+        def worker(n):
+            try:
+                client = Client()
+                user = users[n % len(users)]
+                client.post(reverse('login'), {'email': user.email, 'password': PASSWORD})
+                with connection.execute_wrapper(time_lock_waits):
+                    ready.wait()
+                    while True:
+                        with lock:
+                            job = next(next_job, None)
+                        if job is None:
+                            return
+                        room_id, start, end = job
+                        t0 = time.perf_counter()
+                        try:
+                            response = client.post(reverse('create_booking'), {
+                                'room': room_id,
+                                'start_time': timezone.localtime(start).strftime(fmt),
+                                'end_time': timezone.localtime(end).strftime(fmt),
+                            })
+                            # Redirect: created; form redisplayed: rejected as a conflict
+                            outcome = {302: 'created', 200: 'rejected'}.get(response.status_code, 'error')
+                        except Exception:
+                            outcome = 'error'
+                        with lock:
+                            latencies.append(time.perf_counter() - t0)
+                            outcomes[outcome] += 1
+            finally:
+                connection.close()
+
+        pool = [threading.Thread(target=worker, args=(n,)) for n in range(threads)]
+        for thread in pool:
+            thread.start()
+        ready.wait()
+        started = time.perf_counter()
+        for thread in pool:
+            thread.join()
+        return outcomes, latencies, lock_waits, time.perf_counter() - started
+
+    # ----------------- REPORT -----------------
+    def _report(self, rooms, outcomes, latencies, lock_waits, elapsed):
+        total = sum(outcomes.values())
+        self.stdout.write(
+            f"{total} requests in {elapsed:.2f}s ({total / elapsed:.1f} req/s): "
+            f"{outcomes['created']} created, {outcomes['rejected']} rejected, {outcomes['error']} errors"
+        )
+        self.stdout.write(
+            f"latency  p50 {_percentile(latencies, 0.5) * 1000:.1f} ms  "
+            f"p99 {_percentile(latencies, 0.99) * 1000:.1f} ms"
+        )
+        if lock_waits:
+            self.stdout.write(
+                f"room lock {len(lock_waits)} acquisitions, total wait {sum(lock_waits):.2f}s, "
+                f"p50 {_percentile(lock_waits, 0.5) * 1000:.1f} ms, p99 {_percentile(lock_waits, 0.99) * 1000:.1f} ms, "
+                f"max {max(lock_waits) * 1000:.1f} ms"
+            )
+        else:
+            self.stdout.write(f"room lock: not measured ({connection.vendor} has no SELECT ... FOR UPDATE)")
+
+        overlaps = 0
+        for room in rooms:
+            active = Booking.objects.filter(room=room, status__in=ACTIVE_STATUSES).order_by('start_time')
+            previous_end = None
+            for start, end in active.values_list('start_time', 'end_time'):
+                if previous_end is not None and start < previous_end:
+                    overlaps += 1
+                previous_end = end if previous_end is None else max(previous_end, end)
+        if overlaps:
+            raise CommandError(f"Invariant violated: {overlaps} overlapping active booking(s).")
+        self.stdout.write(self.style.SUCCESS("No double bookings."))
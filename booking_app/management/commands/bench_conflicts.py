@@ -0,0 +1,85 @@
+import time
+from datetime import datetime, timedelta, time as dtime
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from booking_app.conflicts import RoomIntervalIndex, has_conflict
+from booking_app.models import Booking, Role, Room, RoomType, User
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark booking conflict detection as bookings per room grow. "
+        "Runs inside a transaction that is rolled back, so no data is kept."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sizes', default='1000,10000,100000',
+                            help="Comma-separated bookings-per-room sizes.")
+        parser.add_argument('--probes', type=int, default=200,
+                            help="Conflict checks timed per size.")
+
+    def handle(self, *args, **options):
+        sizes = [int(s) for s in options['sizes'].split(',') if s]
+        probes = options['probes']
+
+        try:
+            with transaction.atomic():
+                self._run(sizes, probes)
+                raise _Rollback
+        except _Rollback:
+            pass
+
+    def _run(self, sizes, probes):
+        role = Role.objects.create(role_name='Bench')
+        user = User.objects.create(name='bench', email='bench@example.invalid',
+                                   password_hash='-', role=role)
+        room_type = RoomType.objects.create(room_type_name='Bench')
+        room = Room.objects.create(room_number='BENCH', room_type=room_type, capacity=1)
+
+        # One 30-minute booking per hour, back to back from a fixed origin.
+        origin = timezone.make_aware(datetime.combine(datetime(2000, 1, 3).date(), dtime(0, 0)))
+        slot = timedelta(hours=1)
+        length = timedelta(minutes=30)
+
+        self.stdout.write(f"{'bookings':>10} {'db p50 ms':>10} {'db p99 ms':>10} {'index us':>10}")
+        inserted = 0
+        for size in sizes:
+            Booking.objects.bulk_create(
+                [
+                    Booking(user=user, room=room, status='approved',
+                            start_time=origin + slot * i, end_time=origin + slot * i + length)
+                    for i in range(inserted, size)
+                ],
+                batch_size=5000,
+            )
+            inserted = max(inserted, size)
+
+            # Probe the free half of random-ish slots spread over the whole range.
+            step = max(1, size // probes)
+            samples = []
+            for i in range(0, size, step):
+                start = origin + slot * i + length
+                t0 = time.perf_counter()
+                has_conflict(room, start, start + length)
+                samples.append(time.perf_counter() - t0)
+            samples.sort()
+            p50 = samples[len(samples) // 2] * 1000
+            p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))] * 1000
+
+            index = RoomIntervalIndex()
+            for i in range(size):
+                index.add(room.id, origin + slot * i, origin + slot * i + length)
+            t0 = time.perf_counter()
+            for i in range(0, size, step):
+                start = origin + slot * i + length
+                index.overlaps(room.id, start, start + length)
+            per_check = (time.perf_counter() - t0) / len(samples) * 1e6
+
+            self.stdout.write(f"{size:>10} {p50:>10.3f} {p99:>10.3f} {per_check:>10.2f}")
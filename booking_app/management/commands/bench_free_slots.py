@@ -0,0 +1,88 @@
+import random
+import time
+from datetime import datetime, time as dtime, timedelta
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from django.utils import timezone
+
+from booking_app.caching import bump_version
+from booking_app.catalog import CATALOG_NAMESPACE
+from booking_app.freeslots import search_free_rooms
+from booking_app.models import Booking, Role, Room, RoomAvailability, RoomType, User
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+
+class _Rollback(Exception):
+    pass
+
+
+class Command(BaseCommand):
+    help = (
+        "Time free-room searches over N synthetic rooms with a few bookings "
+        "each. Runs inside a transaction that is rolled back."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=3000)
+        parser.add_argument('--bookings-per-room', type=int, default=20)
+        parser.add_argument('--days', type=int, default=5, help="Days covered by each search.")
+        parser.add_argument('--searches', type=int, default=50)
+
+    def handle(self, *args, **options):
+        try:
+            with transaction.atomic():
+                self._run(options)
+                raise _Rollback
+        except _Rollback:
+            pass
+        finally:
+            bump_version(CATALOG_NAMESPACE)  # drop the synthetic catalog snapshot
+
+    def _run(self, options):
+        rng = random.Random(42)
+        role = Role.objects.create(role_name='Bench')
+        user = User.objects.create(name='bench', email='bench-free@example.invalid',
+                                   password_hash='-', role=role)
+        room_type = RoomType.objects.create(room_type_name='Bench')
+        rooms = Room.objects.bulk_create([
+            Room(room_number=f"B{i}", room_type=room_type, capacity=rng.randint(2, 60))
+            for i in range(options['rooms'])
+        ], batch_size=1000)
+        RoomAvailability.objects.bulk_create([
+            RoomAvailability(room=room, day_of_week=day, start_time=dtime(8), end_time=dtime(22))
+            for room in rooms for day in WEEKDAYS
+        ], batch_size=5000)
+
+        first_day = timezone.localdate() + timedelta(days=7)
+        bookings = []
+        for room in rooms:
+            for _ in range(options['bookings_per_room']):
+                day = first_day + timedelta(days=rng.randrange(14))
+                start = timezone.make_aware(datetime.combine(day, dtime(rng.randrange(8, 21))))
+                bookings.append(Booking(user=user, room=room, status='approved',
+                                        start_time=start, end_time=start + timedelta(hours=1)))
+        Booking.objects.bulk_create(bookings, batch_size=5000)
+        bump_version(CATALOG_NAMESPACE)
+
+        # First search builds the catalog and slot matrix; the rest are warm
+        t0 = time.perf_counter()
+        search_free_rooms(first_day, options['days'], dtime(14), dtime(16), 20)
+        cold = (time.perf_counter() - t0) * 1000
+
+        samples = []
+        for _ in range(options['searches']):
+            start_hour = rng.randrange(8, 20)
+            t0 = time.perf_counter()
+            rooms_found, _, _ = search_free_rooms(
+                first_day + timedelta(days=rng.randrange(7)), options['days'],
+                dtime(start_hour), dtime(start_hour + 2), rng.choice([0, 10, 20, 40]),
+            )
+            samples.append((time.perf_counter() - t0) * 1000)
+        samples.sort()
+
+        self.stdout.write(f"rooms={len(rooms)} bookings={len(bookings)} days/search={options['days']}")
+        self.stdout.write(f"cold search: {cold:.1f} ms")
+        self.stdout.write(f"warm search: p50 {samples[len(samples) // 2]:.1f} ms, "
+                          f"p99 {samples[min(len(samples) - 1, int(len(samples) * 0.99))]:.1f} ms")
@@ -0,0 +1,154 @@
+import json
+import time
+from datetime import timedelta
+from pathlib import Path
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import get_resolver, reverse
+from django.utils import timezone
+
+from booking_app import urls
+from booking_app.models import Booking, Room, RoomType, User
+
+from .seed_scale import EMAIL_DOMAIN, PASSWORD
+
+# GET handlers that change data or never finish, so they are not driven
+UNSAFE_GETS = {'logout', 'room_delete', 'room_type_delete', 'user_delete', 'notifications_stream'}
+
+# Query strings that make a page do its real work rather than show an empty form
+QUERIES = {
+    'free_rooms': lambda: {
+        'date': (timezone.localdate() + timedelta(days=1)).isoformat(),
+        'days': 5, 'start_time': '10:00', 'end_time': '12:00',
+    },
+}
+
+
+def _percentile(samples, fraction):
+    return samples[min(len(samples) - 1, int(len(samples) * fraction))]
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmark every GET page in booking_app/urls.py through the test "
+        "client, as an admin and as a regular user (run seed_scale first). "
+        "Reports p50/p95/p99 latency and query counts per page. --save writes "
+        "them to the baseline file; otherwise the run is compared with the "
+        "baseline and fails if a page got slower or runs more queries."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--iterations', type=int, default=20)
+        parser.add_argument('--warmup', type=int, default=2, help="Untimed requests per page first.")
+        parser.add_argument('--baseline', default='bench_views_baseline.json')
+        parser.add_argument('--save', action='store_true', help="Write this run as the new baseline.")
+        parser.add_argument('--max-slowdown', type=float, default=0.5,
+                            help="Allowed p95 increase over the baseline, as a fraction.")
+        parser.add_argument('--min-slowdown-ms', type=float, default=5.0,
+                            help="p95 increases smaller than this are treated as noise.")
+        parser.add_argument('--max-extra-queries', type=int, default=0)
+        parser.add_argument('--queries-only', action='store_true',
+                            help="Compare only query counts (timings vary between machines).")
+        parser.add_argument('--admin-email', default=f"user0@{EMAIL_DOMAIN}")
+        parser.add_argument('--user-email', default=f"user1@{EMAIL_DOMAIN}")
+        parser.add_argument('--password', default=PASSWORD)
+        parser.add_argument('--only', nargs='+', help="URL names to benchmark (default: all).")
+
+    def handle(self, *args, **options):
+        with override_settings(ALLOWED_HOSTS=['testserver']):
+            clients = {
+                'admin': self._login(options['admin_email'], options['password']),
+                'user': self._login(options['user_email'], options['password']),
+            }
+            results = {}
+            for name, url in self._urls(options['only']):
+                for role, client in clients.items():
+                    result = self._measure(client, url, options['iterations'], options['warmup'])
+                    # Pages that redirect this role (e.g. admin-only) are not that role's page
+                    if result is not None:
+                        results[f"{name}[{role}]"] = result
+
+        self.stdout.write(f"{'page':<32} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'queries':>8}")
+        for key, r in results.items():
+            self.stdout.write(f"{key:<32} {r['p50_ms']:>8.1f} {r['p95_ms']:>8.1f} {r['p99_ms']:>8.1f} {r['queries']:>8}")
+
+        baseline_path = Path(options['baseline'])
+        if options['save']:
+            baseline_path.write_text(json.dumps(results, indent=2, sort_keys=True) + "\n")
+            self.stdout.write(f"\nBaseline written to {baseline_path}")
+        elif baseline_path.exists():
+            self._compare(results, json.loads(baseline_path.read_text()), options)
+        else:
+            self.stdout.write(f"\nNo baseline at {baseline_path}; run with --save to create one.")
+
+    def _login(self, email, password):
+        client = Client()
+        response = client.post(reverse('login'), {'email': email, 'password': password})
+        if response.status_code != 302 or 'user_id' not in client.session:
+            raise CommandError(f"Could not log in as {email} (run seed_scale, or pass --admin-email/--user-email).")
+        return client
+
+    def _urls(self, only):
+        """(url name, path) for every GET view, with ids filled in from existing rows."""
+        ids = {
+            'booking_id': Booking.objects.order_by('id').values_list('id', flat=True).first(),
+            'room_id': Room.objects.order_by('id').values_list('id', flat=True).first(),
+            'type_id': RoomType.objects.order_by('id').values_list('id', flat=True).first(),
+            'user_id': User.objects.order_by('id').values_list('id', flat=True).first(),
+        }
+        for pattern in urls.urlpatterns:
+            if pattern.name in UNSAFE_GETS or (only and pattern.name not in only):
+                continue
+            if not hasattr(pattern.callback.view_class, 'get'):
+                continue  # POST-only
+            kwargs = {name: ids.get(name) for name in pattern.pattern.converters}
+            if None in kwargs.values():
+                continue
+            yield pattern.name, reverse(pattern.name, kwargs=kwargs)
+
+    def _measure(self, client, url, iterations, warmup):
+        name = get_resolver().resolve(url).url_name
+        params = QUERIES[name]() if name in QUERIES else {}
+        samples = []
+        queries = 0
+        for i in range(warmup + iterations):
+            with CaptureQueriesContext(connection) as captured:
+                started = time.perf_counter()
+                response = client.get(url, params)
+                if response.streaming:
+                    b''.join(response.streaming_content)
+                elapsed = (time.perf_counter() - started) * 1000
+            if response.status_code != 200:
+                return None
+            if i >= warmup:
+                samples.append(elapsed)
+                queries = max(queries, len(captured))
+        samples.sort()
+        return {
+            'p50_ms': round(_percentile(samples, 0.5), 2),
+            'p95_ms': round(_percentile(samples, 0.95), 2),
+            'p99_ms': round(_percentile(samples, 0.99), 2),
+            'queries': queries,
+        }
+
+    def _compare(self, results, baseline, options):
+        failures = []
+        for key, r in results.items():
+            old = baseline.get(key)
+            if old is None:
+                continue
+            slower = r['p95_ms'] - old['p95_ms']
+            timed = not options['queries_only']
+            if timed and slower > options['min_slowdown_ms'] and slower > old['p95_ms'] * options['max_slowdown']:
+                failures.append(f"{key}: p95 {old['p95_ms']:.1f} -> {r['p95_ms']:.1f} ms")
+            if r['queries'] > old['queries'] + options['max_extra_queries']:
+                failures.append(f"{key}: queries {old['queries']} -> {r['queries']}")
+        missing = sorted(set(baseline) - set(results))
+        if missing and not options['only']:
+            self.stdout.write(f"\nNot measured this run: {', '.join(missing)}")
+        if failures:
+            raise CommandError("Regressions against the baseline:\n  " + "\n  ".join(failures))
+        self.stdout.write(f"\nNo regressions against {options['baseline']}.")
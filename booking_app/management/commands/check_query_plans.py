@@ -0,0 +1,95 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from booking_app.conflicts import overlapping_bookings
+from booking_app.models import ActionLog, Booking, DailyBookingSummary, Notification
+from booking_app.queries import booking_rows, day_bounds, user_bookings, user_past_bookings
+
+
+def _user_bookings():
+    return user_bookings(1, timezone.localdate())
+
+
+def _user_past_bookings():
+    return user_past_bookings(1, timezone.localdate()).order_by('-start_time', '-id')[:51]
+
+
+def _room_overlap():
+    start, end = day_bounds(timezone.localdate())
+    return overlapping_bookings(1, start, start + timedelta(hours=1))
+
+
+def _booking_page():
+    return booking_rows().order_by('start_time', 'id')[:51]
+
+
+def _booking_page_by_status():
+    return booking_rows().filter(status='pending').order_by('start_time', 'id')[:51]
+
+
+def _past_approved():
+    return Booking.objects.filter(status='approved', end_time__lt=timezone.now()).order_by('end_time', 'id')[:1000]
+
+
+def _inbox_page():
+    return Notification.objects.filter(user_id=1).order_by('-notification_timestamp', '-id')[:26]
+
+
+def _unread_count():
+    return Notification.objects.filter(user_id=1, notification_status='unread')
+
+
+def _audit_page():
+    return ActionLog.objects.select_related('user').order_by('-action_timestamp', '-id')[:51]
+
+
+def _audit_page_by_user():
+    return ActionLog.objects.filter(user_id=1).order_by('-action_timestamp', '-id')[:51]
+
+
+def _summary_range():
+    today = timezone.localdate()
+    return DailyBookingSummary.objects.filter(date__gte=today - timedelta(days=29), date__lte=today)
+
+
+# (label, index that must appear in the plan, queryset factory)
+PLAN_CHECKS = [
+    ("BookingListView user buckets", 'idx_booking_user_start', _user_bookings),
+    ("BookingListView user history", 'idx_booking_user_start', _user_past_bookings),
+    ("Booking overlap check", 'idx_booking_room_start_end', _room_overlap),
+    ("Admin booking page", 'idx_booking_start', _booking_page),
+    ("Admin booking page by status", 'idx_booking_status_start', _booking_page_by_status),
+    ("Auto-completion sweep", 'idx_booking_status_end', _past_approved),
+    ("Notification inbox page", 'idx_notif_user_ts', _inbox_page),
+    ("Unread notification count", 'idx_notif_user_status_ts', _unread_count),
+    ("Audit log page", 'idx_actionlog_ts', _audit_page),
+    ("Audit log page by user", 'idx_actionlog_user_ts', _audit_page_by_user),
+    ("Daily summary date range", 'idx_summary_date_status', _summary_range),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "EXPLAIN the hot list/validation queries and fail if any of them does "
+        "not use its intended index. Run against a database with realistic "
+        "row counts; optimizers may prefer a table scan on near-empty tables."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--verbose-plans', action='store_true', help="Print every plan.")
+
+    def handle(self, *args, **options):
+        failures = []
+        for label, index_name, build in PLAN_CHECKS:
+            plan = build().explain()
+            ok = index_name in plan
+            self.stdout.write(f"{'ok  ' if ok else 'FAIL'} {label}: expects {index_name}")
+            if options['verbose_plans'] or not ok:
+                self.stdout.write(plan)
+            if not ok:
+                failures.append(label)
+
+        if failures:
+            raise CommandError(f"{len(failures)} query plan(s) missed their index: {', '.join(failures)}")
@@ -0,0 +1,71 @@
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory
+from django.test.utils import CaptureQueriesContext
+
+from booking_app.models import Room
+from booking_app.routing import (
+    PIN_COOKIE, PRIMARY_ALIAS, REPLICA_ALIAS, ReadYourWritesMiddleware, replica_configured, replica_reads,
+)
+
+
+@replica_reads
+def _read_view(request):
+    Room.objects.count()
+    return HttpResponse()
+
+
+def _aliases_used(request, view=_read_view):
+    """Aliases that ran at least one query while `view` handled the request."""
+    with CaptureQueriesContext(connections[PRIMARY_ALIAS]) as primary, \
+            CaptureQueriesContext(connections[REPLICA_ALIAS]) as replica:
+        view(request)
+    return {alias for alias, ctx in ((PRIMARY_ALIAS, primary), (REPLICA_ALIAS, replica)) if len(ctx)}
+
+
+class Command(BaseCommand):
+    help = (
+        "Check that replica_reads views read from the 'replica' alias, that "
+        "writes and pinned (just-posted) clients use 'default', and that a "
+        "POST sets the pin cookie. Works with any two databases, including "
+        "two local SQLite files (run migrate --database replica first)."
+    )
+
+    def handle(self, *args, **options):
+        if not replica_configured():
+            raise CommandError(f"No '{REPLICA_ALIAS}' database configured (set DB_REPLICA_HOST).")
+
+        factory = RequestFactory()
+        pinned = factory.get('/')
+        pinned.COOKIES[PIN_COOKIE] = '1'
+
+        def write_view(request):
+            room = Room.objects.order_by('id').first()
+            if room is not None:
+                with transaction.atomic():
+                    room.save(update_fields=['capacity'])
+                    transaction.set_rollback(True)
+            return HttpResponse()
+
+        checks = [
+            ("GET reads from replica", _aliases_used(factory.get('/')), {REPLICA_ALIAS}),
+            ("pinned GET reads from primary", _aliases_used(pinned), {PRIMARY_ALIAS}),
+            ("POST reads from primary", _aliases_used(factory.post('/')), {PRIMARY_ALIAS}),
+            ("unannotated view reads from primary",
+             _aliases_used(factory.get('/'), lambda r: _read_view.__wrapped__(r)), {PRIMARY_ALIAS}),
+            ("writes go to primary",
+             _aliases_used(factory.get('/'), replica_reads(write_view)) - {REPLICA_ALIAS}, {PRIMARY_ALIAS}),
+        ]
+
+        response = ReadYourWritesMiddleware(lambda r: HttpResponse())(factory.post('/'))
+        checks.append(("POST sets the pin cookie", {PIN_COOKIE} & set(response.cookies), {PIN_COOKIE}))
+
+        failures = []
+        for label, got, expected in checks:
+            ok = got == expected
+            self.stdout.write(f"{'ok  ' if ok else 'FAIL'} {label}: {sorted(got)}")
+            if not ok:
+                failures.append(label)
+        if failures:
+            raise CommandError(f"{len(failures)} routing check(s) failed: {', '.join(failures)}")
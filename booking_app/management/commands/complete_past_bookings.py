@@ -0,0 +1,57 @@
+import time
+from collections import Counter
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from booking_app.models import Booking
+from booking_app.transitions import complete_past_chunk, queue_completion_notifications
+
+
+class Command(BaseCommand):
+    help = (
+        "Mark approved bookings that have ended as completed, in chunks of "
+        "short transactions (for cron). Safe to run repeatedly or "
+        "concurrently, and to interrupt: a rerun continues with whatever is "
+        "still approved. Owners get one notification and admins one summary "
+        "per run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--sleep', type=float, default=0.0,
+                            help="Seconds to pause between chunks, to spread the load when catching up.")
+        parser.add_argument('--limit', type=int, help="Stop after completing about this many bookings.")
+        parser.add_argument('--dry-run', action='store_true', help="Only count the bookings that would change.")
+
+    def handle(self, *args, **options):
+        # Fixed for the whole run, so bookings ending meanwhile wait for the next one
+        now = timezone.now()
+        if options['dry_run']:
+            count = Booking.objects.filter(status='approved', end_time__lt=now).count()
+            self.stdout.write(f"{count} approved booking(s) ended before {now:%Y-%m-%d %H:%M}.")
+            return
+
+        per_owner = Counter()
+        total = 0
+        started = time.perf_counter()
+        try:
+            while options['limit'] is None or total < options['limit']:
+                found, completed = complete_past_chunk(now, options['chunk_size'])
+                if not found:
+                    break
+                per_owner.update(completed)
+                total += sum(completed.values())
+                self.stdout.write(f"completed={sum(completed.values())} total={total}")
+                if options['sleep']:
+                    time.sleep(options['sleep'])
+        except KeyboardInterrupt:
+            pass
+        finally:
+            # Committed chunks stay committed, so report them even if a later one failed
+            if total:
+                queue_completion_notifications(per_owner)
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Marked {total} booking(s) completed in {time.perf_counter() - started:.1f}s."
+        ))
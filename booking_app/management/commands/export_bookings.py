@@ -0,0 +1,42 @@
+import sys
+from datetime import date
+
+from django.core.management.base import BaseCommand, CommandError
+
+from booking_app.exports import BOOKING_EXPORT_HEADER, EXPORT_FORMATS, booking_export_rows, write_export
+from booking_app.models import Booking
+from booking_app.queries import filter_bookings
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream bookings (with room, room type and user) to CSV or NDJSON. "
+        "Reads in keyset chunks of value tuples, so memory stays flat."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--format', choices=EXPORT_FORMATS, default='csv')
+        parser.add_argument('--output', '-o', help="File to write (default: stdout).")
+        parser.add_argument('--date-from', help="First start date to include, YYYY-MM-DD.")
+        parser.add_argument('--date-to', help="Last start date to include, YYYY-MM-DD.")
+        parser.add_argument('--status', choices=[c[0] for c in Booking.STATUS_CHOICES])
+        parser.add_argument('--chunk-size', type=int, default=5000)
+
+    def handle(self, *args, **options):
+        try:
+            filters = {
+                'date_from': date.fromisoformat(options['date_from']) if options['date_from'] else None,
+                'date_to': date.fromisoformat(options['date_to']) if options['date_to'] else None,
+                'status': options['status'],
+            }
+        except ValueError as exc:
+            raise CommandError(f"Invalid date: {exc}")
+
+        rows = booking_export_rows(filter_bookings(Booking.objects.all(), filters), options['chunk_size'])
+
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8', buffering=1 << 20) as stream:
+                count = write_export(stream, options['format'], BOOKING_EXPORT_HEADER, rows)
+            self.stderr.write(f"Wrote {count} bookings to {options['output']}")
+        else:
+            write_export(sys.stdout, options['format'], BOOKING_EXPORT_HEADER, rows)
@@ -0,0 +1,172 @@
+import csv
+from collections import Counter
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db.models.functions import Lower
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from booking_app.analytics import STATS_NAMESPACE
+from booking_app.caching import bump_version
+from booking_app.conflicts import BatchValidator, with_room_locks
+from booking_app.models import Booking, NotificationOutbox, Room, User
+from booking_app.summaries import record_created
+
+STATUSES = {code for code, _ in Booking.STATUS_CHOICES}
+
+
+class Command(BaseCommand):
+    help = (
+        "Import bookings from a CSV with columns room, user, start_time, "
+        "end_time and optional status (room number, user email, "
+        "YYYY-MM-DD HH:MM local times). Every row is validated in memory "
+        "against availability, existing bookings and the other rows; valid "
+        "rows are inserted in chunks, each re-checked under its rooms' locks "
+        "and queuing one summary notification per user and one for the "
+        "admins in the same transaction."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('csv_path')
+        parser.add_argument('--status', default='pending', choices=sorted(STATUSES),
+                            help="Status for rows without a status column.")
+        parser.add_argument('--chunk-size', type=int, default=1000)
+        parser.add_argument('--dry-run', action='store_true', help="Validate and report only.")
+        parser.add_argument('--no-notify', action='store_true', help="Skip summary notifications.")
+
+    def handle(self, *args, **options):
+        try:
+            with open(options['csv_path'], newline='', encoding='utf-8-sig') as f:
+                rows = list(csv.DictReader(f))
+        except OSError as exc:
+            raise CommandError(str(exc))
+
+        problems = []
+        parsed = self._parse(rows, options['status'], problems)
+        bookings = self._validate(parsed, problems)
+
+        for line, message in sorted(problems):
+            self.stdout.write(f"line {line}: {message}")
+        self.stdout.write(f"{len(bookings)} valid, {len(problems)} rejected of {len(rows)} rows.")
+
+        if options['dry_run'] or not bookings:
+            return
+
+        # Grouped by room so each chunk locks few rooms
+        bookings.sort(key=lambda b: (b.room_id, b.start_time))
+        chunk_size = max(1, options['chunk_size'])
+        imported = []
+        for i in range(0, len(bookings), chunk_size):
+            chunk = bookings[i:i + chunk_size]
+            imported.extend(with_room_locks({b.room_id for b in chunk},
+                                            lambda: self._insert(chunk, notify=not options['no_notify'])))
+        bump_version(STATS_NAMESPACE)
+
+        if len(imported) < len(bookings):
+            self.stdout.write(f"{len(bookings) - len(imported)} rows were booked by someone else meanwhile.")
+        self.stdout.write(self.style.SUCCESS(f"Imported {len(imported)} bookings."))
+
+    def _parse(self, rows, default_status, problems):
+        """Resolve rooms/users in two queries and parse times; returns (line, Booking) pairs."""
+        rooms = Room.objects.in_bulk({r.get('room', '').strip() for r in rows}, field_name='room_number')
+        # Emails are matched case-insensitively, whatever case they were stored in
+        users = {
+            user.email_lower: user
+            for user in User.objects.annotate(email_lower=Lower('email'))
+            .filter(email_lower__in={r.get('user', '').strip().lower() for r in rows})
+        }
+
+        parsed = []
+        for line, row in enumerate(rows, start=2):  # line 1 is the header
+            room = rooms.get(row.get('room', '').strip())
+            user = users.get(row.get('user', '').strip().lower())
+            start = parse_datetime(row.get('start_time', '').strip() or '')
+            end = parse_datetime(row.get('end_time', '').strip() or '')
+            status = (row.get('status') or default_status).strip().lower()
+
+            if room is None:
+                problems.append((line, f"unknown room {row.get('room')!r}"))
+            elif user is None:
+                problems.append((line, f"unknown user {row.get('user')!r}"))
+            elif start is None or end is None:
+                problems.append((line, "start_time/end_time must be YYYY-MM-DD HH:MM"))
+            elif status not in STATUSES:
+                problems.append((line, f"unknown status {status!r}"))
+            else:
+                if timezone.is_naive(start):
+                    start = timezone.make_aware(start)
+                if timezone.is_naive(end):
+                    end = timezone.make_aware(end)
+                parsed.append((line, Booking(user=user, room=room, start_time=start, end_time=end, status=status)))
+        return parsed
+
+    def _insert(self, chunk, notify):
+        """
+        Save the chunk's bookings that still don't overlap anything, checked
+        again now that their rooms are locked, and queue their notifications
+        so both commit together. Returns the saved bookings.
+        """
+        validator = BatchValidator(
+            {b.room_id for b in chunk},
+            start=min(b.start_time for b in chunk),
+            end=max(b.end_time for b in chunk),
+        )
+        valid = []
+        for booking in chunk:
+            if self._check(validator, booking):
+                self.stdout.write(
+                    f"room {booking.room.room_number} at {timezone.localtime(booking.start_time):%Y-%m-%d %H:%M}: "
+                    f"booked by someone else meanwhile"
+                )
+            else:
+                valid.append(booking)
+        Booking.objects.bulk_create(valid)
+        record_created(valid)
+        if notify and valid:
+            self._notify(valid)
+        return valid
+
+    @staticmethod
+    def _check(validator, booking):
+        return validator.check(
+            booking.room_id,
+            timezone.localtime(booking.start_time),
+            timezone.localtime(booking.end_time),
+            booking.status,
+        )
+
+    def _validate(self, parsed, problems):
+        if not parsed:
+            return []
+        # Earliest rows first, so a clash rejects the later of the two rows
+        parsed.sort(key=lambda item: (item[1].start_time, item[0]))
+        validator = BatchValidator(
+            {b.room_id for _, b in parsed},
+            start=parsed[0][1].start_time,
+            end=max(b.end_time for _, b in parsed),
+        )
+
+        valid = []
+        for line, booking in parsed:
+            error = self._check(validator, booking)
+            if error:
+                problems.append((line, f"room {booking.room.room_number}: {error}"))
+            else:
+                valid.append(booking)
+        return valid
+
+    def _notify(self, bookings):
+        """
+        One outbox entry per affected user; the first also carries the admins'
+        summary, which the worker fans out to every admin.
+        """
+        per_user = sorted(Counter(b.user_id for b in bookings).items())
+        summary = f"Booking import created {len(bookings)} booking(s) for {len(per_user)} user(s)."
+        NotificationOutbox.objects.bulk_create([
+            NotificationOutbox(
+                user_id=user_id,
+                user_message=f"{count} booking(s) were imported for you.",
+                admin_message=summary if i == 0 else '',
+            )
+            for i, (user_id, count) in enumerate(per_user)
+        ])
@@ -0,0 +1,183 @@
+import http.client
+import re
+import shutil
+import subprocess
+import sys
+import threading
+import time
+from collections import defaultdict
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+from django.core.management.base import BaseCommand, CommandError
+
+DEFAULT_PATHS = ['/', '/bookings/', '/notifications/', '/rooms/', '/room_types/', '/users/']
+
+# --compare starts each server on its own port with the same worker count
+SERVERS = {
+    'wsgi': ['gunicorn', 'Project_RoomBookingSystem.wsgi:application', '--workers', '{workers}',
+             '--bind', '127.0.0.1:{port}', '--log-level', 'warning'],
+    'asgi': ['uvicorn', 'Project_RoomBookingSystem.asgi:application', '--workers', '{workers}',
+             '--port', '{port}', '--log-level', 'warning'],
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Load-test the read-heavy pages over HTTP as one logged-in user and "
+        "report requests/second and p50/p99 latency. Point --url at a running "
+        "server, or use --compare to start gunicorn (WSGI, sync views) and "
+        "uvicorn (ASGI, async views) in turn with the same --workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--url', default='http://127.0.0.1:8000')
+        parser.add_argument('--email', required=True)
+        parser.add_argument('--password', required=True)
+        parser.add_argument('--paths', nargs='+', default=DEFAULT_PATHS)
+        parser.add_argument('--concurrency', type=int, default=32, help="Client threads.")
+        parser.add_argument('--duration', type=float, default=15.0, help="Seconds of measured load.")
+        parser.add_argument('--warmup', type=float, default=2.0, help="Seconds of unmeasured load first.")
+        parser.add_argument('--compare', action='store_true')
+        parser.add_argument('--workers', type=int, default=4, help="Server processes for --compare.")
+
+    def handle(self, *args, **options):
+        if not options['compare']:
+            self._report(options['url'], self._run(options['url'], options))
+            return
+
+        results = {}
+        for port, (name, command) in enumerate(SERVERS.items(), start=8701):
+            if shutil.which(command[0]) is None:
+                raise CommandError(f"{command[0]} is not installed (pip install {command[0]}).")
+            argv = [arg.format(workers=options['workers'], port=port) for arg in command]
+            url = f"http://127.0.0.1:{port}"
+            server = subprocess.Popen(argv, stdout=sys.stdout, stderr=sys.stderr)
+            try:
+                _wait_until_up(url)
+                results[name] = self._run(url, options)
+                self._report(f"{name} ({command[0]}, {options['workers']} workers)", results[name])
+            finally:
+                server.terminate()
+                server.wait(timeout=30)
+
+        wsgi, asgi = (_summary(results[name]['all']) for name in ('wsgi', 'asgi'))
+        self.stdout.write(
+            f"\nASGI vs WSGI: {asgi['rps'] / wsgi['rps']:.2f}x requests/s, "
+            f"p99 {asgi['p99']:.1f} ms vs {wsgi['p99']:.1f} ms"
+        )
+
+    def _run(self, url, options):
+        cookies = _login(url, options['email'], options['password'])
+        samples = defaultdict(list)
+        errors = defaultdict(int)
+        lock = threading.Lock()
+        measure_from = time.perf_counter() + options['warmup']
+        stop_at = measure_from + options['duration']
+
+        def worker(offset):
+            conn = _connect(url)
+            paths = options['paths']
+            i = offset
+            while time.perf_counter() < stop_at:
+                path = paths[i % len(paths)]
+                i += 1
+                started = time.perf_counter()
+                try:
+                    conn.request('GET', path, headers={'Cookie': cookies})
+                    response = conn.getresponse()
+                    response.read()
+                    ok = response.status == 200
+                except (OSError, http.client.HTTPException):
+                    ok = False
+                    conn.close()
+                    conn = _connect(url)
+                elapsed = (time.perf_counter() - started) * 1000
+                if started >= measure_from:
+                    with lock:
+                        if ok:
+                            samples[path].append(elapsed)
+                        else:
+                            errors[path] += 1
+            conn.close()
+
+        threads = [threading.Thread(target=worker, args=(n,)) for n in range(options['concurrency'])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        samples['all'] = [ms for path in options['paths'] for ms in samples[path]]
+        errors['all'] = sum(errors[path] for path in options['paths'])
+        return {path: {'samples': samples[path], 'errors': errors[path], 'duration': options['duration']}
+                for path in options['paths'] + ['all']}
+
+    def _report(self, title, result):
+        self.stdout.write(f"\n{title}")
+        for path, data in result.items():
+            s = _summary(data)
+            self.stdout.write(
+                f"  {path:<16} {s['count']:>7} ok {data['errors']:>5} err  "
+                f"{s['rps']:>8.1f} req/s  p50 {s['p50']:>7.1f} ms  p99 {s['p99']:>7.1f} ms"
+            )
+
+
+def _summary(data):
+    samples = sorted(data['samples'])
+    if not samples:
+        return {'count': 0, 'rps': 0.0, 'p50': 0.0, 'p99': 0.0}
+    return {
+        'count': len(samples),
+        'rps': len(samples) / data['duration'],
+        'p50': samples[len(samples) // 2],
+        'p99': samples[min(len(samples) - 1, int(len(samples) * 0.99))],
+    }
+
+
+def _connect(url):
+    parts = urlsplit(url)
+    cls = http.client.HTTPSConnection if parts.scheme == 'https' else http.client.HTTPConnection
+    return cls(parts.hostname, parts.port, timeout=30)
+
+
+def _wait_until_up(url, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            conn = _connect(url)
+            conn.request('GET', '/login/')
+            conn.getresponse().read()
+            return
+        except OSError:
+            time.sleep(0.2)
+    raise CommandError(f"Server at {url} did not start within {timeout}s.")
+
+
+def _login(url, email, password):
+    """Log in through the login form (with its CSRF token); returns a Cookie header value."""
+    conn = _connect(url)
+    conn.request('GET', '/login/')
+    response = conn.getresponse()
+    page = response.read().decode()
+    jar = SimpleCookie()
+    for header in response.headers.get_all('Set-Cookie') or []:
+        jar.load(header)
+    match = re.search(r'name="csrfmiddlewaretoken" value="([^"]+)"', page)
+    if 'csrftoken' not in jar or not match:
+        raise CommandError("Could not read the CSRF token from /login/.")
+
+    body = urlencode({'email': email, 'password': password, 'csrfmiddlewaretoken': match.group(1)})
+    conn.request('POST', '/login/', body=body, headers={
+        'Content-Type': 'application/x-www-form-urlencoded',
+        'Cookie': f"csrftoken={jar['csrftoken'].value}",
+        'Referer': f"{url}/login/",
+    })
+    response = conn.getresponse()
+    response.read()
+    for header in response.headers.get_all('Set-Cookie') or []:
+        jar.load(header)
+    conn.close()
+    if response.status != 302 or 'sessionid' not in jar:
+        raise CommandError(f"Login as {email} failed (HTTP {response.status}).")
+    # Pages are GET-only, so the read-your-writes pin cookie is left out
+    return '; '.join(f"{key}={jar[key].value}" for key in ('sessionid', 'csrftoken'))
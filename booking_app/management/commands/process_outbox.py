@@ -0,0 +1,40 @@
+import time
+
+from django.core.management.base import BaseCommand
+
+from booking_app.outbox import drain_once
+
+
+class Command(BaseCommand):
+    help = (
+        "Drain the notification outbox into Notification rows. Runs until "
+        "interrupted, or with --once until the outbox is empty (for cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=500)
+        parser.add_argument('--workers', type=int, default=4,
+                            help="Threads per batch. Use 1 on SQLite, which serializes writers.")
+        parser.add_argument('--once', action='store_true', help="Exit once nothing is ready.")
+        parser.add_argument('--poll-interval', type=float, default=1.0,
+                            help="Seconds to sleep when the outbox is empty.")
+
+    def handle(self, *args, **options):
+        total_delivered = total_failed = 0
+        try:
+            while True:
+                delivered, failed = drain_once(options['batch_size'], options['workers'])
+                total_delivered += delivered
+                total_failed += failed
+                if delivered or failed:
+                    self.stdout.write(f"delivered={delivered} failed={failed}")
+                    continue
+                if options['once']:
+                    break
+                time.sleep(options['poll_interval'])
+        except KeyboardInterrupt:
+            pass
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Outbox drained: {total_delivered} delivered, {total_failed} failed/retrying."
+        ))
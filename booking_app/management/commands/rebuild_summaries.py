@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand
+
+from booking_app.analytics import STATS_NAMESPACE
+from booking_app.caching import bump_version
+from booking_app.models import DailyBookingSummary
+from booking_app.summaries import compute_summaries, rebuild_summaries
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute the DailyBookingSummary table from Booking, a few rooms "
+        "at a time, each chunk under its rooms' locks. Use after bulk "
+        "changes that bypassed the booking signals, or with --check to "
+        "report drift only."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=5000, help="Bookings read per query.")
+        parser.add_argument('--batch-size', type=int, default=1000, help="Summary rows per INSERT.")
+        parser.add_argument('--rooms-per-chunk', type=int, default=50,
+                            help="Rooms rebuilt per transaction.")
+        parser.add_argument('--check', action='store_true',
+                            help="Compare the table with recomputed totals without changing it.")
+
+    def handle(self, *args, **options):
+        if options['check']:
+            self._check(options['chunk_size'])
+            return
+
+        rows = rebuild_summaries(options['chunk_size'], options['batch_size'], max(1, options['rooms_per_chunk']))
+        bump_version(STATS_NAMESPACE)
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {rows} summary rows."))
+
+    def _check(self, chunk_size):
+        expected = {key: tuple(value) for key, value in compute_summaries(chunk_size).items() if any(value)}
+        actual = {
+            (room_id, day, status): (minutes, count)
+            for room_id, day, status, minutes, count in DailyBookingSummary.objects.values_list(
+                'room_id', 'date', 'status', 'booked_minutes', 'booking_count',
+            )
+            if minutes or count
+        }
+        drift = [key for key in expected.keys() | actual.keys() if expected.get(key) != actual.get(key)]
+        for room_id, day, status in sorted(drift)[:20]:
+            self.stdout.write(f"room {room_id} {day} {status}: table {actual.get((room_id, day, status))}, "
+                              f"expected {expected.get((room_id, day, status))}")
+        if drift:
+            self.stdout.write(self.style.WARNING(f"{len(drift)} summary row(s) out of date."))
+        else:
+            self.stdout.write(self.style.SUCCESS("Summary table matches Booking."))
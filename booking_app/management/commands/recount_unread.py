@@ -0,0 +1,15 @@
+from django.core.management.base import BaseCommand
+
+from booking_app.inbox import recount_unread
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute every user's unread notification counter from the "
+        "Notification table. Use after notifications were changed outside "
+        "the application (the admin site, hand-written SQL)."
+    )
+
+    def handle(self, *args, **options):
+        users = recount_unread()
+        self.stdout.write(self.style.SUCCESS(f"Recounted unread notifications for {users} users."))
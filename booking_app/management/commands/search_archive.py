@@ -0,0 +1,51 @@
+import json
+from datetime import datetime, time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+
+from booking_app.archive import ARCHIVED_TABLES, search_archive
+
+
+def _day_start(value):
+    try:
+        day = parse_date(value)
+    except ValueError:
+        day = None
+    if day is None:
+        raise CommandError(f"Not a date (YYYY-MM-DD): {value}")
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+class Command(BaseCommand):
+    help = (
+        "Print archived notifications or audit log entries (see "
+        "archive_old_rows) as NDJSON, filtered by user, date range, text or "
+        "id range."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('table', choices=sorted(ARCHIVED_TABLES))
+        parser.add_argument('--user', type=int, help="User id.")
+        parser.add_argument('--since', help="First local date to include (YYYY-MM-DD).")
+        parser.add_argument('--until', help="Local date to stop before (YYYY-MM-DD).")
+        parser.add_argument('--contains', help="Case-insensitive text in the message/action.")
+        parser.add_argument('--min-id', type=int)
+        parser.add_argument('--max-id', type=int)
+        parser.add_argument('--limit', type=int)
+
+    def handle(self, *args, **options):
+        rows = search_archive(
+            options['table'],
+            user_id=options['user'],
+            since=_day_start(options['since']) if options['since'] else None,
+            until=_day_start(options['until']) if options['until'] else None,
+            contains=options['contains'],
+            min_id=options['min_id'],
+            max_id=options['max_id'],
+        )
+        for n, row in enumerate(rows):
+            if options['limit'] is not None and n >= options['limit']:
+                break
+            self.stdout.write(json.dumps(row))
@@ -0,0 +1,219 @@
+import random
+import time
+from contextlib import contextmanager
+from datetime import datetime, time as dtime, timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from booking_app.analytics import STATS_NAMESPACE
+from booking_app.caching import bump_version
+from booking_app.catalog import CATALOG_NAMESPACE, ROOM_TYPES_NAMESPACE, USERS_NAMESPACE
+from booking_app.inbox import add_unread, new_unread_counts
+from booking_app.models import (
+    ActionLog, Booking, DailyBookingSummary, Notification, NotificationOutbox, Role, Room, RoomAvailability,
+    RoomType, User,
+)
+from booking_app.summaries import compute_summaries, insert_summaries
+
+# Everything this command creates is recognisable by these markers, so
+# --clear can remove it again without touching real data.
+TYPE_PREFIX = 'Scale '
+EMAIL_DOMAIN = 'scale.example.com'
+PASSWORD = 'scale'
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday']
+WEEKEND = ['Saturday', 'Sunday']
+SLOT_HOURS = range(8, 22, 2)  # bookings start on even hours, 1-2 hours long
+
+
+@contextmanager
+def _explicit_timestamps(field):
+    """Let bulk_create keep the timestamps we set instead of auto_now_add's now()."""
+    field.auto_now_add = False
+    try:
+        yield
+    finally:
+        field.auto_now_add = True
+
+
+def _chunks(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a large synthetic data set (rooms, availability, users, "
+        "bookings, notifications, action logs) with chunked bulk_create. "
+        f"Users are <name>@{EMAIL_DOMAIN} with password '{PASSWORD}'; the "
+        "first one is an admin. Use --clear to remove a previous run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rooms', type=int, default=200)
+        parser.add_argument('--room-types', type=int, default=5)
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--bookings', type=int, default=100000)
+        parser.add_argument('--notifications', type=int, default=100000)
+        parser.add_argument('--action-logs', type=int, default=100000)
+        parser.add_argument('--days', type=int, default=180,
+                            help="Bookings span this many days before and after today.")
+        parser.add_argument('--chunk-size', type=int, default=5000)
+        parser.add_argument('--seed', type=int, default=42)
+        parser.add_argument('--clear', action='store_true', help="Delete previously seeded data first.")
+
+    def handle(self, *args, **options):
+        self.rng = random.Random(options['seed'])
+        self.chunk_size = options['chunk_size']
+        self.now = timezone.now()
+
+        if options['clear']:
+            self._timed("clear", self._clear)
+        elif User.objects.filter(email__endswith=f"@{EMAIL_DOMAIN}").exists():
+            raise CommandError("Seeded data already exists; run again with --clear to replace it.")
+
+        room_ids = self._timed("rooms", self._rooms, options['rooms'], options['room_types'])
+        user_ids = self._timed("users", self._users, options['users'])
+        booking_ids = self._timed("bookings", self._bookings, room_ids, user_ids,
+                                  options['bookings'], options['days'])
+        self._timed("notifications", self._notifications, user_ids, booking_ids, options['notifications'])
+        self._timed("action logs", self._action_logs, user_ids, options['action_logs'])
+
+        for namespace in (CATALOG_NAMESPACE, ROOM_TYPES_NAMESPACE, USERS_NAMESPACE, STATS_NAMESPACE):
+            bump_version(namespace)
+
+    def _timed(self, label, func, *args):
+        t0 = time.perf_counter()
+        result = func(*args)
+        rows = len(result) if isinstance(result, list) else result
+        self.stdout.write(f"{label:<14} {rows or 0:>8} rows {time.perf_counter() - t0:>7.2f}s")
+        return result
+
+    def _bulk(self, model, objects, after_chunk=None):
+        total = 0
+        for chunk in _chunks(objects, self.chunk_size):
+            with transaction.atomic():
+                model.objects.bulk_create(chunk)
+                if after_chunk:
+                    after_chunk(chunk)
+            total += len(chunk)
+        return total
+
+    # ----------------- TABLES -----------------
+    def _clear(self):
+        rooms = Room.objects.filter(room_type__room_type_name__startswith=TYPE_PREFIX)
+        with transaction.atomic():
+            # A normal delete runs the summary signals once per booking. The
+            # rooms' summary rows go away with them, so delete in bulk instead.
+            DailyBookingSummary.objects.filter(room__in=rooms).delete()
+            Notification.objects.filter(booking__room__in=rooms).update(booking=None)
+            NotificationOutbox.objects.filter(booking__room__in=rooms).update(booking=None)
+            Booking.objects.filter(room__in=rooms)._raw_delete(Booking.objects.db)
+            # The rest cascades from the users and room types
+            User.objects.filter(email__endswith=f"@{EMAIL_DOMAIN}").delete()
+            RoomType.objects.filter(room_type_name__startswith=TYPE_PREFIX).delete()
+
+    def _rooms(self, count, type_count):
+        RoomType.objects.bulk_create([
+            RoomType(room_type_name=f"{TYPE_PREFIX}{n}", room_type_description="Generated by seed_scale")
+            for n in range(1, type_count + 1)
+        ])
+        type_ids = list(RoomType.objects.filter(room_type_name__startswith=TYPE_PREFIX).values_list('id', flat=True))
+        self._bulk(Room, (
+            Room(room_number=f"S{n:05d}", room_type_id=self.rng.choice(type_ids),
+                 capacity=self.rng.choice([2, 4, 6, 8, 12, 20, 40, 80]))
+            for n in range(count)
+        ))
+        # bulk_create doesn't return ids on MySQL, so read them back
+        room_ids = list(Room.objects.filter(room_type_id__in=type_ids).values_list('id', flat=True))
+
+        def availability():
+            for room_id in room_ids:
+                days = WEEKDAYS + WEEKEND if self.rng.random() < 0.5 else WEEKDAYS
+                for day in days:
+                    yield RoomAvailability(room_id=room_id, day_of_week=day, start_time=dtime(8), end_time=dtime(22))
+
+        self._bulk(RoomAvailability, availability())
+        return room_ids
+
+    def _users(self, count):
+        admin_role, _ = Role.objects.get_or_create(role_name='Admin')
+        user_role, _ = Role.objects.get_or_create(role_name='User')
+        self._bulk(User, (
+            User(name=f"Scale User {n}", email=f"user{n}@{EMAIL_DOMAIN}", password_hash=PASSWORD,
+                 role=admin_role if n == 0 else user_role)
+            for n in range(count)
+        ))
+        return list(User.objects.filter(email__endswith=f"@{EMAIL_DOMAIN}").values_list('id', flat=True))
+
+    def _bookings(self, room_ids, user_ids, count, days):
+        if not room_ids or not user_ids:
+            return []
+        first_day = timezone.localdate() - timedelta(days=days)
+        slots = [(day, hour) for day in range(2 * days) for hour in SLOT_HOURS]
+        per_room = min(count // len(room_ids) + 1, len(slots))
+        tz = timezone.get_current_timezone()
+
+        def bookings():
+            made = 0
+            for room_id in room_ids:
+                # Distinct slots per room, so the generated bookings never overlap
+                for day, hour in self.rng.sample(slots, per_room):
+                    if made == count:
+                        return
+                    start = datetime.combine(first_day + timedelta(days=day), dtime(hour), tzinfo=tz)
+                    end = start + timedelta(hours=self.rng.choice([1, 2]))
+                    if end <= self.now:
+                        status = self.rng.choices(['completed', 'approved', 'cancelled'], [5, 4, 1])[0]
+                    else:
+                        status = self.rng.choices(['pending', 'approved', 'cancelled'], [3, 6, 1])[0]
+                    yield Booking(user_id=self.rng.choice(user_ids), room_id=room_id,
+                                  start_time=start, end_time=end, status=status)
+                    made += 1
+
+        self._bulk(Booking, bookings())
+        # The rooms are new, so their summary rows can be inserted in one go
+        # rather than updated chunk by chunk
+        with transaction.atomic():
+            insert_summaries(compute_summaries(self.chunk_size, Booking.objects.filter(room_id__in=room_ids)))
+        return list(Booking.objects.filter(room_id__in=room_ids).values_list('id', flat=True))
+
+    def _notifications(self, user_ids, booking_ids, count):
+        if not user_ids:
+            return 0
+        statuses = ['pending', 'approved', 'cancelled', 'completed']
+
+        def notifications():
+            for n in range(count):
+                booking_id = self.rng.choice(booking_ids) if booking_ids else None
+                yield Notification(
+                    user_id=self.rng.choice(user_ids), booking_id=booking_id,
+                    notification_message=f"Booking #{booking_id} updated to {self.rng.choice(statuses)}",
+                    notification_status='unread' if self.rng.random() < 0.3 else 'read',
+                    notification_timestamp=self.now - timedelta(minutes=self.rng.randrange(365 * 24 * 60)),
+                )
+
+        def update_unread(chunk):
+            add_unread(new_unread_counts(chunk))
+
+        with _explicit_timestamps(Notification._meta.get_field('notification_timestamp')):
+            return self._bulk(Notification, notifications(), after_chunk=update_unread)
+
+    def _action_logs(self, user_ids, count):
+        if not user_ids:
+            return 0
+        actions = ["Created booking #{}", "Updated booking #{} status to approved", "Deleted booking #{}",
+                   "Edited room {}", "Logged in {}"]
+        return self._bulk(ActionLog, (
+            ActionLog(user_id=self.rng.choice(user_ids), action=self.rng.choice(actions).format(n),
+                      action_timestamp=self.now - timedelta(minutes=self.rng.randrange(365 * 24 * 60)))
+            for n in range(count)
+        ))
@@ -0,0 +1,247 @@
+import atexit
+import logging
+import os
+import re
+import threading
+import time
+import uuid
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.cache import cache
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+logger = logging.getLogger(__name__)
+
+# Per-request query instrumentation.
+#
+# Every database connection gets an execute wrapper that, while a request is
+# being measured, counts and times its queries and tallies their SQL shape.
+# The request's stats live in a ContextVar, so queries run from async views
+# through sync_to_async are attributed to the right request. Totals per URL
+# name are added up in process memory and written to the cache as one
+# snapshot per process every METRICS_FLUSH_SECONDS (and at exit), so a
+# request costs no cache round trips and each key has a single writer. With
+# a shared backend, /metrics sums the snapshots of every server process; a
+# process that stops flushing drops out after PROCESS_SNAPSHOT_TIMEOUT.
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+_current = ContextVar('request_query_stats', default=None)
+
+
+class RequestStats:
+    def __init__(self):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.shapes = Counter()
+
+
+# ----------------- QUERY TIMING -----------------
+_IN_LIST = re.compile(r"\(\s*%s(?:\s*,\s*%s)*\s*\)")
+
+
+def fingerprint(sql):
+    """SQL shape: parameters are already placeholders; IN lists collapse to (...)."""
+    return _IN_LIST.sub('(...)', sql)
+
+
+def record_query(execute, sql, params, many, context):
+    stats = _current.get()
+    if stats is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        stats.db_seconds += time.perf_counter() - started
+        stats.queries += 1
+        stats.shapes[fingerprint(sql)] += 1
+
+
+@receiver(connection_created)
+def install_query_timer(sender, connection, **kwargs):
+    if record_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(record_query)
+
+
+# ----------------- AGGREGATES -----------------
+_PROCESSES_KEY = 'metrics:processes'
+PROCESS_SNAPSHOT_TIMEOUT = 24 * 60 * 60
+
+
+def _flush_seconds():
+    return getattr(settings, 'METRICS_FLUSH_SECONDS', 10)
+
+
+class ProcessTotals:
+    """This process's per-view counters and the cache key they are flushed to."""
+
+    def __init__(self):
+        self.pid = os.getpid()
+        self.key = f"metrics:process:{uuid.uuid4().hex}"
+        self.views = defaultdict(Counter)
+        self.flushed_at = time.monotonic()
+
+
+_lock = threading.Lock()
+_process = None
+
+
+def _totals():
+    # Rebuilt in a forked worker, so it doesn't flush its parent's totals
+    global _process
+    if _process is None or _process.pid != os.getpid():
+        _process = ProcessTotals()
+    return _process
+
+
+def _bucket(seconds):
+    for i, bound in enumerate(DURATION_BUCKETS):
+        if seconds <= bound:
+            return i
+    return len(DURATION_BUCKETS)
+
+
+def record_request(view, seconds, stats, repeated):
+    with _lock:
+        totals = _totals()
+        counts = totals.views[view]
+        counts['requests'] += 1
+        counts['duration_us'] += int(seconds * 1e6)
+        counts['db_us'] += int(stats.db_seconds * 1e6)
+        counts['queries'] += stats.queries
+        counts[f'bucket_{_bucket(seconds)}'] += 1
+        if repeated:
+            counts['repeated'] += 1
+        due = time.monotonic() - totals.flushed_at >= _flush_seconds()
+    if due:
+        flush()
+
+
+def flush():
+    """Write this process's totals to the cache and make sure /metrics knows the process."""
+    with _lock:
+        totals = _totals()
+        snapshot = {view: dict(counts) for view, counts in totals.views.items()}
+        totals.flushed_at = time.monotonic()
+    if not snapshot:
+        return
+    cache.set(totals.key, snapshot, timeout=PROCESS_SNAPSHOT_TIMEOUT)
+    # Read-modify-write: a registration lost to a concurrent one is redone on
+    # that process's next flush
+    keys = cache.get(_PROCESSES_KEY) or []
+    if totals.key not in keys:
+        cache.set(_PROCESSES_KEY, keys + [totals.key], timeout=None)
+
+
+atexit.register(flush)
+
+
+def collect_totals():
+    """{view: {counter: value}} summed over every process's last snapshot."""
+    flush()
+    keys = cache.get(_PROCESSES_KEY) or []
+    snapshots = cache.get_many(keys)
+    if len(snapshots) < len(keys):
+        cache.set(_PROCESSES_KEY, [key for key in keys if key in snapshots], timeout=None)
+    merged = defaultdict(Counter)
+    for snapshot in snapshots.values():
+        for view, counts in snapshot.items():
+            merged[view].update(counts)
+    return merged
+
+
+def _labels(view, **extra):
+    pairs = [('view', view)] + list(extra.items())
+    return '{' + ','.join(f'{name}="{value}"' for name, value in pairs) + '}'
+
+
+def render_metrics():
+    """All per-view totals in the Prometheus text exposition format."""
+    totals = collect_totals()
+    views = sorted(totals)
+
+    def value(view, name):
+        return totals[view][name]
+
+    lines = [
+        "# HELP booking_http_requests_total Requests handled, by URL name.",
+        "# TYPE booking_http_requests_total counter",
+    ]
+    lines += [f"booking_http_requests_total{_labels(v)} {value(v, 'requests')}" for v in views]
+
+    lines += [
+        "# HELP booking_http_request_duration_seconds Wall time from the first to the last middleware.",
+        "# TYPE booking_http_request_duration_seconds histogram",
+    ]
+    for v in views:
+        cumulative = 0
+        for i, bound in enumerate(DURATION_BUCKETS + ('+Inf',)):
+            cumulative += value(v, f'bucket_{i}')
+            lines.append(f"booking_http_request_duration_seconds_bucket{_labels(v, le=bound)} {cumulative}")
+        lines.append(f"booking_http_request_duration_seconds_sum{_labels(v)} {value(v, 'duration_us') / 1e6}")
+        lines.append(f"booking_http_request_duration_seconds_count{_labels(v)} {value(v, 'requests')}")
+
+    lines += [
+        "# HELP booking_db_query_seconds_total Time spent in database queries.",
+        "# TYPE booking_db_query_seconds_total counter",
+    ]
+    lines += [f"booking_db_query_seconds_total{_labels(v)} {value(v, 'db_us') / 1e6}" for v in views]
+
+    for name, key, help_text in [
+        ('booking_db_queries_total', 'queries', "Database queries run."),
+        ('booking_repeated_query_requests_total', 'repeated',
+         "Requests that ran one SQL shape more than REPEATED_QUERY_THRESHOLD times."),
+    ]:
+        lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+        lines += [f"{name}{_labels(v)} {value(v, key)}" for v in views]
+    return "\n".join(lines) + "\n"
+
+
+# ----------------- MIDDLEWARE -----------------
+class QueryMetricsMiddleware:
+    """
+    Record wall time, database time and query count per request, warn when
+    one SQL shape repeats more than REPEATED_QUERY_THRESHOLD times (an N+1),
+    and add the totals to the request's URL name for /metrics.
+    """
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.threshold = getattr(settings, 'REPEATED_QUERY_THRESHOLD', 10)
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self._acall(request)
+        stats, started = RequestStats(), time.perf_counter()
+        token = _current.set(stats)
+        try:
+            return self.get_response(request)
+        finally:
+            _current.reset(token)
+            self._record(request, stats, time.perf_counter() - started)
+
+    async def _acall(self, request):
+        stats, started = RequestStats(), time.perf_counter()
+        token = _current.set(stats)
+        try:
+            return await self.get_response(request)
+        finally:
+            _current.reset(token)
+            self._record(request, stats, time.perf_counter() - started)
+
+    def _record(self, request, stats, seconds):
+        match = getattr(request, 'resolver_match', None)
+        view = (match.url_name if match else None) or 'unmatched'
+        repeated = {shape: n for shape, n in stats.shapes.items() if n > self.threshold}
+        for shape, n in repeated.items():
+            logger.warning("%s (%s) ran the same query %d times: %s", view, request.path, n, shape[:300])
+        record_request(view, seconds, stats, repeated)
@@ -0,0 +1,32 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_app', '0003_alter_roomavailability_end_time_and_more'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='roomavailability',
+            name='day_of_week',
+            field=models.CharField(choices=[('Monday', 'Monday'), ('Tuesday', 'Tuesday'), ('Wednesday', 'Wednesday'), ('Thursday', 'Thursday'), ('Friday', 'Friday'), ('Saturday', 'Saturday'), ('Sunday', 'Sunday')], max_length=10),
+        ),
+        migrations.AlterField(
+            model_name='roomavailability',
+            name='end_time',
+            field=models.TimeField(),
+        ),
+        migrations.AlterField(
+            model_name='roomavailability',
+            name='start_time',
+            field=models.TimeField(),
+        ),
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['room', 'start_time', 'end_time'], name='idx_booking_room_start_end'),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_app', '0005_booking_list_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['user', 'start_time'], name='idx_booking_user_start'),
+        ),
+    ]
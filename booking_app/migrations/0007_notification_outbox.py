@@ -0,0 +1,36 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:18
+
+import django.db.models.deletion
+import django.utils.timezone
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_app', '0006_booking_user_start_index'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NotificationOutbox',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('user_message', models.TextField()),
+                ('admin_message', models.TextField(blank=True)),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('processing', 'Processing'), ('failed', 'Failed')], default='pending', max_length=20)),
+                ('attempts', models.PositiveIntegerField(default=0)),
+                ('available_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('claimed_by', models.CharField(blank=True, max_length=36)),
+                ('claimed_at', models.DateTimeField(blank=True, null=True)),
+                ('last_error', models.TextField(blank=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('booking', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='booking_app.booking')),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='booking_app.user')),
+            ],
+            options={
+                'db_table': 'NotificationOutbox',
+                'indexes': [models.Index(fields=['status', 'available_at'], name='idx_outbox_status_available'), models.Index(fields=['claimed_by'], name='idx_outbox_claimed_by')],
+            },
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:19
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_app', '0007_notification_outbox'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'notification_timestamp'], name='idx_notif_user_ts'),
+        ),
+        migrations.AddIndex(
+            model_name='notification',
+            index=models.Index(fields=['user', 'notification_status', 'notification_timestamp'], name='idx_notif_user_status_ts'),
+        ),
+    ]
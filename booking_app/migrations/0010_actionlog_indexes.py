@@ -0,0 +1,25 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:21
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_app', '0009_actionlog_timestamp_default'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='actionlog',
+            index=models.Index(fields=['action_timestamp'], name='idx_actionlog_ts'),
+        ),
+        migrations.AddIndex(
+            model_name='actionlog',
+            index=models.Index(fields=['user', 'action_timestamp'], name='idx_actionlog_user_ts'),
+        ),
+        migrations.AddIndex(
+            model_name='actionlog',
+            index=models.Index(fields=['action', 'action_timestamp'], name='idx_actionlog_action_ts'),
+        ),
+    ]
@@ -0,0 +1,30 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:30
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_app', '0011_booking_series'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='DailyBookingSummary',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('approved', 'Approved'), ('cancelled', 'Cancelled'), ('completed', 'Completed')], max_length=20)),
+                ('booked_minutes', models.IntegerField(default=0)),
+                ('booking_count', models.IntegerField(default=0)),
+                ('room', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='booking_app.room')),
+            ],
+            options={
+                'db_table': 'DailyBookingSummary',
+                'indexes': [models.Index(fields=['date', 'status'], name='idx_summary_date_status')],
+                'constraints': [models.UniqueConstraint(fields=('room', 'date', 'status'), name='uniq_summary_room_date_status')],
+            },
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.7 on 2026-10-17 06:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_app', '0012_daily_booking_summary'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='booking',
+            index=models.Index(fields=['status', 'end_time'], name='idx_booking_status_end'),
+        ),
+    ]
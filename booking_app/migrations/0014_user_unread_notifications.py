@@ -0,0 +1,31 @@
+# Generated by Django 5.2.7 on 2026-10-17 07:37
+
+from django.db import migrations, models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+
+def count_unread(apps, schema_editor):
+    Notification = apps.get_model('booking_app', 'Notification')
+    User = apps.get_model('booking_app', 'User')
+    unread = (
+        Notification.objects.filter(user_id=OuterRef('pk'), notification_status='unread')
+        .order_by().values('user_id').annotate(n=Count('id')).values('n')
+    )
+    User.objects.update(unread_notifications=Coalesce(Subquery(unread), 0))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_app', '0013_booking_status_end_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='user',
+            name='unread_notifications',
+            field=models.IntegerField(default=0),
+        ),
+        migrations.RunPython(count_unread, migrations.RunPython.noop),
+    ]
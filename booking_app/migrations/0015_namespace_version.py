@@ -0,0 +1,23 @@
+# Generated by Django 5.2.7 on 2026-10-17 07:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_app', '0014_user_unread_notifications'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='NamespaceVersion',
+            fields=[
+                ('namespace', models.CharField(max_length=50, primary_key=True, serialize=False)),
+                ('version', models.BigIntegerField()),
+            ],
+            options={
+                'db_table': 'NamespaceVersion',
+            },
+        ),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 5.2.7 on 2026-10-17 07:42
+
+import datetime
+import django.db.models.expressions
+from django.db import migrations, models
+
+MAX_LENGTH = datetime.timedelta(days=1)
+
+
+def split_long_bookings(apps, schema_editor):
+    """
+    Split bookings longer than a day, saved before the limit existed, into
+    consecutive bookings of at most a day each, so the constraint holds and
+    the overlap queries (which rely on it) see all of them.
+    """
+    Booking = apps.get_model('booking_app', 'Booking')
+    for booking in list(Booking.objects.filter(end_time__gt=models.F('start_time') + MAX_LENGTH)):
+        pieces = []
+        start = booking.start_time + MAX_LENGTH
+        while start < booking.end_time:
+            pieces.append(Booking(
+                user_id=booking.user_id, room_id=booking.room_id, series_id=booking.series_id,
+                status=booking.status, start_time=start, end_time=min(start + MAX_LENGTH, booking.end_time),
+            ))
+            start += MAX_LENGTH
+        booking.end_time = booking.start_time + MAX_LENGTH
+        booking.save(update_fields=['end_time'])
+        Booking.objects.bulk_create(pieces)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('booking_app', '0015_namespace_version'),
+    ]
+
+    operations = [
+        migrations.RunPython(split_long_bookings, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='booking',
+            constraint=models.CheckConstraint(condition=models.Q(('end_time__lte', django.db.models.expressions.CombinedExpression(models.F('start_time'), '+', models.Value(datetime.timedelta(days=1))))), name='booking_max_length'),
+        ),
+    ]
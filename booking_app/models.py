@@ -1,4 +1,8 @@
+from datetime import timedelta
+
+from django.core.exceptions import ValidationError
 from django.db import models
+from django.utils import timezone
 
 # --- Roles and Users ---
 class Role(models.Model):
@@ -17,6 +21,8 @@ class User(models.Model):
     password_hash = models.CharField(max_length=255)
     role = models.ForeignKey(Role, on_delete=models.CASCADE)
     created_at = models.DateTimeField(auto_now_add=True)
+    # Kept in step with Notification by booking_app.inbox
+    unread_notifications = models.IntegerField(default=0)
 
     class Meta:
         db_table = 'User'
@@ -93,6 +99,23 @@ class RoomRoomFeature(models.Model):
 
 
 # --- Booking System ---
+class BookingSeries(models.Model):
+    """A recurring booking: the first occurrence repeated every N days until a date."""
+    user = models.ForeignKey(User, on_delete=models.CASCADE)
+    room = models.ForeignKey(Room, on_delete=models.CASCADE)
+    start_time = models.DateTimeField()  # first occurrence
+    end_time = models.DateTimeField()
+    interval_days = models.PositiveIntegerField(default=7)
+    until = models.DateField()
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'BookingSeries'
+
+    def __str__(self):
+        return f"{self.room} every {self.interval_days} day(s) until {self.until}"
+
+
 class Booking(models.Model):
     STATUS_CHOICES = [
         ('pending', 'Pending'),
@@ -106,14 +129,69 @@ class Booking(models.Model):
     start_time = models.DateTimeField()
     end_time = models.DateTimeField()
     status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    series = models.ForeignKey(BookingSeries, on_delete=models.SET_NULL, null=True, blank=True,
+                               related_name='occurrences')
 
     class Meta:
         db_table = 'Booking'
+        indexes = [
+            # Overlap checks: room = ? AND start_time < ? AND end_time > ?
+            models.Index(fields=['room', 'start_time', 'end_time'], name='idx_booking_room_start_end'),
+            # A user's own bookings in start order (BookingListView)
+            models.Index(fields=['user', 'start_time'], name='idx_booking_user_start'),
+            # Keyset pagination over all bookings, optionally by status
+            models.Index(fields=['start_time'], name='idx_booking_start'),
+            models.Index(fields=['status', 'start_time'], name='idx_booking_status_start'),
+            # Auto-completion sweep: status = 'approved' AND end_time < now, oldest first
+            models.Index(fields=['status', 'end_time'], name='idx_booking_status_end'),
+        ]
+        constraints = [
+            # conflicts.MAX_BOOKING_LENGTH: the overlap queries rely on it
+            models.CheckConstraint(
+                condition=models.Q(end_time__lte=models.F('start_time') + timedelta(days=1)),
+                name='booking_max_length',
+            ),
+        ]
+
+    def clean(self):
+        # Imported here: conflicts imports this module
+        from .conflicts import length_error
+
+        if self.start_time and self.end_time:
+            error = length_error(self.start_time, self.end_time)
+            if error:
+                raise ValidationError(error)
 
     def __str__(self):
         return f"{self.room} - {self.user.name} ({self.status})"
 
 
+class DailyBookingSummary(models.Model):
+    """
+    Pre-aggregated bookings per room, local date and status. Kept current
+    by booking_app.summaries on every booking change; `rebuild_summaries`
+    recomputes it from Booking.
+    """
+    room = models.ForeignKey(Room, on_delete=models.CASCADE)
+    date = models.DateField()
+    status = models.CharField(max_length=20, choices=Booking.STATUS_CHOICES)
+    booked_minutes = models.IntegerField(default=0)  # minutes falling on this date
+    booking_count = models.IntegerField(default=0)   # bookings starting on this date
+
+    class Meta:
+        db_table = 'DailyBookingSummary'
+        constraints = [
+            models.UniqueConstraint(fields=['room', 'date', 'status'], name='uniq_summary_room_date_status'),
+        ]
+        indexes = [
+            # Range reports across all rooms
+            models.Index(fields=['date', 'status'], name='idx_summary_date_status'),
+        ]
+
+    def __str__(self):
+        return f"{self.room} {self.date} {self.status}: {self.booking_count}"
+
+
 # --- Notifications and Logs ---
 class Notification(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
@@ -124,18 +202,64 @@ class Notification(models.Model):
 
     class Meta:
         db_table = 'Notification'
+        indexes = [
+            # Inbox pages (newest first) and unread counts / unread-only pages
+            models.Index(fields=['user', 'notification_timestamp'], name='idx_notif_user_ts'),
+            models.Index(fields=['user', 'notification_status', 'notification_timestamp'], name='idx_notif_user_status_ts'),
+        ]
 
     def __str__(self):
         return f"Notification for {self.user.name}"
 
 
+class NotificationOutbox(models.Model):
+    """
+    Pending notification fan-out, written in the same transaction as the
+    booking change and turned into Notification rows by `process_outbox`.
+    """
+    STATUS_CHOICES = [
+        ('pending', 'Pending'),
+        ('processing', 'Processing'),
+        ('failed', 'Failed'),
+    ]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE)  # recipient of user_message
+    booking = models.ForeignKey(Booking, on_delete=models.SET_NULL, null=True, blank=True)
+    user_message = models.TextField()
+    admin_message = models.TextField(blank=True)  # empty: don't notify admins
+    status = models.CharField(max_length=20, choices=STATUS_CHOICES, default='pending')
+    attempts = models.PositiveIntegerField(default=0)
+    available_at = models.DateTimeField(default=timezone.now)
+    claimed_by = models.CharField(max_length=36, blank=True)
+    claimed_at = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        db_table = 'NotificationOutbox'
+        indexes = [
+            models.Index(fields=['status', 'available_at'], name='idx_outbox_status_available'),
+            models.Index(fields=['claimed_by'], name='idx_outbox_claimed_by'),
+        ]
+
+    def __str__(self):
+        return f"Outbox #{self.id} for {self.user_id} ({self.status})"
+
+
 class ActionLog(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE)
     action = models.CharField(max_length=255)
-    action_timestamp = models.DateTimeField(auto_now_add=True)
+    # Set when the action is logged, not when the buffered row is flushed
+    action_timestamp = models.DateTimeField(default=timezone.now, editable=False)
 
     class Meta:
         db_table = 'ActionLog'
+        indexes = [
+            # Audit log pages (newest first), per-user and by action prefix
+            models.Index(fields=['action_timestamp'], name='idx_actionlog_ts'),
+            models.Index(fields=['user', 'action_timestamp'], name='idx_actionlog_user_ts'),
+            models.Index(fields=['action', 'action_timestamp'], name='idx_actionlog_action_ts'),
+        ]
 
     def __str__(self):
         return f"{self.user.name}: {self.action}"
@@ -166,6 +290,18 @@ class RoomAvailability(models.Model):
         return f"{self.room.room_number} - {self.day_of_week} {self.start_time}-{self.end_time}"
 
 
+class NamespaceVersion(models.Model):
+    """
+    Version of a cache namespace (the time of its last change, in
+    microseconds) when the cache is per-process; see booking_app.caching.
+    """
+    namespace = models.CharField(max_length=50, primary_key=True)
+    version = models.BigIntegerField()
+
+    class Meta:
+        db_table = 'NamespaceVersion'
+
+
 # --- Optional Product Table ---
 class Product(models.Model):
     product_name = models.CharField(max_length=100)
@@ -177,3 +313,4 @@ class Product(models.Model):
 
     def __str__(self):
         return self.product_name
+
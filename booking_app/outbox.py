@@ -0,0 +1,180 @@
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from django.db import connection, transaction
+from django.db.models import F, Q
+from django.utils import timezone
+
+from .inbox import add_unread, new_unread_counts
+from .models import Notification, NotificationOutbox, User
+
+MAX_ATTEMPTS = 5
+# A 'processing' row whose claim is older than this is assumed orphaned by a
+# crashed worker and is claimed again (hence at-least-once delivery).
+CLAIM_LEASE = timedelta(minutes=5)
+
+
+# ----------------- ENQUEUE (request path) -----------------
+def booking_messages(action: str, booking):
+    """
+    (owner message, admin message) for a booking event.
+    action examples: 'created', 'approved', 'cancelled', 'completed', 'removed', 'updated to approved'
+    """
+    user_msg = f"Your booking for Room {booking.room.room_number} at {booking.start_time} was {action}."
+    admin_msg = f"Booking for Room {booking.room.room_number} with user {booking.user.name} was {action}."
+    return user_msg, admin_msg
+
+
+def queue_notification(user_id, user_message, admin_message='', booking=None):
+    """One outbox row; the worker fans it out to the user and (optionally) all admins."""
+    return NotificationOutbox.objects.create(
+        user_id=user_id,
+        booking=booking,
+        user_message=user_message,
+        admin_message=admin_message,
+    )
+
+
+def queue_booking_notifications(action: str, booking):
+    """
+    Queue notifications for the booking's user and all admins.
+    Call it inside the transaction that changed the booking so the two
+    commit (or roll back) together.
+    """
+    user_msg, admin_msg = booking_messages(action, booking)
+    return queue_notification(booking.user_id, user_msg, admin_msg, booking=booking)
+
+
+# ----------------- DRAIN (worker) -----------------
+def _ready():
+    now = timezone.now()
+    return (
+        Q(status='pending', available_at__lte=now)
+        | Q(status='processing', claimed_at__lt=now - CLAIM_LEASE)
+    )
+
+
+def claim_batch(batch_size):
+    """
+    Claim up to `batch_size` ready rows for this worker and return them.
+    The conditional UPDATE makes the claim safe between concurrent workers
+    without needing SELECT ... FOR UPDATE SKIP LOCKED (so it works on SQLite).
+    """
+    token = uuid.uuid4().hex
+    ids = list(
+        NotificationOutbox.objects.filter(_ready())
+        .order_by('id')
+        .values_list('id', flat=True)[:batch_size]
+    )
+    if not ids:
+        return []
+
+    NotificationOutbox.objects.filter(_ready(), id__in=ids).update(
+        status='processing',
+        claimed_by=token,
+        claimed_at=timezone.now(),
+        attempts=F('attempts') + 1,
+    )
+    return list(NotificationOutbox.objects.filter(claimed_by=token).order_by('id'))
+
+
+def _notifications_for(entry, admin_ids):
+    # An empty user_message means the row only carries an admin message
+    rows = [Notification(
+        user_id=entry.user_id,
+        booking_id=entry.booking_id,
+        notification_message=entry.user_message,
+        notification_status='unread',
+    )] if entry.user_message else []
+    if entry.admin_message:
+        rows.extend(
+            Notification(
+                user_id=admin_id,
+                booking_id=entry.booking_id,
+                notification_message=entry.admin_message,
+                notification_status='unread',
+            )
+            for admin_id in admin_ids
+        )
+    return rows
+
+
+def _deliver(entries, admin_ids):
+    """Insert the notifications and remove the outbox rows in one transaction."""
+    with transaction.atomic():
+        notifications = []
+        for entry in entries:
+            notifications.extend(_notifications_for(entry, admin_ids))
+        Notification.objects.bulk_create(notifications, batch_size=500)
+        add_unread(new_unread_counts(notifications))
+        NotificationOutbox.objects.filter(
+            id__in=[e.id for e in entries],
+            claimed_by=entries[0].claimed_by,
+        ).delete()
+    return notifications
+
+
+def _release(entry, error):
+    """Put a failed row back with exponential backoff, or park it as 'failed'."""
+    if entry.attempts >= MAX_ATTEMPTS:
+        status, available_at = 'failed', entry.available_at
+    else:
+        status, available_at = 'pending', timezone.now() + timedelta(seconds=2 ** entry.attempts)
+    NotificationOutbox.objects.filter(id=entry.id, claimed_by=entry.claimed_by).update(
+        status=status,
+        available_at=available_at,
+        claimed_by='',
+        last_error=str(error)[:2000],
+    )
+
+
+def process_chunk(entries, admin_ids):
+    """
+    Deliver a chunk in one bulk insert; if that fails, fall back to one
+    entry at a time so a single bad row can't hold the rest back.
+    Returns (delivered, failed).
+    """
+    if not entries:
+        return 0, 0
+    try:
+        _deliver(entries, admin_ids)
+        return len(entries), 0
+    except Exception:
+        pass
+
+    delivered = failed = 0
+    for entry in entries:
+        try:
+            _deliver([entry], admin_ids)
+            delivered += 1
+        except Exception as exc:
+            _release(entry, exc)
+            failed += 1
+    return delivered, failed
+
+
+def _in_thread(entries, admin_ids):
+    try:
+        return process_chunk(entries, admin_ids)
+    finally:
+        connection.close()  # each pool thread opened its own connection
+
+
+def drain_once(batch_size=500, workers=1):
+    """
+    Claim one batch and deliver it, split across `workers` threads.
+    Returns (delivered, failed); (0, 0) means the outbox had nothing ready.
+    """
+    entries = claim_batch(batch_size)
+    if not entries:
+        return 0, 0
+
+    admin_ids = list(User.objects.filter(role__role_name="Admin").values_list('id', flat=True))
+    if workers <= 1:
+        return process_chunk(entries, admin_ids)
+
+    chunks = [entries[i::workers] for i in range(workers)]
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        results = list(pool.map(lambda chunk: _in_thread(chunk, admin_ids), chunks))
+    return sum(r[0] for r in results), sum(r[1] for r in results)
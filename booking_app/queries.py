@@ -0,0 +1,109 @@
+from datetime import datetime, time, timedelta
+
+from django.utils import timezone
+
+from .conflicts import MAX_BOOKING_LENGTH
+from .models import ActionLog, Booking
+
+
+def day_start(day):
+    """Aware datetime for local midnight at the start of `day` (a date)."""
+    return timezone.make_aware(datetime.combine(day, time.min))
+
+
+def day_bounds(day):
+    """Half-open [start, end) datetimes covering the local calendar day."""
+    return day_start(day), day_start(day + timedelta(days=1))
+
+
+def filter_bookings(queryset, filters):
+    """
+    Apply cleaned BookingFilterForm data to a Booking queryset.
+    Dates become plain start_time range bounds so the indexes stay usable.
+    """
+    if filters.get('room'):
+        queryset = queryset.filter(room=filters['room'])
+    if filters.get('user'):
+        queryset = queryset.filter(user=filters['user'])
+    if filters.get('status'):
+        queryset = queryset.filter(status=filters['status'])
+    if filters.get('date_from'):
+        queryset = queryset.filter(start_time__gte=day_start(filters['date_from']))
+    if filters.get('date_to'):
+        queryset = queryset.filter(start_time__lt=day_start(filters['date_to'] + timedelta(days=1)))
+    return queryset
+
+
+def bucket_by_day(bookings, today):
+    """
+    Split bookings into (past, today, future) lists in a single pass.
+    Past ends before today, future starts after today, everything else
+    touches today. Bounds are local-midnight datetimes, so no per-row
+    DATE()/CONVERT_TZ() is needed in SQL.
+    """
+    today_start, tomorrow_start = day_bounds(today)
+    past, current, future = [], [], []
+    for booking in bookings:
+        if booking.end_time < today_start:
+            past.append(booking)
+        elif booking.start_time >= tomorrow_start:
+            future.append(booking)
+        else:
+            current.append(booking)
+    return past, current, future
+
+
+# A user's booking list shows current bookings and those starting up to this
+# many days ahead; past ones are paged through with a cursor
+USER_BOOKING_FUTURE_DAYS = 365
+
+
+def user_booking_window(today):
+    """Half-open [start, end) of the times covered by a user's current and upcoming bookings."""
+    return day_start(today), day_start(today + timedelta(days=USER_BOOKING_FUTURE_DAYS + 1))
+
+
+def user_bookings(user_id, today):
+    """
+    The user's bookings overlapping user_booking_window(today), in start
+    order: one bounded range scan on (user_id, start_time) however long their
+    history, since no booking starts more than MAX_BOOKING_LENGTH before it
+    ends.
+    """
+    start, end = user_booking_window(today)
+    return (
+        booking_rows()
+        .filter(user_id=user_id, start_time__gte=start - MAX_BOOKING_LENGTH, start_time__lt=end, end_time__gte=start)
+        .order_by('start_time', 'id')
+    )
+
+
+def user_past_bookings(user_id, today):
+    """
+    The user's bookings that ended before today, for keyset_paginate() on
+    start_time (descending), which walks (user_id, start_time) backwards.
+    """
+    start = day_start(today)
+    return booking_rows().filter(user_id=user_id, start_time__lt=start, end_time__lt=start)
+
+
+def booking_rows():
+    """Bookings with room and user joined in, for list pages."""
+    return Booking.objects.select_related('room', 'user')
+
+
+def filter_action_logs(queryset, filters):
+    """Apply cleaned AuditLogFilterForm data to an ActionLog queryset."""
+    if filters.get('user'):
+        queryset = queryset.filter(user=filters['user'])
+    if filters.get('action'):
+        queryset = queryset.filter(action__startswith=filters['action'])
+    if filters.get('since'):
+        queryset = queryset.filter(action_timestamp__gte=filters['since'])
+    if filters.get('until'):
+        queryset = queryset.filter(action_timestamp__lt=filters['until'])
+    return queryset
+
+
+def action_log_rows():
+    return ActionLog.objects.select_related('user')
@@ -0,0 +1,120 @@
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+
+PRIMARY_ALIAS = 'default'
+REPLICA_ALIAS = 'replica'
+
+# Set after a user's POST; while present their reads stay on the primary so
+# they see their own change even if the replica is lagging.
+PIN_COOKIE = 'read_primary'
+
+# Session/auth state is read right after it is written (e.g. login redirect)
+PRIMARY_ONLY_APPS = {'sessions', 'auth', 'contenttypes', 'admin'}
+
+_replica_reads = ContextVar('replica_reads', default=False)
+
+
+def replica_configured():
+    return REPLICA_ALIAS in settings.DATABASES
+
+
+class PrimaryReplicaRouter:
+    """
+    Writes always go to the primary. Reads go to the replica only inside a
+    view wrapped with `replica_reads`; everywhere else they stay on the
+    primary, so unannotated code keeps its current behaviour.
+    """
+
+    def db_for_read(self, model, **hints):
+        if _replica_reads.get() and model._meta.app_label not in PRIMARY_ONLY_APPS:
+            return REPLICA_ALIAS
+        return PRIMARY_ALIAS
+
+    def db_for_write(self, model, **hints):
+        return PRIMARY_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # same data on both aliases
+
+
+# ----------------- VIEW ANNOTATION -----------------
+def _may_use_replica(request):
+    return (
+        replica_configured()
+        and request.method in ('GET', 'HEAD')
+        and PIN_COOKIE not in request.COOKIES
+    )
+
+
+def replica_reads(view):
+    """
+    Mark a read-only view: its GET/HEAD queries go to the replica unless the
+    user wrote something in the last READ_YOUR_WRITES_SECONDS (and sets
+    request.used_replica when it does). Use with
+    method_decorator(replica_reads, name='dispatch') on class-based views;
+    works for async views too.
+    """
+    if iscoroutinefunction(view):
+        async def wrapper(request, *args, **kwargs):
+            if not _may_use_replica(request):
+                return await view(request, *args, **kwargs)
+            request.used_replica = True
+            token = _replica_reads.set(True)
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                _replica_reads.reset(token)
+    else:
+        def wrapper(request, *args, **kwargs):
+            if not _may_use_replica(request):
+                return view(request, *args, **kwargs)
+            request.used_replica = True
+            token = _replica_reads.set(True)
+            try:
+                return view(request, *args, **kwargs)
+            finally:
+                _replica_reads.reset(token)
+    return wraps(view)(wrapper)
+
+
+@contextmanager
+def primary_reads():
+    """Read from the primary inside a replica view, e.g. before caching the result."""
+    token = _replica_reads.set(False)
+    try:
+        yield
+    finally:
+        _replica_reads.reset(token)
+
+
+# ----------------- READ YOUR WRITES -----------------
+class ReadYourWritesMiddleware:
+    """Pin the client's reads to the primary for a short window after any unsafe request."""
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self._acall(request)
+        return self._pin(request, self.get_response(request))
+
+    async def _acall(self, request):
+        return self._pin(request, await self.get_response(request))
+
+    def _pin(self, request, response):
+        if replica_configured() and request.method not in ('GET', 'HEAD', 'OPTIONS', 'TRACE'):
+            response.set_cookie(
+                PIN_COOKIE, '1',
+                max_age=getattr(settings, 'READ_YOUR_WRITES_SECONDS', 10),
+                httponly=True, samesite='Lax',
+            )
+        return response
@@ -0,0 +1,93 @@
+from datetime import datetime, timedelta
+
+from django.core.exceptions import ValidationError
+from django.utils import timezone
+
+from .analytics import STATS_NAMESPACE
+from .caching import bump_version_on_commit
+from .conflicts import BatchValidator, with_room_lock
+from .models import Booking, BookingSeries
+from .outbox import queue_notification
+from .summaries import record_created
+
+MAX_OCCURRENCES = 200
+
+
+def occurrence_count(start, interval_days, until):
+    """How many occurrences a series starting at `start` has up to `until`."""
+    days = (until - timezone.localtime(start).date()).days
+    return days // interval_days + 1 if days >= 0 else 0
+
+
+def expand_occurrences(start, end, interval_days, until):
+    """
+    (start, end) pairs for every occurrence from the first one up to and
+    including `until`, at most MAX_OCCURRENCES of them. Steps are taken in
+    local wall-clock time, so a 10:00 booking stays at 10:00 across DST
+    changes.
+    """
+    start, end = timezone.localtime(start), timezone.localtime(end)
+    length = end - start
+    occurrences = []
+    day = start.date()
+    while day <= until and len(occurrences) < MAX_OCCURRENCES:
+        occ_start = timezone.make_aware(datetime.combine(day, start.time().replace(tzinfo=None)))
+        occurrences.append((occ_start, occ_start + length))
+        day += timedelta(days=interval_days)
+    return occurrences
+
+
+def check_occurrences(room, occurrences):
+    """
+    Validate every occurrence in one pass (two queries in total).
+    Returns (ok, problems) where problems are (start, message) pairs.
+    """
+    if not occurrences:
+        return [], []
+    validator = BatchValidator([room.id], start=occurrences[0][0], end=occurrences[-1][1])
+    ok, problems = [], []
+    for occ_start, occ_end in occurrences:
+        error = validator.check(room.id, occ_start, occ_end)
+        if error:
+            problems.append((occ_start, error))
+        else:
+            ok.append((occ_start, occ_end))
+    return ok, problems
+
+
+def create_series(user, room, start, end, interval_days, until, occurrences, status='pending'):
+    """
+    Save the series and its (already validated) occurrences in one
+    transaction, with a single summary notification instead of one each.
+    The occurrences are checked again under the room lock and nothing is
+    saved (ValidationError) if another booking took one of them meanwhile.
+    """
+    def create():
+        _, problems = check_occurrences(room, occurrences)
+        if problems:
+            raise ValidationError(
+                f"{len(problems)} of the dates were booked by someone else meanwhile, "
+                f"starting {problems[0][0]:%Y-%m-%d %H:%M}."
+            )
+        series = BookingSeries.objects.create(
+            user=user, room=room, start_time=start, end_time=end,
+            interval_days=interval_days, until=until,
+        )
+        bookings = Booking.objects.bulk_create([
+            Booking(user=user, room=room, start_time=occ_start, end_time=occ_end,
+                    status=status, series=series)
+            for occ_start, occ_end in occurrences
+        ])
+        record_created(bookings)
+        bump_version_on_commit(STATS_NAMESPACE)
+
+        summary = (f"{len(occurrences)} bookings for Room {room.room_number}, every "
+                   f"{interval_days} day(s) from {occurrences[0][0]:%Y-%m-%d} until {until:%Y-%m-%d}")
+        queue_notification(
+            user.id,
+            f"Your recurring booking was created: {summary}.",
+            f"Recurring booking for user {user.name} was created: {summary}.",
+        )
+        return series
+
+    return with_room_lock(room.id, create)
@@ -0,0 +1,60 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .analytics import STATS_NAMESPACE
+from .caching import bump_version_on_commit
+from .catalog import CATALOG_NAMESPACE, ROOM_TYPES_NAMESPACE, USERS_NAMESPACE
+from .models import Booking, Role, Room, RoomAvailability, RoomType, User
+from .summaries import booking_state, record_change
+
+
+# ----------------- ROOM CATALOG -----------------
+@receiver([post_save, post_delete], sender=Room)
+@receiver([post_save, post_delete], sender=RoomType)
+@receiver([post_save, post_delete], sender=RoomAvailability)
+def invalidate_room_catalog(sender, **kwargs):
+    bump_version_on_commit(CATALOG_NAMESPACE)
+
+
+@receiver([post_save, post_delete], sender=RoomType)
+def invalidate_room_types(sender, **kwargs):
+    bump_version_on_commit(ROOM_TYPES_NAMESPACE)
+
+
+# ----------------- USERS -----------------
+@receiver([post_save, post_delete], sender=User)
+@receiver([post_save, post_delete], sender=Role)
+def invalidate_user_list(sender, **kwargs):
+    bump_version_on_commit(USERS_NAMESPACE)
+
+
+# ----------------- BOOKING STATS -----------------
+# bulk_create skips signals; those call sites bump STATS_NAMESPACE themselves.
+@receiver([post_save, post_delete], sender=Booking)
+def invalidate_booking_stats(sender, **kwargs):
+    bump_version_on_commit(STATS_NAMESPACE)
+
+
+# ----------------- DAILY SUMMARIES -----------------
+# The row is re-read before saving so the old contribution can be subtracted
+# even when the instance was modified in place (e.g. a status change).
+@receiver(pre_save, sender=Booking)
+def remember_booking_state(sender, instance, raw=False, **kwargs):
+    instance._summary_state = None
+    if instance.pk and not raw:
+        instance._summary_state = (
+            Booking.objects.filter(pk=instance.pk)
+            .values_list('room_id', 'start_time', 'end_time', 'status')
+            .first()
+        )
+
+
+@receiver(post_save, sender=Booking)
+def update_summary_on_save(sender, instance, raw=False, **kwargs):
+    if not raw:
+        record_change(getattr(instance, '_summary_state', None), booking_state(instance))
+
+
+@receiver(post_delete, sender=Booking)
+def update_summary_on_delete(sender, instance, **kwargs):
+    record_change(booking_state(instance), None)
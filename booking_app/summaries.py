@@ -0,0 +1,206 @@
+from collections import defaultdict
+from datetime import datetime, time, timedelta
+
+from django.db import IntegrityError, transaction
+from django.db.models import F, Sum
+from django.utils import timezone
+
+from .conflicts import with_room_locks
+from .exports import chunked_values
+from .models import Booking, DailyBookingSummary, Room
+
+
+# ----------------- CONTRIBUTIONS -----------------
+def booking_contributions(room_id, start, end, status):
+    """
+    {(room_id, date, status): [minutes, count]} for one booking. Minutes are
+    split across the local dates the booking covers; the booking is counted
+    once, on its start date.
+    """
+    start, end = timezone.localtime(start), timezone.localtime(end)
+    contributions = {}
+    day = start.date()
+    while True:
+        day_start = timezone.make_aware(datetime.combine(day, time.min))
+        day_end = timezone.make_aware(datetime.combine(day + timedelta(days=1), time.min))
+        minutes = (min(end, day_end) - max(start, day_start)).total_seconds() // 60
+        contributions[(room_id, day, status)] = [int(minutes), int(day == start.date())]
+        if end <= day_end:
+            return contributions
+        day += timedelta(days=1)
+
+
+def _merge(total, contributions, sign=1):
+    for key, (minutes, count) in contributions.items():
+        total[key][0] += sign * minutes
+        total[key][1] += sign * count
+
+
+# ----------------- INCREMENTAL UPDATES -----------------
+def apply_deltas(deltas, create=True):
+    """
+    Add {(room_id, date, status): [minutes, count]} to the summary rows,
+    creating them as needed unless create=False.
+    """
+    # Fixed key order so concurrent transactions lock rows in the same order
+    for (room_id, day, status), (minutes, count) in sorted(deltas.items()):
+        if not minutes and not count:
+            continue
+        rows = DailyBookingSummary.objects.filter(room_id=room_id, date=day, status=status)
+        changes = {'booked_minutes': F('booked_minutes') + minutes, 'booking_count': F('booking_count') + count}
+        if rows.update(**changes) or not create:
+            continue
+        try:
+            with transaction.atomic():
+                DailyBookingSummary.objects.create(
+                    room_id=room_id, date=day, status=status, booked_minutes=minutes, booking_count=count,
+                )
+        except IntegrityError:
+            # Another transaction created the row between our UPDATE and INSERT
+            rows.update(**changes)
+
+
+def apply_deltas_in_bulk(deltas, batch_size=1000):
+    """
+    apply_deltas for many keys at once. Missing rows are inserted empty in
+    one statement; the rows are then looked up with one query per (date,
+    status) and incremented with one UPDATE per distinct delta, instead of
+    one or two queries per key. The increments stay F() expressions, so
+    concurrent changes to the same rows are never lost.
+    """
+    keys = sorted(key for key, (minutes, count) in deltas.items() if minutes or count)
+    DailyBookingSummary.objects.bulk_create([
+        DailyBookingSummary(room_id=room_id, date=day, status=status) for room_id, day, status in keys
+    ], batch_size=batch_size, ignore_conflicts=True)
+
+    rooms_by_day = defaultdict(list)
+    for room_id, day, status in keys:
+        rooms_by_day[(day, status)].append(room_id)
+    ids_by_delta = defaultdict(list)
+    for (day, status), room_ids in rooms_by_day.items():
+        rows = DailyBookingSummary.objects.filter(date=day, status=status, room_id__in=room_ids)
+        for pk, room_id in rows.values_list('id', 'room_id'):
+            ids_by_delta[tuple(deltas[(room_id, day, status)])].append(pk)
+
+    for (minutes, count), ids in sorted(ids_by_delta.items()):
+        ids.sort()
+        for i in range(0, len(ids), batch_size):
+            DailyBookingSummary.objects.filter(id__in=ids[i:i + batch_size]).update(
+                booked_minutes=F('booked_minutes') + minutes, booking_count=F('booking_count') + count,
+            )
+
+
+def booking_state(booking):
+    # to_python: the instance may still hold the strings it was created with
+    field = Booking._meta.get_field
+    return (
+        booking.room_id,
+        field('start_time').to_python(booking.start_time),
+        field('end_time').to_python(booking.end_time),
+        booking.status,
+    )
+
+
+def record_change(old_state, new_state):
+    """
+    Move a booking's contribution from old_state to new_state, each a
+    (room_id, start_time, end_time, status) tuple or None (created/deleted).
+    """
+    if old_state == new_state:
+        return
+    deltas = defaultdict(lambda: [0, 0])
+    if old_state is not None:
+        _merge(deltas, booking_contributions(*old_state), sign=-1)
+    if new_state is not None:
+        _merge(deltas, booking_contributions(*new_state))
+    # A delete only subtracts. A missing row means the room's summaries went
+    # first (a Room delete cascades to both), so there is nothing to update,
+    # and inserting one would point at the room being deleted.
+    apply_deltas(deltas, create=new_state is not None)
+
+
+def record_created(bookings):
+    """For bulk_create callers, which bypass the Booking signals."""
+    deltas = defaultdict(lambda: [0, 0])
+    for booking in bookings:
+        _merge(deltas, booking_contributions(*booking_state(booking)))
+    apply_deltas(deltas)
+
+
+def record_status_changes(states, new_status):
+    """
+    For bulk UPDATE callers, which bypass the Booking signals: move each
+    (room_id, start_time, end_time, status) state to new_status, applying
+    the combined deltas in bulk.
+    """
+    deltas = defaultdict(lambda: [0, 0])
+    for room_id, start, end, status in states:
+        contributions = booking_contributions(room_id, start, end, status)
+        _merge(deltas, contributions, sign=-1)
+        _merge(deltas, {(room_id, day, new_status): value for (_, day, _), value in contributions.items()})
+    apply_deltas_in_bulk(deltas)
+
+
+# ----------------- REBUILD -----------------
+def compute_summaries(chunk_size=5000, bookings=None):
+    """
+    Summary totals recomputed from Booking (or the `bookings` queryset),
+    reading bookings in id-ordered chunks so memory grows with the number of
+    summary rows, not bookings.
+    """
+    totals = defaultdict(lambda: [0, 0])
+    fields = ('id', 'room_id', 'start_time', 'end_time', 'status')
+    queryset = Booking.objects.all() if bookings is None else bookings
+    for _, *state in chunked_values(queryset, fields, chunk_size=chunk_size):
+        _merge(totals, booking_contributions(*state))
+    return totals
+
+
+def insert_summaries(totals, batch_size=1000):
+    """bulk_create summary rows for totals whose rows don't exist yet."""
+    DailyBookingSummary.objects.bulk_create([
+        DailyBookingSummary(room_id=room_id, date=day, status=status,
+                            booked_minutes=minutes, booking_count=count)
+        for (room_id, day, status), (minutes, count) in totals.items()
+    ], batch_size=batch_size)
+
+
+def rebuild_summaries(chunk_size=5000, batch_size=1000, rooms_per_chunk=50):
+    """
+    Replace the summary rows with freshly computed totals, a few rooms at a
+    time. Each chunk is recomputed, deleted and reinserted in one short
+    transaction holding those rooms' locks (see conflicts.with_room_locks),
+    so booking writes to the chunk's rooms wait for it and the rest proceed.
+    Returns the number of rows written.
+    """
+    room_ids = list(Room.objects.order_by('id').values_list('id', flat=True))
+    written = 0
+    for i in range(0, len(room_ids), rooms_per_chunk):
+        chunk = room_ids[i:i + rooms_per_chunk]
+        written += with_room_locks(chunk, lambda: _rebuild_rooms(chunk, chunk_size, batch_size))
+    return written
+
+
+def _rebuild_rooms(room_ids, chunk_size, batch_size):
+    totals = compute_summaries(chunk_size, Booking.objects.filter(room_id__in=room_ids))
+    DailyBookingSummary.objects.filter(room_id__in=room_ids).delete()
+    insert_summaries(totals, batch_size)
+    return len(totals)
+
+
+# ----------------- REPORTING -----------------
+def status_counts_by_room_type(first_day, last_day):
+    """
+    {(room_type_name, status): (booking_count, booked_minutes)} for bookings
+    starting between the two local dates (inclusive), from the summary table.
+    """
+    rows = (
+        DailyBookingSummary.objects
+        .filter(date__gte=first_day, date__lte=last_day)
+        .values('room__room_type__room_type_name', 'status')
+        .annotate(count=Sum('booking_count'), minutes=Sum('booked_minutes'))
+    )
+    return {
+        (row['room__room_type__room_type_name'], row['status']): (row['count'], row['minutes'])
+        for row in rows
+    }
@@ -1,3 +1,1014 @@
-from django.test import TestCase
+import io
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from datetime import datetime, time, timedelta
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import sync_to_async
+from django.contrib.sessions.models import Session
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.migrations.executor import MigrationExecutor
+from django.db.models import F, Sum
+from django.http import HttpResponse
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+
+from . import archive
+from .analytics import build_utilization, occupancy_matrix
+from .archive import archive_batch, search_archive
+from . import audit
+from . import caching
+from .caching import cache_stats, reset_cache_stats
+from .catalog import CATALOG_NAMESPACE, get_room_catalog
+from .forms import BookingSeriesForm
+from .freeslots import SLOTS_PER_DAY, search_free_rooms
+from . import inbox
+from .inbox import mark_read, recount_unread, unread_count
+from . import metrics
+from . import live
+from .live import notification_events
+from .management.commands import import_bookings
+from .management.commands.check_query_plans import PLAN_CHECKS
+from . import outbox
+from . import routing
+from .models import (
+    ActionLog, Booking, DailyBookingSummary, NamespaceVersion, Notification, NotificationOutbox, Role, Room, RoomAvailability,
+    RoomType, User,
+)
+from .outbox import CLAIM_LEASE, MAX_ATTEMPTS, claim_batch, drain_once, process_chunk, queue_notification
+from .pagination import encode_cursor, keyset_paginate
+from .queries import USER_BOOKING_FUTURE_DAYS
+from .series import MAX_OCCURRENCES
+from . import summaries
+
+WEEKDAYS = ['Monday', 'Tuesday', 'Wednesday', 'Thursday', 'Friday', 'Saturday', 'Sunday']
+
+# Scratch space for file-based caches and archives, removed after the run
+TEMP_DIR = None
+
+
+def setUpModule():
+    global TEMP_DIR
+    TEMP_DIR = tempfile.mkdtemp(prefix='booking-tests-')
+
+
+def tearDownModule():
+    shutil.rmtree(TEMP_DIR, ignore_errors=True)
+
+
+class BookingTestData:
+    """An admin, a regular user and two rooms open 08:00-20:00 every day."""
+
+    @classmethod
+    def setUpTestData(cls):
+        admin_role = Role.objects.create(role_name='Admin')
+        user_role = Role.objects.create(role_name='User')
+        cls.admin = User.objects.create(name='Admin', email='admin@example.com', password_hash='admin', role=admin_role)
+        cls.user = User.objects.create(name='Stu', email='stu@example.com', password_hash='stu', role=user_role)
+        cls.room_type = RoomType.objects.create(room_type_name='Study')
+        cls.room = Room.objects.create(room_number='R1', room_type=cls.room_type, capacity=4)
+        cls.other_room = Room.objects.create(room_number='R2', room_type=cls.room_type, capacity=8)
+        RoomAvailability.objects.bulk_create([
+            RoomAvailability(room=room, day_of_week=day, start_time=time(8), end_time=time(20))
+            for room in (cls.room, cls.other_room) for day in WEEKDAYS
+        ])
+        cls.day = timezone.localdate() + timedelta(days=7)
+
+    def at(self, hour, minute=0, days=0):
+        """Aware datetime on the test day (plus `days`)."""
+        return timezone.make_aware(datetime.combine(self.day + timedelta(days=days), time(hour, minute)))
+
+    def book(self, start, end, room=None, status='pending', user=None):
+        return Booking.objects.create(user=user or self.user, room=room or self.room,
+                                      start_time=start, end_time=end, status=status)
+
+    def login(self, user):
+        response = self.client.post(reverse('login'), {'email': user.email, 'password': user.password_hash})
+        self.assertEqual(response.status_code, 302)
+
+
+# ----------------- DAILY SUMMARIES -----------------
+class RoomDeleteTests(BookingTestData, TestCase):
+    def test_deleting_a_room_with_bookings(self):
+        self.book(self.at(9), self.at(10))
+        self.book(self.at(11), self.at(12), status='approved')
+        self.login(self.admin)
+
+        response = self.client.get(reverse('room_delete', args=[self.room.id]))
+
+        self.assertRedirects(response, reverse('room_list'), fetch_redirect_response=False)
+        self.assertFalse(Room.objects.filter(id=self.room.id).exists())
+        self.assertFalse(DailyBookingSummary.objects.filter(room_id=self.room.id).exists())
+
+    def test_deleting_a_room_type_with_booked_rooms(self):
+        self.book(self.at(9), self.at(10), room=self.other_room)
+        self.login(self.admin)
+
+        response = self.client.get(reverse('room_type_delete', args=[self.room_type.id]))
+
+        self.assertRedirects(response, reverse('room_type_list'), fetch_redirect_response=False)
+        self.assertFalse(Booking.objects.exists())
+        self.assertFalse(DailyBookingSummary.objects.exists())
+
+    def test_deleting_a_booking_still_updates_its_summary(self):
+        self.book(self.at(9), self.at(10))
+        booking = self.book(self.at(11), self.at(13))
+
+        booking.delete()
+
+        row = DailyBookingSummary.objects.get(room=self.room, date=self.day, status='pending')
+        self.assertEqual((row.booked_minutes, row.booking_count), (60, 1))
+
+
+class RebuildSummariesTests(BookingTestData, TestCase):
+    def test_rebuild_replaces_drifted_rows_one_chunk_of_rooms_at_a_time(self):
+        self.book(self.at(9), self.at(10))
+        self.book(self.at(9), self.at(11), room=self.other_room, status='approved')
+        DailyBookingSummary.objects.update(booked_minutes=1)
+
+        with mock.patch('booking_app.summaries.with_room_locks', wraps=summaries.with_room_locks) as locks:
+            out = io.StringIO()
+            call_command('rebuild_summaries', '--rooms-per-chunk', '1', stdout=out)
+
+        self.assertEqual([call.args[0] for call in locks.call_args_list], [[self.room.id], [self.other_room.id]])
+        self.assertEqual(
+            sorted(DailyBookingSummary.objects.values_list('room_id', 'status', 'booked_minutes', 'booking_count')),
+            [(self.room.id, 'pending', 60, 1), (self.other_room.id, 'approved', 120, 1)],
+        )
+        self.assertIn("Rebuilt 2 summary rows.", out.getvalue())
+
+
+# ----------------- UTILIZATION -----------------
+class UtilizationTests(BookingTestData, TestCase):
+    def setUp(self):
+        cache.clear()  # the week matrix snapshot of another test class
+
+    def test_matrix_covers_partial_slots_and_crosses_midnight(self):
+        rows = [
+            (self.room.id, self.at(9, 10), self.at(9, 20)),
+            (self.other_room.id, self.at(23), self.at(1, days=1)),
+        ]
+
+        occupied = occupancy_matrix(np.array([self.room.id, self.other_room.id]), rows, self.day, 2)
+
+        self.assertEqual(occupied.shape, (2, 2, SLOTS_PER_DAY))
+        self.assertEqual(list(np.flatnonzero(occupied[0, 0])), [36, 37])  # widened to 09:00-09:30
+        self.assertEqual(list(np.flatnonzero(occupied[1, 0])), [92, 93, 94, 95])
+        self.assertEqual(list(np.flatnonzero(occupied[1, 1])), [0, 1, 2, 3])
+        self.assertEqual(occupied.sum(), 10)
+
+    def test_only_used_bookings_inside_opening_hours_count(self):
+        self.book(self.at(9), self.at(12), status='approved')
+        self.book(self.at(6), self.at(9), room=self.other_room, status='completed')  # room opens at 8
+        self.book(self.at(14), self.at(16), room=self.other_room)  # pending
+
+        stats = build_utilization(self.day, self.day)
+
+        # 3 + 1 of 24 open hours
+        self.assertEqual(stats['utilization'], 16.7)
+        self.assertEqual(stats['peak_hours'], [{'hour': 8, 'utilization': 50.0}, {'hour': 9, 'utilization': 50.0},
+                                               {'hour': 10, 'utilization': 50.0}])
+        self.assertEqual(stats['idle_rooms'], [])
+        self.assertEqual(stats['room_types'], [{
+            'name': 'Study', 'utilization': 16.7, 'bookings': 3, 'approved_rate': 33.3, 'cancelled_rate': 0.0,
+        }])
+
+
+# ----------------- READ REPLICA -----------------
+@override_settings(READ_YOUR_WRITES_SECONDS=30)
+@mock.patch.object(routing, 'replica_configured', return_value=True)
+class ReplicaRoutingTests(TestCase):
+    router = routing.PrimaryReplicaRouter()
+
+    def aliases(self, request):
+        """(bookings read, sessions read, bookings written, used_replica) seen by a replica_reads view."""
+        seen = []
+
+        @routing.replica_reads
+        def view(request):
+            seen.append((self.router.db_for_read(Booking), self.router.db_for_read(Session),
+                         self.router.db_for_write(Booking), getattr(request, 'used_replica', False)))
+            return HttpResponse()
+
+        view(request)
+        return seen[0]
+
+    def test_marked_views_read_from_the_replica(self, configured):
+        self.assertEqual(self.aliases(RequestFactory().get('/')), ('replica', 'default', 'default', True))
+        self.assertEqual(self.router.db_for_read(Booking), 'default')
+
+    def test_writes_and_recent_writers_stay_on_the_primary(self, configured):
+        pinned = RequestFactory().get('/')
+        pinned.COOKIES[routing.PIN_COOKIE] = '1'
+
+        self.assertEqual(self.aliases(RequestFactory().post('/')), ('default', 'default', 'default', False))
+        self.assertEqual(self.aliases(pinned), ('default', 'default', 'default', False))
+
+    def test_unsafe_requests_pin_reads_to_the_primary(self, configured):
+        middleware = routing.ReadYourWritesMiddleware(lambda request: HttpResponse())
+
+        self.assertNotIn(routing.PIN_COOKIE, middleware(RequestFactory().get('/')).cookies)
+        cookie = middleware(RequestFactory().post('/')).cookies[routing.PIN_COOKIE]
+        self.assertEqual(cookie['max-age'], 30)
+
+        configured.return_value = False
+        self.assertNotIn(routing.PIN_COOKIE, middleware(RequestFactory().post('/')).cookies)
+
+
+# ----------------- CONDITIONAL GET -----------------
+def shared_cache():
+    """A file-based cache like BOOKING_CACHE_DIR's, under the module's temporary directory."""
+    return {'default': {'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                        'LOCATION': os.path.join(TEMP_DIR, 'cache')}}
+
+
+class ConditionalGetTests(BookingTestData, TestCase):
+    def setUp(self):
+        self.login(self.user)
+        self.client.get(reverse('notifications'))  # shows (and consumes) the login message
+
+    def test_local_cache_revalidates_until_another_process_changes_a_room(self):
+        response = self.client.get(reverse('home'))
+        etag = response.headers['ETag']
+        self.assertIn('Last-Modified', response.headers)
+        self.assertEqual(self.client.get(reverse('home'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+
+        # The version lives in the database, where every process sees the bump
+        NamespaceVersion.objects.filter(namespace=CATALOG_NAMESPACE).update(version=F('version') + 1)
+
+        self.assertEqual(self.client.get(reverse('home'), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_local_cache_etag_changes_with_bookings(self):
+        etag = self.client.get(reverse('booking_list')).headers['ETag']
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.book(self.at(9), self.at(10))
+
+        self.assertEqual(self.client.get(reverse('booking_list'), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+    def test_pages_versioned_from_the_database_keep_their_etag(self):
+        response = self.client.get(reverse('notifications'))
+
+        self.assertIn('ETag', response.headers)
+        repeat = self.client.get(reverse('notifications'), HTTP_IF_NONE_MATCH=response.headers['ETag'])
+        self.assertEqual(repeat.status_code, 304)
+
+    def test_shared_cache_revalidates_until_a_booking_changes(self):
+        with self.settings(CACHES=shared_cache()):
+            cache.clear()
+            response = self.client.get(reverse('booking_list'))
+            etag = response.headers['ETag']
+
+            self.assertEqual(self.client.get(reverse('booking_list'), HTTP_IF_NONE_MATCH=etag).status_code, 304)
+            with self.captureOnCommitCallbacks(execute=True):
+                self.book(self.at(9), self.at(10))
+            self.assertEqual(self.client.get(reverse('booking_list'), HTTP_IF_NONE_MATCH=etag).status_code, 200)
+
+
+# ----------------- UNREAD COUNTS -----------------
+class UnreadCountTests(BookingTestData, TestCase):
+    def deliver(self, message):
+        queue_notification(self.user.id, message)
+        self.assertEqual(drain_once(), (1, 0))
+
+    def test_counter_follows_delivery_and_reads(self):
+        self.assertEqual(unread_count(self.user.id), 0)
+
+        self.deliver('First')
+        self.deliver('Second')
+        self.assertEqual(unread_count(self.user.id), 2)
+
+        mark_read(self.user.id, ids=[Notification.objects.earliest('id').id])
+        self.assertEqual(unread_count(self.user.id), 1)
+        mark_read(self.user.id)
+        self.assertEqual(unread_count(self.user.id), 0)
+
+    def test_recount_repairs_changes_made_outside_the_application(self):
+        Notification.objects.create(user=self.user, notification_message='Hi', notification_status='unread')
+        self.assertEqual(unread_count(self.user.id), 0)
+
+        call_command('recount_unread', stdout=io.StringIO())
+
+        self.assertEqual(unread_count(self.user.id), 1)
+        self.assertEqual(unread_count(self.admin.id), 0)
+
+    def test_notifications_page_reads_the_count_once(self):
+        self.deliver('Hi')
+        self.login(self.user)
+        self.client.get(reverse('notifications'))  # consumes the login message
+
+        with mock.patch('booking_app.inbox.unread_count', wraps=inbox.unread_count) as count:
+            response = self.client.get(reverse('notifications'))
+
+        self.assertContains(response, 'Hi')
+        self.assertEqual(count.call_count, 1)
+
+
+# ----------------- AUDIT LOG -----------------
+class AuditBufferTests(BookingTestData, TestCase):
+    def middleware(self, view):
+        return audit.AuditLogMiddleware(view)(RequestFactory().get('/'))
+
+    def test_request_entries_are_written_together_at_the_end(self):
+        def view(request):
+            audit.record(self.user.id, "First")
+            audit.record(self.user.id, "Second")
+            self.assertFalse(ActionLog.objects.exists())
+            return HttpResponse()
+
+        with CaptureQueriesContext(connection) as queries:
+            self.middleware(view)
+
+        self.assertEqual(len([q for q in queries if q['sql'].startswith('INSERT')]), 1)
+        self.assertEqual(list(ActionLog.objects.order_by('id').values_list('action', flat=True)), ["First", "Second"])
+
+    def test_entries_are_written_when_the_view_raises(self):
+        def view(request):
+            audit.record(self.user.id, "Before the error")
+            raise RuntimeError("boom")
+
+        with self.assertRaises(RuntimeError):
+            self.middleware(view)
+
+        self.assertEqual(ActionLog.objects.get().action, "Before the error")
+
+    def test_entries_outside_a_request_wait_for_the_background_flush(self):
+        writer = audit.BackgroundAuditWriter(interval=3600)
+        with mock.patch.object(audit, 'background_writer', writer):
+            audit.record(self.user.id, "From a command")
+            self.assertFalse(ActionLog.objects.exists())
+
+            self.assertEqual(writer.flush(), 1)
+
+        self.assertEqual(ActionLog.objects.get().action, "From a command")
+
+
+# ----------------- ROOM CATALOG -----------------
+class RoomCatalogTests(BookingTestData, TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_home_page_reads_the_catalog_from_the_cache(self):
+        self.login(self.admin)
+        self.client.get(reverse('notifications'))  # consume the login message
+        self.client.get(reverse('home'))
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('home'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([item['room']['room_number'] for item in response.context['rooms_with_availability']],
+                         ['R1', 'R2'])
+        catalog_tables = ('"Room"', '"RoomType"', '"RoomAvailability"')
+        self.assertEqual([q['sql'] for q in queries if any(t in q['sql'] for t in catalog_tables)], [])
+
+    def test_availability_change_rebuilds_the_snapshot(self):
+        get_room_catalog()
+        with self.assertNumQueries(1):  # the namespace version, no catalog rows
+            get_room_catalog()
+
+        availability = RoomAvailability.objects.filter(room=self.room, day_of_week='Monday').get()
+        availability.end_time = time(12)
+        with self.captureOnCommitCallbacks(execute=True):
+            availability.save()
+
+        monday = [a for a in get_room_catalog()[0]['availability'] if a['day_of_week'] == 'Monday']
+        self.assertEqual(monday[0]['end_time'], time(12))
+
+
+# ----------------- CACHE STATS -----------------
+@override_settings(METRICS_FLUSH_SECONDS=3600)
+class CacheStatsTests(BookingTestData, TestCase):
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(caching, '_process_counts', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_reads_are_counted_in_memory_until_flushed(self):
+        get_room_catalog()
+        get_room_catalog()
+
+        self.assertIsNone(cache.get(caching._counts().key))
+        self.assertEqual(cache_stats()[CATALOG_NAMESPACE], {'hits': 1, 'misses': 1, 'hit_rate': 0.5})
+
+    def test_reset_drops_every_process_count(self):
+        get_room_catalog()
+        caching.flush_cache_stats()
+        # Another server process, with counts from before the reset
+        caching._process_counts = caching.ProcessCounts()
+        get_room_catalog()
+        caching.flush_cache_stats()
+
+        reset_cache_stats()
+        self.assertEqual(cache_stats(), {})
+        get_room_catalog()
+        self.assertEqual(cache_stats()[CATALOG_NAMESPACE]['hits'], 1)
+
+
+# ----------------- ARCHIVING -----------------
+class ArchiveTests(BookingTestData, TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.enterClassContext(override_settings(ARCHIVE_DIR=os.path.join(TEMP_DIR, 'archive')))
+
+    def test_archiving_unread_notifications_updates_the_unread_count(self):
+        for status in ('unread', 'unread', 'read'):
+            Notification.objects.create(user=self.user, notification_message='Old', notification_status=status)
+        kept = Notification.objects.create(user=self.user, notification_message='New', notification_status='unread')
+        recount_unread()
+        self.assertEqual(unread_count(self.user.id), 3)
+
+        last, archived = archive_batch('notifications', timezone.now(), batch_size=3)
+
+        self.assertEqual(archived, 3)
+        self.assertEqual(unread_count(self.user.id), 1)
+        self.assertEqual(list(Notification.objects.all()), [kept])
+        self.assertEqual([row['id'] for row in search_archive('notifications', user_id=self.user.id)],
+                         list(range(last - 2, last + 1)))
+
+    def test_run_stops_at_the_last_id_it_started_with(self):
+        old = Notification.objects.create(user=self.user, notification_message='Old')
+        max_id = archive.last_id('notifications')
+        Notification.objects.create(user=self.user, notification_message='Added during the run')
+
+        self.assertEqual(archive_batch('notifications', timezone.now(), max_id=max_id), (old.id, 1))
+        self.assertEqual(archive_batch('notifications', timezone.now(), old.id, max_id=max_id), (None, 0))
+        self.assertEqual(Notification.objects.count(), 1)
+
+
+# ----------------- RECURRING BOOKINGS -----------------
+class BookingSeriesFormTests(BookingTestData, TestCase):
+    def form(self, days):
+        return BookingSeriesForm(data={
+            'room': self.room.id,
+            'start_time': self.at(9).strftime('%Y-%m-%dT%H:%M'),
+            'end_time': self.at(10).strftime('%Y-%m-%dT%H:%M'),
+            'interval_days': 1,
+            'until': self.day + timedelta(days=days),
+        })
+
+    def test_series_at_the_limit_is_accepted(self):
+        form = self.form(MAX_OCCURRENCES - 1)
+
+        self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(len(form.occurrences), MAX_OCCURRENCES)
+
+    def test_series_over_the_limit_is_rejected_not_truncated(self):
+        form = self.form(MAX_OCCURRENCES)
+
+        self.assertFalse(form.is_valid())
+        self.assertIn(f"this one would have {MAX_OCCURRENCES + 1}", form.non_field_errors()[0])
+
+
+# ----------------- PAGINATION -----------------
+class KeysetPaginationTests(BookingTestData, TestCase):
+    def setUp(self):
+        self.bookings = [self.book(self.at(9 + i), self.at(10 + i)) for i in range(3)]
+
+    def page(self, cursor):
+        return keyset_paginate(Booking.objects.all(), 'start_time', cursor, page_size=2)
+
+    def test_next_cursor_continues_after_the_last_row(self):
+        first = self.page(None)
+        second = self.page(first.next_cursor)
+
+        self.assertEqual(first.items + second.items, self.bookings)
+        self.assertFalse(second.is_first)
+
+    def test_tampered_cursor_restarts_at_the_first_page(self):
+        for value in ['garbage', None, [1], {'a': 1}, 12]:
+            with self.subTest(value=value):
+                page = self.page(encode_cursor(value, self.bookings[0].id))
+                self.assertTrue(page.is_first)
+                self.assertEqual(page.items, self.bookings[:2])
+
+    def test_tampered_cursor_in_the_booking_list(self):
+        self.login(self.user)
+
+        response = self.client.get(reverse('booking_list'), {'cursor': encode_cursor('garbage', 1)})
+
+        self.assertEqual(response.status_code, 200)
+
+
+# ----------------- EXPORTS -----------------
+class ExportTests(BookingTestData, TestCase):
+    def setUp(self):
+        self.login(self.admin)
+
+    def export(self, name, **params):
+        response = self.client.get(reverse(name), params)
+        content = b''.join(response.streaming_content).decode() if response.streaming else response.content.decode()
+        return response, content
+
+    def test_booking_export_applies_filters(self):
+        self.book(self.at(9), self.at(10))
+        self.book(self.at(9), self.at(10), room=self.other_room)
+
+        response, content = self.export('booking_export', room=self.other_room.id)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(content.count('R2'), 1)
+        self.assertNotIn('R1', content)
+
+    def test_booking_export_rejects_invalid_filters(self):
+        self.book(self.at(9), self.at(10))
+
+        response, content = self.export('booking_export', date_from='not-a-date')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('date_from', response.json()['errors'])
+
+    def test_audit_log_export_rejects_invalid_filters(self):
+        ActionLog.objects.create(user=self.user, action='Created booking #1')
+
+        response, content = self.export('audit_log_export', since='not-a-date')
+
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('since', response.json()['errors'])
+
+        response, content = self.export('audit_log_export', format='csv')
+        self.assertIn('Created booking #1', content)
+
+
+# ----------------- CONFLICT CHECKS -----------------
+class LongBookingTests(BookingTestData, TestCase):
+    def test_new_bookings_are_limited_to_24_hours(self):
+        booking = Booking(user=self.user, room=self.room, start_time=self.at(8), end_time=self.at(9, days=1))
+        with self.assertRaisesMessage(ValidationError, "Bookings cannot be longer than 24 hours."):
+            booking.full_clean()
+
+    def test_database_rejects_bookings_the_overlap_queries_would_miss(self):
+        self.book(self.at(8), self.at(8, days=1))
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.book(self.at(8, days=2), self.at(9, days=3))
+
+
+class SplitLongBookingsMigrationTests(TransactionTestCase):
+    before = [('booking_app', '0015_namespace_version')]
+
+    def tearDown(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(executor.loader.graph.leaf_nodes())
+
+    def test_older_long_bookings_are_split_into_days(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate(self.before)
+        apps = executor.loader.project_state(self.before).apps
+        role = apps.get_model('booking_app', 'Role').objects.create(role_name='User')
+        user = apps.get_model('booking_app', 'User').objects.create(
+            name='Stu', email='stu@example.com', password_hash='stu', role=role,
+        )
+        room_type = apps.get_model('booking_app', 'RoomType').objects.create(room_type_name='Study')
+        room = apps.get_model('booking_app', 'Room').objects.create(room_number='R1', room_type=room_type, capacity=4)
+        start = timezone.make_aware(datetime(2026, 1, 5, 8))
+        apps.get_model('booking_app', 'Booking').objects.create(
+            user=user, room=room, start_time=start, end_time=start + timedelta(hours=50), status='approved',
+        )
+
+        executor = MigrationExecutor(connection)
+        executor.migrate([('booking_app', '0016_split_long_bookings')])
+
+        self.assertEqual(
+            list(Booking.objects.order_by('start_time').values_list('start_time', 'end_time', 'status')),
+            [(start, start + timedelta(days=1), 'approved'),
+             (start + timedelta(days=1), start + timedelta(days=2), 'approved'),
+             (start + timedelta(days=2), start + timedelta(hours=50), 'approved')],
+        )
+
+
+# ----------------- ROOM LOCKS -----------------
+class LockedWriteTests(BookingTestData, TestCase):
+    def test_import_skips_rows_booked_after_validation(self):
+        csv_file = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False)
+        with csv_file:
+            csv_file.write("room,user,start_time,end_time\n")
+            csv_file.write(f"R1,{self.user.email},{self.at(9):%Y-%m-%d %H:%M},{self.at(10):%Y-%m-%d %H:%M}\n")
+            csv_file.write(f"R2,{self.user.email},{self.at(9):%Y-%m-%d %H:%M},{self.at(10):%Y-%m-%d %H:%M}\n")
+        self.addCleanup(os.remove, csv_file.name)
+
+        # Simulate another request taking R1's slot between validation and insert
+        validate = import_bookings.Command._validate
+
+        def validate_then_book(command, parsed, problems):
+            valid = validate(command, parsed, problems)
+            self.book(self.at(9, 30), self.at(10, 30))
+            return valid
+
+        with mock.patch.object(import_bookings.Command, '_validate', validate_then_book):
+            call_command('import_bookings', csv_file.name, '--no-notify', stdout=io.StringIO())
+
+        self.assertEqual(Booking.objects.filter(room=self.room).count(), 1)
+        self.assertEqual(Booking.objects.filter(room=self.other_room).count(), 1)
+
+
+    def test_import_matches_emails_in_any_case_and_notifies_once(self):
+        mixed = User.objects.create(name='Mia', email='Mia@Example.com', password_hash='mia', role=self.user.role)
+        csv_file = tempfile.NamedTemporaryFile('w', suffix='.csv', delete=False)
+        with csv_file:
+            csv_file.write("room,user,start_time,end_time\n")
+            csv_file.write(f"R1,mia@example.COM,{self.at(9):%Y-%m-%d %H:%M},{self.at(10):%Y-%m-%d %H:%M}\n")
+            csv_file.write(f"R2,MIA@example.com,{self.at(9):%Y-%m-%d %H:%M},{self.at(10):%Y-%m-%d %H:%M}\n")
+            csv_file.write(f"R2,{self.user.email},{self.at(11):%Y-%m-%d %H:%M},{self.at(12):%Y-%m-%d %H:%M}\n")
+        self.addCleanup(os.remove, csv_file.name)
+
+        call_command('import_bookings', csv_file.name, '--chunk-size', '10', stdout=io.StringIO())
+        self.assertEqual(Booking.objects.filter(user=mixed).count(), 2)
+        self.assertEqual(NotificationOutbox.objects.count(), 2)
+        drain_once()
+
+        self.assertEqual(
+            sorted(Notification.objects.values_list('user_id', 'notification_message')),
+            sorted([(self.admin.id, "Booking import created 3 booking(s) for 2 user(s)."),
+                    (self.user.id, "1 booking(s) were imported for you."),
+                    (mixed.id, "2 booking(s) were imported for you.")]),
+        )
+
+# ----------------- STATUS CHANGES -----------------
+class StatusChangeTests(BookingTestData, TestCase):
+    def setUp(self):
+        self.login(self.admin)
+
+    def test_single_change_follows_the_transitions(self):
+        booking = self.book(self.at(9), self.at(10))
+
+        self.client.post(reverse('update_booking_status', args=[booking.id]), {'status': 'approved'})
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, 'approved')
+
+        self.client.post(reverse('update_booking_status', args=[booking.id]), {'status': 'pending'})
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, 'approved')
+
+    def test_cancelled_booking_is_not_reactivated_over_another(self):
+        cancelled = self.book(self.at(9), self.at(10), status='cancelled')
+        self.book(self.at(9), self.at(10))
+
+        self.client.post(reverse('update_booking_status', args=[cancelled.id]), {'status': 'pending'})
+
+        cancelled.refresh_from_db()
+        self.assertEqual(cancelled.status, 'cancelled')
+
+    def test_bulk_change_reports_invalid_transitions(self):
+        pending = self.book(self.at(9), self.at(10))
+        cancelled = self.book(self.at(11), self.at(12), status='cancelled')
+
+        response = self.client.post(reverse('bulk_booking_status') + '?format=json',
+                                    {'status': 'approved', 'booking_ids': [pending.id, cancelled.id]})
+
+        self.assertEqual(response.json(), {
+            'updated': [pending.id],
+            'failed': {str(cancelled.id): "cannot change from cancelled to approved"},
+        })
+
+    def test_bulk_change_rejects_an_unknown_status(self):
+        booking = self.book(self.at(9), self.at(10))
+
+        response = self.client.post(reverse('bulk_booking_status') + '?format=json',
+                                    {'status': 'archived', 'booking_ids': [booking.id]})
+
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error': "Unknown status 'archived'."})
+        booking.refresh_from_db()
+        self.assertEqual(booking.status, 'pending')
+
+
+class CompletePastBookingsTests(BookingTestData, TestCase):
+    def setUp(self):
+        self.ended = [
+            self.book(self.at(9, days=-10), self.at(10, days=-10), status='approved'),
+            self.book(self.at(11, days=-10), self.at(12, days=-10), status='approved'),
+            self.book(self.at(9, days=-9), self.at(10, days=-9), status='approved', user=self.admin),
+        ]
+        self.upcoming = self.book(self.at(9), self.at(10), status='approved')
+
+    def sweep(self, *args):
+        call_command('complete_past_bookings', *args, stdout=io.StringIO())
+
+    def statuses(self):
+        return dict(Booking.objects.values_list('id', 'status'))
+
+    def summary_counts(self):
+        return dict(DailyBookingSummary.objects.filter(booking_count__gt=0).values_list('status').annotate(
+            total=Sum('booking_count')))
+
+    def test_second_run_changes_nothing(self):
+        self.sweep('--chunk-size', '2')
+
+        self.assertEqual([b.id for b in Booking.objects.filter(status='completed').order_by('id')],
+                         [b.id for b in self.ended])
+        self.assertEqual(self.summary_counts(), {'completed': 3, 'approved': 1})
+        # One row per owner across both chunks, plus the admins' summary
+        self.assertEqual(
+            list(NotificationOutbox.objects.order_by('id').values_list('user_id', 'user_message', 'admin_message')),
+            [(self.admin.id, "1 of your past bookings was marked completed.", ''),
+             (self.user.id, "2 of your past bookings were marked completed.", ''),
+             (self.admin.id, '', "3 past booking(s) were marked completed automatically.")],
+        )
+        statuses, summaries, queued = self.statuses(), self.summary_counts(), NotificationOutbox.objects.count()
+
+        self.sweep('--chunk-size', '2')
+
+        self.assertEqual(self.statuses(), statuses)
+        self.assertEqual(self.summary_counts(), summaries)
+        self.assertEqual(NotificationOutbox.objects.count(), queued)
+
+    def test_limited_run_is_resumed_by_the_next(self):
+        self.sweep('--chunk-size', '1', '--limit', '1')
+
+        self.assertEqual(Booking.objects.filter(status='completed').get(), self.ended[0])
+        self.assertEqual(self.summary_counts(), {'completed': 1, 'approved': 3})
+        self.assertEqual(NotificationOutbox.objects.filter(admin_message='').get().user_message,
+                         "1 of your past bookings was marked completed.")
+
+        self.sweep('--chunk-size', '1')
+
+        self.assertEqual(self.statuses(), {**{b.id: 'completed' for b in self.ended}, self.upcoming.id: 'approved'})
+        self.assertEqual(self.summary_counts(), {'completed': 3, 'approved': 1})
+        self.assertEqual(
+            list(NotificationOutbox.objects.exclude(admin_message='').values_list('admin_message', flat=True)),
+            ["1 past booking(s) were marked completed automatically.",
+             "2 past booking(s) were marked completed automatically."],
+        )
+
+    def test_interrupted_run_still_notifies_for_committed_chunks(self):
+        with mock.patch('time.sleep', side_effect=KeyboardInterrupt):
+            self.sweep('--chunk-size', '1', '--sleep', '1')
+
+        self.assertEqual(Booking.objects.filter(status='completed').count(), 1)
+        self.assertEqual(NotificationOutbox.objects.count(), 2)
+
+
+# ----------------- FREE ROOM SEARCH -----------------
+class FreeRoomSearchTests(BookingTestData, TestCase):
+    def setUp(self):
+        cache.clear()  # the room catalog snapshot of another test class
+
+    def free_rooms(self, start, end, days=1):
+        rooms, free, _ = search_free_rooms(self.day, days, start, end)
+        return {room['room_number']: list(row) for room, row in zip(rooms, free)}
+
+    def test_bookings_are_compared_at_exact_times(self):
+        self.book(self.at(13), self.at(14, 10))
+        self.book(self.at(15, 50), self.at(16, 5), room=self.other_room)
+
+        self.assertEqual(self.free_rooms(time(14, 10), time(15, 50)), {'R1': [True], 'R2': [True]})
+        self.assertEqual(self.free_rooms(time(14, 5), time(15, 55)), {})
+
+    def test_availability_is_compared_at_exact_times(self):
+        self.assertEqual(self.free_rooms(time(19, 50), time(20)), {'R1': [True], 'R2': [True]})
+        self.assertEqual(self.free_rooms(time(7, 55), time(9)), {})
+
+    def test_each_day_is_checked_separately(self):
+        self.book(self.at(10, days=1), self.at(11, days=1), status='approved')
+        self.book(self.at(10), self.at(11), room=self.other_room, status='cancelled')
+
+        self.assertEqual(self.free_rooms(time(10), time(11), days=2), {'R1': [True, False], 'R2': [True, True]})
+
+
+# ----------------- LIVE NOTIFICATIONS -----------------
+@override_settings(LIVE_NOTIFICATIONS_POLL_SECONDS=0)
+class NotificationStreamTests(BookingTestData, TestCase):
+    async def deliver(self, message):
+        await sync_to_async(queue_notification)(self.user.id, message)
+        await sync_to_async(drain_once)()
+        return await Notification.objects.alatest('id')
+
+    async def test_stream_picks_up_notifications_written_elsewhere(self):
+        first = await self.deliver('One')
+        events = notification_events(self.user.id, last_id=0)
+
+        self.assertTrue((await anext(events)).startswith('retry:'))
+        self.assertIn(f'id: {first.id}\n', await anext(events))
+        self.assertIn('data: 1', await anext(events))
+        self.assertEqual(await anext(events), ": keep-alive\n\n")
+
+        # Delivered by another process: only the database knows about it
+        second = await self.deliver('Two')
+        self.assertIn(f'id: {second.id}\n', await anext(events))
+        await events.aclose()
+
+    async def test_connection_is_closed_after_each_poll(self):
+        events = notification_events(self.user.id, last_id=0)
+        with mock.patch.object(live, '_close_connection') as close:
+            await anext(events)  # retry
+            self.assertEqual(await anext(events), ": keep-alive\n\n")
+            self.assertEqual(await anext(events), ": keep-alive\n\n")
+            await events.aclose()
+        self.assertEqual(close.call_count, 2)
+
+    async def login_async(self):
+        response = await self.async_client.post(
+            reverse('login'), {'email': self.user.email, 'password': self.user.password_hash},
+        )
+        self.assertEqual(response.status_code, 302)
+
+    async def test_view_requires_login_and_asgi(self):
+        response = await self.async_client.get(reverse('notifications_stream'))
+        self.assertEqual(response.status_code, 401)
+
+        await self.login_async()
+        with self.settings(ASYNC_VIEWS=False):
+            response = await self.async_client.get(reverse('notifications_stream'))
+        self.assertEqual(response.status_code, 204)
+
+    @override_settings(ASYNC_VIEWS=True)
+    async def test_view_resumes_after_last_event_id(self):
+        seen = await Notification.objects.acreate(user=self.user, notification_message='Seen')
+        new = await Notification.objects.acreate(user=self.user, notification_message='New')
+        await self.login_async()
+
+        response = await self.async_client.get(reverse('notifications_stream'), headers={'Last-Event-ID': str(seen.id)})
+
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+        events = response.streaming_content
+        await anext(events)  # retry
+        event = (await anext(events)).decode()
+        self.assertIn(f'id: {new.id}\n', event)
+        self.assertIn('"message": "New"', event)
+        await events.aclose()
+
+
+# ----------------- NOTIFICATION OUTBOX -----------------
+class OutboxTests(BookingTestData, TestCase):
+    def queue(self, *messages):
+        return [queue_notification(self.user.id, message, admin_message=f"Admin: {message}") for message in messages]
+
+    def failing_on(self, bad_message):
+        """Patch delivery to raise for the entry carrying bad_message."""
+        real = outbox._notifications_for
+
+        def notifications_for(entry, admin_ids):
+            if entry.user_message == bad_message:
+                raise ValueError("cannot deliver")
+            return real(entry, admin_ids)
+        return mock.patch.object(outbox, '_notifications_for', notifications_for)
+
+    def test_claimed_rows_are_not_claimed_again_until_the_lease_expires(self):
+        self.queue('One', 'Two')
+
+        claimed = claim_batch(10)
+        self.assertEqual([e.status for e in claimed], ['processing', 'processing'])
+        self.assertEqual(claim_batch(10), [])
+
+        NotificationOutbox.objects.filter(id=claimed[0].id).update(
+            claimed_at=timezone.now() - CLAIM_LEASE - timedelta(seconds=1),
+        )
+        reclaimed = claim_batch(10)
+        self.assertEqual([(e.id, e.attempts) for e in reclaimed], [(claimed[0].id, 2)])
+        self.assertNotEqual(reclaimed[0].claimed_by, claimed[0].claimed_by)
+
+    def test_delivery_fans_out_to_the_user_and_admins(self):
+        self.queue('One')
+
+        self.assertEqual(drain_once(), (1, 0))
+
+        self.assertFalse(NotificationOutbox.objects.exists())
+        self.assertEqual(
+            sorted(Notification.objects.values_list('user_id', 'notification_message')),
+            sorted([(self.user.id, 'One'), (self.admin.id, 'Admin: One')]),
+        )
+
+    def test_a_bad_entry_falls_back_to_one_at_a_time(self):
+        _, bad, _ = self.queue('One', 'Bad', 'Three')
+
+        with self.failing_on('Bad'):
+            self.assertEqual(process_chunk(claim_batch(10), [self.admin.id]), (2, 1))
+
+        self.assertEqual(list(NotificationOutbox.objects.values_list('id', flat=True)), [bad.id])
+        bad.refresh_from_db()
+        self.assertEqual((bad.status, bad.claimed_by, bad.last_error), ('pending', '', "cannot deliver"))
+        self.assertGreater(bad.available_at, timezone.now())
+        self.assertEqual(Notification.objects.filter(user=self.user).count(), 2)
+
+    def test_entry_is_parked_after_max_attempts(self):
+        entry, = self.queue('Bad')
+        NotificationOutbox.objects.filter(id=entry.id).update(attempts=MAX_ATTEMPTS - 1)
+
+        with self.failing_on('Bad'):
+            self.assertEqual(drain_once(), (0, 1))
+
+        entry.refresh_from_db()
+        self.assertEqual((entry.status, entry.attempts), ('failed', MAX_ATTEMPTS))
+        self.assertEqual(claim_batch(10), [])
+
+
+# ----------------- BOOKING LIST -----------------
+class UserBookingListTests(BookingTestData, TestCase):
+    def test_buckets_current_and_upcoming_bookings(self):
+        today = timezone.localdate()
+        self.day = today
+        past = self.book(self.at(9, days=-1), self.at(10, days=-1))
+        overnight = self.book(self.at(22, days=-1), self.at(1))
+        current = self.book(self.at(0), self.at(1), room=self.other_room)
+        future = self.book(self.at(9, days=USER_BOOKING_FUTURE_DAYS), self.at(10, days=USER_BOOKING_FUTURE_DAYS))
+        self.book(self.at(0, days=USER_BOOKING_FUTURE_DAYS + 1), self.at(1, days=USER_BOOKING_FUTURE_DAYS + 1))
+        self.login(self.user)
+
+        with self.assertNumQueries(4):  # session, current bookings, past page, unread badge
+            response = self.client.get(reverse('booking_list'))
+
+        self.assertEqual(response.context['past_page'].items, [past])
+        self.assertEqual(response.context['today_bookings'], [overnight, current])
+        self.assertEqual(response.context['future_bookings'], [future])
+
+    def test_past_bookings_are_paged_newest_first_without_a_cutoff(self):
+        self.day = timezone.localdate()
+        old = [self.book(self.at(9, days=-days), self.at(10, days=-days)) for days in (1, 400, 2000)]
+        self.login(self.user)
+
+        with mock.patch('booking_app.views.BOOKING_PAGE_SIZE', 2):
+            first = self.client.get(reverse('booking_list')).context['past_page']
+            second = self.client.get(reverse('booking_list'), {'cursor': first.next_cursor}).context['past_page']
+
+        self.assertEqual(first.items, old[:2])
+        self.assertEqual(second.items, old[2:])
+        self.assertFalse(second.has_next)
+
+
+class QueryPlanTests(BookingTestData, TestCase):
+    """The hot queries use their intended indexes (EXPLAIN on the test database)."""
+
+    def test_queries_use_their_indexes(self):
+        for label, index_name, build in PLAN_CHECKS:
+            with self.subTest(label):
+                self.assertIn(index_name, build().explain())
+
+
+# ----------------- VIEW BENCHMARKS -----------------
+BENCH_BASELINE = Path(__file__).with_name('bench_views_test_baseline.json')
+
+
+class BenchViewsTests(TestCase):
+    """
+    Every page's query count on a small seed_scale data set, compared with
+    BENCH_BASELINE. After an intended change, rewrite the baseline with
+    BENCH_VIEWS_SAVE=1 python manage.py test booking_app.tests.BenchViewsTests
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        call_command('seed_scale', rooms=20, room_types=3, users=30, bookings=2000, notifications=2000,
+                     action_logs=2000, stdout=io.StringIO())
+
+    def setUp(self):
+        cache.clear()
+
+    def test_pages_run_no_more_queries_than_the_baseline(self):
+        options = {'iterations': 2, 'warmup': 1, 'baseline': str(BENCH_BASELINE), 'stdout': io.StringIO()}
+        if os.environ.get('BENCH_VIEWS_SAVE'):
+            call_command('bench_views', save=True, **options)
+            return
+
+        call_command('bench_views', queries_only=True, **options)
+        self.assertNotIn("Not measured", options['stdout'].getvalue())
+
+
+# ----------------- REQUEST METRICS -----------------
+class MetricsTests(TestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.enterClassContext(override_settings(CACHES=shared_cache(), METRICS_FLUSH_SECONDS=3600))
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch.object(metrics, '_process', None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def record(self, view, seconds=0.02, queries=3):
+        stats = metrics.RequestStats()
+        stats.queries, stats.db_seconds = queries, seconds / 2
+        metrics.record_request(view, seconds, stats, repeated={})
+
+    def test_requests_are_counted_in_memory_until_flushed(self):
+        self.record('home')
+
+        self.assertIsNone(cache.get(metrics._totals().key))
+        self.assertIn('booking_http_requests_total{view="home"} 1', metrics.render_metrics())
+        self.assertEqual(cache.get(metrics._totals().key), {'home': mock.ANY})
+
+    def test_totals_add_up_across_processes(self):
+        self.record('home')
+        metrics.flush()
+        # Another server process, flushing its own snapshot
+        metrics._process = metrics.ProcessTotals()
+        self.record('home', queries=5)
+        self.record('booking_list')
+
+        text = metrics.render_metrics()
+
+        self.assertIn('booking_http_requests_total{view="home"} 2', text)
+        self.assertIn('booking_db_queries_total{view="home"} 8', text)
+        self.assertIn('booking_http_request_duration_seconds_bucket{view="home",le="0.025"} 2', text)
+        self.assertIn('booking_http_requests_total{view="booking_list"} 1', text)
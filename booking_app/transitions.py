@@ -0,0 +1,148 @@
+from collections import Counter
+
+from django.db import transaction
+
+from . import audit
+from .analytics import STATS_NAMESPACE
+from .caching import bump_version_on_commit
+from .models import Booking, NotificationOutbox, Room, User
+from .outbox import booking_messages
+from .summaries import booking_state, record_status_changes
+
+# Status changes an admin may make, one booking at a time or in bulk.
+# Cancelled and completed bookings are final.
+TRANSITIONS = {
+    'pending': ('approved', 'cancelled'),
+    'approved': ('completed', 'cancelled'),
+}
+
+# Booking ids listed in the admins' summary notification before "and N more"
+SUMMARY_IDS = 20
+
+
+def transition_error(current, new_status):
+    """Why a booking in status `current` can't move to new_status, or None."""
+    if current == new_status:
+        return f"already {current}"
+    if new_status not in TRANSITIONS.get(current, ()):
+        return f"cannot change from {current} to {new_status}"
+    return None
+
+
+def summarize_ids(ids):
+    listed = ", ".join(f"#{i}" for i in ids[:SUMMARY_IDS])
+    if len(ids) > SUMMARY_IDS:
+        listed += f" and {len(ids) - SUMMARY_IDS} more"
+    return listed
+
+
+def queue_transition_notifications(bookings, new_status, admin_message, sender_id):
+    """
+    One outbox row per booking for its owner, plus a single row carrying
+    `admin_message` for the admins instead of one per booking. sender_id is
+    the user the admin-only row is filed under.
+    """
+    rooms = Room.objects.in_bulk({b.room_id for b in bookings})
+    users = User.objects.in_bulk({b.user_id for b in bookings})
+    entries = []
+    for booking in bookings:
+        booking.room, booking.user = rooms[booking.room_id], users[booking.user_id]
+        user_msg, _ = booking_messages(f"updated to {new_status}", booking)
+        entries.append(NotificationOutbox(user_id=booking.user_id, booking=booking, user_message=user_msg))
+    entries.append(NotificationOutbox(user_id=sender_id, user_message='', admin_message=admin_message))
+    NotificationOutbox.objects.bulk_create(entries, batch_size=500)
+
+
+def bulk_transition(booking_ids, new_status, actor_id, actor_name):
+    """
+    Move the given bookings to new_status with one UPDATE, following
+    TRANSITIONS. The rows are locked while they are checked so a concurrent
+    change can't slip in between. UPDATE skips the Booking signals, so the
+    summaries, stats cache, audit log and notifications are updated here,
+    each in bulk. Returns (updated ids, {id: reason} for the rest).
+    """
+    booking_ids = list(dict.fromkeys(booking_ids))
+    failures = {}
+    with transaction.atomic():
+        bookings = Booking.objects.select_for_update().filter(id__in=booking_ids).order_by('id').in_bulk()
+        for booking_id in booking_ids:
+            booking = bookings.get(booking_id)
+            error = "not found" if booking is None else transition_error(booking.status, new_status)
+            if error:
+                failures[booking_id] = error
+        changed = [bookings[i] for i in booking_ids if i not in failures]
+        if not changed:
+            return [], failures
+
+        updated = [b.id for b in changed]
+        Booking.objects.filter(id__in=updated).update(status=new_status)
+        record_status_changes([booking_state(b) for b in changed], new_status)
+        bump_version_on_commit(STATS_NAMESPACE)
+        queue_transition_notifications(
+            changed, new_status,
+            f"{actor_name} updated {len(updated)} booking(s) to {new_status}: {summarize_ids(updated)}.",
+            actor_id,
+        )
+
+    for booking_id in updated:
+        audit.record(actor_id, f"Updated booking #{booking_id} status to {new_status}")
+    return updated, failures
+
+
+# ----------------- AUTO-COMPLETION -----------------
+def complete_past_chunk(now, chunk_size):
+    """
+    Mark up to chunk_size approved bookings that ended before `now` as
+    completed, in one short transaction. Candidates are read oldest first
+    from idx_booking_status_end and drop out of that scan once completed, so
+    calling this repeatedly (or again after a crash) simply carries on; no
+    cursor is kept. Rows are re-checked under a lock in case an admin changed
+    them meanwhile. Returns (candidates found, Counter of bookings completed
+    per owner); found == 0 means done.
+    """
+    candidates = list(
+        Booking.objects.filter(status='approved', end_time__lt=now)
+        .order_by('end_time', 'id')
+        .values_list('id', flat=True)[:chunk_size]
+    )
+    if not candidates:
+        return 0, Counter()
+
+    with transaction.atomic():
+        rows = list(
+            Booking.objects.select_for_update()
+            .filter(id__in=candidates, status='approved')
+            .order_by('id')
+            .values_list('id', 'user_id', 'room_id', 'start_time', 'end_time')
+        )
+        if rows:
+            Booking.objects.filter(id__in=[row[0] for row in rows]).update(status='completed')
+            record_status_changes([(room_id, start, end, 'approved') for _, _, room_id, start, end in rows],
+                                  'completed')
+            bump_version_on_commit(STATS_NAMESPACE)
+    return len(candidates), Counter(user_id for _, user_id, *_ in rows)
+
+
+def queue_completion_notifications(per_owner):
+    """
+    One outbox row per owner for everything a sweep completed, plus one
+    summary for the admins, filed under the first admin (skipped if there is
+    none).
+    """
+    entries = [
+        NotificationOutbox(
+            user_id=user_id,
+            user_message=f"{count} of your past bookings {'was' if count == 1 else 'were'} marked completed.",
+        )
+        for user_id, count in sorted(per_owner.items())
+    ]
+    admin_id = (
+        User.objects.filter(role__role_name='Admin')
+        .order_by('id').values_list('id', flat=True).first()
+    )
+    if admin_id is not None:
+        entries.append(NotificationOutbox(
+            user_id=admin_id, user_message='',
+            admin_message=f"{sum(per_owner.values())} past booking(s) were marked completed automatically.",
+        ))
+    NotificationOutbox.objects.bulk_create(entries, batch_size=500)
@@ -1,23 +1,39 @@
+from django.conf import settings
 from django.urls import path
 from .views import HomeView, BookingCreateView, BookingListView, AdminDashboardView, LoginViewCustom, LogoutViewCustom, \
     AdminBookingCreateView, UpdateBookingStatusView, NotificationsView, RoomCreateView, RoomListView, RoomUpdateView, \
     RoomTypeListView, RoomTypeCreateView, UserListView, UserCreateView, UserUpdateView, UserDeleteView, \
     RoomTypeUpdateView, RoomDeleteView, RoomTypeDeleteView, RegisterView, EditProfileView, AuditLogView, \
-    DeleteBookingView
+    DeleteBookingView, MarkNotificationsReadView, UnreadCountView, AuditLogExportView, \
+    BookingExportView, BookingSeriesCreateView, FreeRoomSearchView, CacheStatsView, MetricsView, BulkBookingStatusView
+
+from .async_views import NotificationStreamView
+
+# Under ASGI (see asgi.py) the read-heavy pages use their async versions
+if settings.ASYNC_VIEWS:
+    from .async_views import HomeView, BookingListView, NotificationsView, \
+        RoomListView, RoomTypeListView, UserListView  # noqa: F811
 
 # ⚠️ NOTE: no app_name here, so you can use {% url 'booking_list' %} directly
 urlpatterns = [
     path('', HomeView.as_view(), name='home'),
     path('bookings/', BookingListView.as_view(), name='booking_list'),   # ← this name must exist
+    path('bookings/export/', BookingExportView.as_view(), name='booking_export'),
     path('bookings/create/', BookingCreateView.as_view(), name='create_booking'),
+    path('bookings/series/create/', BookingSeriesCreateView.as_view(), name='create_booking_series'),
     path('admin-dashboard/', AdminDashboardView.as_view(), name='admin_dashboard'),
     path('admin-bookings/create/', AdminBookingCreateView.as_view(), name='admin_create_booking'),
     path('admin-bookings/<int:booking_id>/update-status/', UpdateBookingStatusView.as_view(), name='update_booking_status'),
+    path('admin-bookings/bulk-status/', BulkBookingStatusView.as_view(), name='bulk_booking_status'),
     path('bookings/<int:booking_id>/delete/', DeleteBookingView.as_view(), name='delete_booking'),
     path('notifications/', NotificationsView.as_view(), name='notifications'),
+    path('notifications/mark-read/', MarkNotificationsReadView.as_view(), name='notifications_mark_read'),
+    path('notifications/unread-count/', UnreadCountView.as_view(), name='notifications_unread_count'),
+    path('notifications/stream/', NotificationStreamView.as_view(), name='notifications_stream'),
     path('login/', LoginViewCustom.as_view(), name='login'),
     path('logout/', LogoutViewCustom.as_view(), name='logout'),
     path('rooms/', RoomListView.as_view(), name='room_list'),
+    path('rooms/free/', FreeRoomSearchView.as_view(), name='free_rooms'),
     path('rooms/create/', RoomCreateView.as_view(), name='room_create'),
     path('rooms/<int:room_id>/edit/', RoomUpdateView.as_view(), name='room_edit'),
     path('rooms/<int:room_id>/delete/', RoomDeleteView.as_view(), name='room_delete'),
@@ -34,5 +50,8 @@ urlpatterns = [
     path('register/', RegisterView.as_view(), name='register'),
     path('edit-profile/', EditProfileView.as_view(), name='edit_profile'),
     path('audit/', AuditLogView.as_view(), name='audit_log'),
+    path('audit/export/', AuditLogExportView.as_view(), name='audit_log_export'),
+    path('cache/stats/', CacheStatsView.as_view(), name='cache_stats'),
+    path('metrics', MetricsView.as_view(), name='metrics'),
 ]
 
@@ -1,18 +1,44 @@
 from django.contrib import messages
 from django.contrib.auth import logout  # we're using session auth, so logout is fine
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render, redirect, get_object_or_404
 from django.views import View
-from django.db import transaction
+from django.core.exceptions import ValidationError
 from django.views.decorators.cache import never_cache
 from django.utils.decorators import method_decorator
-from datetime import date, datetime
+from datetime import date, datetime, timedelta
 from django.urls import reverse_lazy
 from django.views.generic import CreateView
 from .models import User, Profile,RoomAvailability, ActionLog
 from .forms import LoginForm, BookingForm, AdminBookingForm, UserForm, RoomTypeForm, RoomForm, \
-    UserCreateForm, RoomAvailabilityFormSet  # ✅ import BookingForm
+    UserCreateForm, RoomAvailabilityFormSet, BookingFilterForm, AuditLogFilterForm, \
+    BookingSeriesForm, FreeRoomSearchForm, UtilizationRangeForm  # ✅ import BookingForm
 from .models import User, Room, Booking, Notification, RoomType
 from django.utils import timezone
+from django.utils.crypto import constant_time_compare
+from django.conf import settings
+from . import audit
+from .analytics import get_utilization
+from .caching import cache_stats, reset_cache_stats
+from .catalog import get_room_catalog, get_room_list, get_room_type_list, get_user_list
+from .conditional import (
+    audit_log_version, booking_pages_version, conditional_page, home_version, notifications_version,
+    room_list_version, room_type_list_version, user_list_version,
+)
+from .conflicts import ACTIVE_STATUSES, save_booking_locked, with_room_lock
+from .exports import BOOKING_EXPORT_HEADER, booking_export_rows, chunked_values, streaming_export
+from .freeslots import search_free_rooms
+from .inbox import mark_read, request_unread_count, unread_count
+from .metrics import render_metrics
+from .outbox import queue_booking_notifications
+from .series import create_series
+from .transitions import bulk_transition, transition_error
+from .pagination import keyset_paginate
+from .routing import replica_reads
+from .queries import (
+    action_log_rows, booking_rows, bucket_by_day, filter_action_logs, filter_bookings, user_booking_window,
+    user_bookings, user_past_bookings,
+)
 
 
 DAYS = [
@@ -26,45 +52,48 @@ DAYS = [
 ]
 
 # ----------------- HELPER -----------------
-def create_notifications_for_booking(action: str, booking):
-    """
-    Persist notifications for the booking's user and all admins.
-    action examples: 'created', 'approved', 'cancelled', 'completed', 'removed', 'updated to approved'
-    """
-    # Message content
-    user_msg = f"Your booking for Room {booking.room.room_number} at {booking.start_time} was {action}."
-    admin_msg = f"Booking for Room {booking.room.room_number} with user {booking.user.name} was {action}."
-
-    # Notify booking owner
-    Notification.objects.create(
-        user=booking.user,
-        booking=booking,
-        notification_message=user_msg,
-        notification_status='unread'
-    )
-
-    # Notify admins
-    admins = User.objects.filter(role__role_name="Admin")
-    Notification.objects.bulk_create([
-        Notification(
-            user=admin,
-            booking=booking,
-            notification_message=admin_msg,
-            notification_status='unread'
-        )
-        for admin in admins
-    ])
-
-
 def log_action(request, action_description: str):
     user_id = request.session.get("user_id")
     if not user_id:
         return  # ignore logs when not logged in
 
-    ActionLog.objects.create(
-        user_id=user_id,
-        action=action_description
-    )
+    # Buffered; written in bulk when the request ends (see audit.py)
+    audit.record(user_id, action_description)
+
+
+BOOKING_PAGE_SIZE = 50
+
+
+def paginated_bookings(request):
+    """
+    One page of bookings (room + user joined) honouring the filter form in
+    request.GET and the ?cursor= position. Returns (filter_form, page).
+    """
+    filter_form = BookingFilterForm(request.GET or None)
+    bookings = booking_rows()
+    if filter_form.is_valid():
+        bookings = filter_bookings(bookings, filter_form.cleaned_data)
+
+    page = keyset_paginate(bookings, 'start_time', request.GET.get('cursor'), page_size=BOOKING_PAGE_SIZE)
+    return filter_form, page
+
+
+def user_booking_window_context(today):
+    """Last local date of the upcoming bookings shown on a user's booking list."""
+    _, end = user_booking_window(today)
+    return {'shown_until': timezone.localtime(end).date() - timedelta(days=1)}
+
+
+STATS_DEFAULT_DAYS = 30
+
+
+def utilization_stats(request):
+    """(range form, utilization stats) for the dashboard; defaults to the last 30 days."""
+    today = timezone.localdate()
+    initial = {'date_from': today - timedelta(days=STATS_DEFAULT_DAYS - 1), 'date_to': today}
+    form = UtilizationRangeForm(request.GET if 'stats-date_from' in request.GET else None, initial=initial)
+    date_range = form.cleaned_data if form.is_valid() else initial
+    return form, get_utilization(date_range['date_from'], date_range['date_to'])
 
 
 def manage_availability(request):
@@ -83,7 +112,8 @@ def manage_availability(request):
 
 
 # ------------------ HOME ------------------
-@method_decorator(never_cache, name='dispatch')
+@method_decorator(conditional_page(home_version), name='dispatch')
+@method_decorator(replica_reads, name='dispatch')
 class HomeView(View):
     template_name = 'booking_app/home_admin.html'
 
@@ -93,15 +123,8 @@ class HomeView(View):
 
         today_date = date.today()
 
-        rooms_with_availability = []
-        for room in Room.objects.all():
-            # Get all availability rows for this room (no need to override is_available)
-            availability = RoomAvailability.objects.filter(room=room)
-
-            rooms_with_availability.append({
-                'room': room,
-                'availability': availability
-            })
+        # Cached snapshot of rooms + availability (see catalog.py)
+        rooms_with_availability = get_room_catalog()
 
         return render(request, self.template_name, {
             'rooms_with_availability': rooms_with_availability,
@@ -133,15 +156,56 @@ class BookingCreateView(View):
             booking = form.save(commit=False)
             booking.user_id = request.session['user_id']  # auto-assign logged-in user
             booking.status = 'pending'
-            booking.save()
-
-            log_action(request, f"Created booking #{booking.id}")
-            messages.success(request, "Booking submitted (pending).")
-            create_notifications_for_booking("created", booking)
-            return redirect('booking_list')
+            try:
+                # Re-checked under the room lock: another request may have taken the slot
+                save_booking_locked(booking, lambda b: queue_booking_notifications("created", b))
+            except ValidationError as e:
+                form.add_error(None, e)
+            else:
+                log_action(request, f"Created booking #{booking.id}")
+                messages.success(request, "Booking submitted (pending).")
+                return redirect('booking_list')
 
         return render(request, self.template_name, {'form': form})
 
+@method_decorator(never_cache, name='dispatch')
+class BookingSeriesCreateView(View):
+    template_name = 'booking_app/create_booking.html'
+    extra_context = {
+        'form_title': "Create Recurring Booking",
+        'form_subtitle': "Book the same room and time every week (or every N days).",
+        'submit_text': "Submit Recurring Booking",
+    }
+
+    def get(self, request):
+        if not request.session.get('user_id'):
+            return redirect('login')
+
+        form = BookingSeriesForm()
+        return render(request, self.template_name, {'form': form, **self.extra_context})
+
+    def post(self, request):
+        if not request.session.get('user_id'):
+            return redirect('login')
+
+        form = BookingSeriesForm(request.POST)
+        if form.is_valid():
+            user = get_object_or_404(User, id=request.session['user_id'])
+            data = form.cleaned_data
+            try:
+                series = create_series(
+                    user, data['room'], data['start_time'], data['end_time'],
+                    data['interval_days'], data['until'], form.occurrences,
+                )
+            except ValidationError as e:
+                form.add_error(None, e)
+            else:
+                log_action(request, f"Created booking series #{series.id} ({len(form.occurrences)} bookings)")
+                messages.success(request, f"{len(form.occurrences)} recurring bookings submitted (pending).")
+                return redirect('booking_list')
+
+        return render(request, self.template_name, {'form': form, **self.extra_context})
+
 @method_decorator(never_cache, name='dispatch')
 class AdminBookingCreateView(View):
     template_name = 'booking_app/admin_create_booking.html'
@@ -157,15 +221,22 @@ class AdminBookingCreateView(View):
             return redirect('home')
         form = AdminBookingForm(request.POST)
         if form.is_valid():
-            booking = form.save()
-
-            log_action(request, f"Admin created booking #{booking.id}")
-            messages.success(request, "Booking created by admin.")
-            create_notifications_for_booking("created by admin", booking)
-            return redirect('admin_dashboard')
+            booking = form.save(commit=False)
+            try:
+                save_booking_locked(
+                    booking, lambda b: queue_booking_notifications("created by admin", b),
+                    check_overlap=booking.status in ACTIVE_STATUSES,
+                )
+            except ValidationError as e:
+                form.add_error(None, e)
+            else:
+                log_action(request, f"Admin created booking #{booking.id}")
+                messages.success(request, "Booking created by admin.")
+                return redirect('admin_dashboard')
         return render(request, self.template_name, {'form': form})
 
-@method_decorator(never_cache, name='dispatch')
+@method_decorator(conditional_page(booking_pages_version), name='dispatch')
+@method_decorator(replica_reads, name='dispatch')
 class BookingListView(View):
     template_name = 'booking_app/booking_list.html'
 
@@ -173,37 +244,92 @@ class BookingListView(View):
         if not request.session.get('user_id'):
             return redirect('login')
 
-        today = date.today()
+        today = timezone.localdate()
 
-        # Admin sees all bookings, users see their own
-        if request.session.get('role_name') != 'Admin':
-            all_bookings = Booking.objects.filter(user_id=request.session['user_id'])
-        else:
-            all_bookings = Booking.objects.all()
-
-        all_bookings = all_bookings.order_by('start_time')
-
-        # Filter out bookings with missing start or end times
-        all_bookings = all_bookings.exclude(start_time__isnull=True).exclude(end_time__isnull=True)
+        # Admin sees every booking: filtered and cursor-paginated
+        if request.session.get('role_name') == 'Admin':
+            filter_form, page = paginated_bookings(request)
+            return render(request, self.template_name, {
+                "filter_form": filter_form,
+                "page": page,
+                "today": today
+            })
 
-        # Categorize bookings safely
-        past_bookings = all_bookings.filter(end_time__date__lt=today)
-        today_bookings = all_bookings.filter(start_time__date__lte=today, end_time__date__gte=today)
-        future_bookings = all_bookings.filter(start_time__date__gt=today)
+        # Users see their own current and upcoming ones (one bounded range scan
+        # on (user_id, start_time), bucketed in Python against the local day)
+        # and their history newest first, a cursor page at a time
+        user_id = request.session['user_id']
+        _, today_bookings, future_bookings = bucket_by_day(user_bookings(user_id, today), today)
+        past_page = keyset_paginate(
+            user_past_bookings(user_id, today), 'start_time', request.GET.get('cursor'),
+            page_size=BOOKING_PAGE_SIZE, descending=True,
+        )
 
         context = {
-            "past_bookings": past_bookings,
+            "past_page": past_page,
             "today_bookings": today_bookings,
             "future_bookings": future_bookings,
-            "today": today
+            "today": today,
+            **user_booking_window_context(today),
         }
 
         return render(request, self.template_name, context)
 
 
 
-# ------------------ ADMIN DASHBOARD ------------------
 @method_decorator(never_cache, name='dispatch')
+class BookingExportView(View):
+    def get(self, request):
+        if request.session.get('role_name') != 'Admin':
+            return redirect('home')
+
+        filter_form = BookingFilterForm(request.GET or None)
+        bookings = Booking.objects.all()
+        if filter_form.is_bound:
+            # A bad filter must not fall back to exporting the whole table
+            if not filter_form.is_valid():
+                return JsonResponse({'errors': filter_form.errors}, status=400)
+            bookings = filter_bookings(bookings, filter_form.cleaned_data)
+
+        rows = booking_export_rows(bookings)
+        return streaming_export('bookings', request.GET.get('format'), BOOKING_EXPORT_HEADER, rows)
+
+
+@method_decorator(never_cache, name='dispatch')
+class FreeRoomSearchView(View):
+    template_name = 'booking_app/free_rooms.html'
+
+    def get(self, request):
+        if not request.session.get('user_id'):
+            return redirect('login')
+
+        form = FreeRoomSearchForm(request.GET or None)
+        results = None
+        if form.is_valid():
+            data = form.cleaned_data
+            rooms, free, dates = search_free_rooms(
+                data['date'], data['days'], data['start_time'], data['end_time'],
+                data['min_capacity'] or 0,
+            )
+            results = [
+                {
+                    **room,
+                    'free_days': [d.isoformat() for d, ok in zip(dates, row) if ok],
+                    'free_all_days': bool(row.all()),
+                }
+                for room, row in zip(rooms, free)
+            ]
+
+        if request.GET.get('format') == 'json':
+            if results is None:
+                return JsonResponse({'errors': form.errors}, status=400)
+            return JsonResponse({'rooms': results})
+
+        return render(request, self.template_name, {'form': form, 'results': results})
+
+
+# ------------------ ADMIN DASHBOARD ------------------
+@method_decorator(conditional_page(booking_pages_version), name='dispatch')
 class AdminDashboardView(View):
     template_name = 'booking_app/admin_dashboard.html'
 
@@ -213,9 +339,17 @@ class AdminDashboardView(View):
         if request.session.get('role_name') != 'Admin':
             return redirect('home')
 
-        rooms = Room.objects.all()
-        bookings = Booking.objects.all().order_by('start_time')
-        return render(request, self.template_name, {'rooms': rooms, 'bookings': bookings})
+        rooms = Room.objects.select_related('room_type')
+        filter_form, page = paginated_bookings(request)
+        stats_form, stats = utilization_stats(request)
+        return render(request, self.template_name, {
+            'rooms': rooms,
+            'bookings': page.items,
+            'page': page,
+            'filter_form': filter_form,
+            'stats_form': stats_form,
+            'stats': stats,
+        })
 
 @method_decorator(never_cache, name='dispatch')
 class UpdateBookingStatusView(View):
@@ -225,18 +359,78 @@ class UpdateBookingStatusView(View):
 
         booking = get_object_or_404(Booking, id=booking_id)
         new_status = request.POST.get('status')
-        if new_status and new_status != booking.status:
+        if not new_status or new_status == booking.status:
+            messages.info(request, "No status change detected.")
+            return redirect('admin_dashboard')
+
+        def change():
+            # Checked against the locked row, as another admin may have just changed it
+            current = Booking.objects.select_for_update().values_list('status', flat=True).get(id=booking.id)
+            error = transition_error(current, new_status)
+            if error:
+                raise ValidationError(error)
             booking.status = new_status
             booking.save()
+            queue_booking_notifications(f"updated to {new_status}", booking)
 
+        try:
+            # Serialised with booking writes for the same room
+            with_room_lock(booking.room_id, change)
+        except ValidationError as e:
+            messages.error(request, f"Booking {booking.id} was not updated: {' '.join(e.messages)}.")
+        else:
             log_action(request, f"Updated booking #{booking.id} status to {new_status}")
             messages.success(request, f"Booking {booking.id} status updated to {new_status}.")
-            create_notifications_for_booking(f"updated to {new_status}", booking)
-        else:
-            messages.info(request, "No status change detected.")
 
         return redirect('admin_dashboard')
 
+@method_decorator(never_cache, name='dispatch')
+class BulkBookingStatusView(View):
+    """
+    Apply one status to many bookings (booking_ids) at once; see
+    transitions.TRANSITIONS for the allowed changes. Reports the bookings
+    that could not be changed, and why; ?format=json returns both lists.
+    """
+    def post(self, request):
+        if request.session.get('role_name') != 'Admin':
+            return redirect('home')
+
+        new_status = request.POST.get('status')
+        as_json = request.GET.get('format') == 'json'
+        if new_status not in dict(Booking.STATUS_CHOICES):
+            error = f"Unknown status {new_status!r}." if new_status else "Choose a new status."
+            if as_json:
+                return JsonResponse({'error': error}, status=400)
+            messages.error(request, error)
+            return redirect('admin_dashboard')
+
+        booking_ids, failures = [], {}
+        for value in request.POST.getlist('booking_ids'):
+            try:
+                booking_ids.append(int(value))
+            except ValueError:
+                failures[value] = "not a booking id"
+
+        updated = []
+        if booking_ids:
+            updated, errors = bulk_transition(
+                booking_ids, new_status, request.session['user_id'], request.session.get('user_name'),
+            )
+            failures.update(errors)
+
+        if as_json:
+            return JsonResponse({'updated': updated, 'failed': {str(k): v for k, v in failures.items()}})
+
+        if updated:
+            messages.success(request, f"{len(updated)} booking(s) updated to {new_status}.")
+        if failures:
+            shown = [f"#{booking_id} ({reason})" for booking_id, reason in list(failures.items())[:20]]
+            more = f" and {len(failures) - 20} more" if len(failures) > 20 else ""
+            messages.warning(request, f"Not updated: {', '.join(shown)}{more}.")
+        if not updated and not failures:
+            messages.info(request, "Select some bookings to update.")
+        return redirect('admin_dashboard')
+
 class DeleteBookingView(View):
     def post(self, request, booking_id):
         if request.session.get('role_name') != 'Admin':
@@ -248,15 +442,14 @@ class DeleteBookingView(View):
         booking.delete()
         return redirect('admin_dashboard')
 
-@method_decorator(never_cache, name='dispatch')
+@method_decorator(conditional_page(room_list_version), name='dispatch')
 class RoomListView(View):
     template_name = 'booking_app/room_list.html'
 
     def get(self, request):
         if request.session.get('role_name') != 'Admin':
             return redirect('home')
-        rooms = Room.objects.all()
-        return render(request, self.template_name, {'rooms': rooms})
+        return render(request, self.template_name, {'rooms': get_room_list()})
 
 
 @method_decorator(never_cache, name='dispatch')
@@ -353,15 +546,14 @@ class RoomDeleteView(View):
         messages.success(request, "Room deleted successfully.")
         return redirect('room_list')
 
-@method_decorator(never_cache, name='dispatch')
+@method_decorator(conditional_page(room_type_list_version), name='dispatch')
 class RoomTypeListView(View):
     template_name = 'booking_app/room_type_list.html'
 
     def get(self, request):
         if request.session.get('role_name') != 'Admin':
             return redirect('home')
-        types = RoomType.objects.all()
-        return render(request, self.template_name, {'types': types})
+        return render(request, self.template_name, {'types': get_room_type_list()})
 
 
 @method_decorator(never_cache, name='dispatch')
@@ -446,15 +638,14 @@ class RoomTypeDeleteView(View):
         return redirect('room_type_list')
 
 
-@method_decorator(never_cache, name='dispatch')
+@method_decorator(conditional_page(user_list_version), name='dispatch')
 class UserListView(View):
     template_name = 'booking_app/user_list.html'
 
     def get(self, request):
         if request.session.get('role_name') != 'Admin':
             return redirect('home')
-        users = User.objects.all()
-        return render(request, self.template_name, {'users': users})
+        return render(request, self.template_name, {'users': get_user_list()})
 
 
 @method_decorator(never_cache, name='dispatch')
@@ -524,8 +715,39 @@ class UserDeleteView(View):
         messages.success(request, "User deleted successfully.")
         return redirect('user_list')
 
-# ------------------ NOTIFICATIONS -------------------
 @method_decorator(never_cache, name='dispatch')
+class CacheStatsView(View):
+    """Hit/miss counters per cache namespace (JSON). POST resets them."""
+
+    def get(self, request):
+        if request.session.get('role_name') != 'Admin':
+            return JsonResponse({'error': 'forbidden'}, status=403)
+        return JsonResponse({'namespaces': cache_stats()})
+
+    def post(self, request):
+        if request.session.get('role_name') != 'Admin':
+            return JsonResponse({'error': 'forbidden'}, status=403)
+        reset_cache_stats()
+        return JsonResponse({'namespaces': {}})
+
+
+@method_decorator(never_cache, name='dispatch')
+class MetricsView(View):
+    """Per-view request/query totals in Prometheus text format."""
+
+    def get(self, request):
+        token = getattr(settings, 'METRICS_TOKEN', None)
+        bearer = request.headers.get('Authorization', '').removeprefix('Bearer ')
+        if request.session.get('role_name') != 'Admin' and not (token and constant_time_compare(bearer, token)):
+            return HttpResponse("Forbidden\n", status=403, content_type='text/plain')
+        return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
+
+# ------------------ NOTIFICATIONS -------------------
+NOTIFICATION_PAGE_SIZE = 25
+
+
+@method_decorator(conditional_page(notifications_version), name='dispatch')
+@method_decorator(replica_reads, name='dispatch')
 class NotificationsView(View):
     template_name = 'booking_app/notifications.html'
 
@@ -534,8 +756,47 @@ class NotificationsView(View):
         if not user_id:
             return redirect('login')
 
-        notifications = Notification.objects.filter(user_id=user_id).order_by('-notification_timestamp')
-        return render(request, self.template_name, {'notifications': notifications})
+        notifications = Notification.objects.filter(user_id=user_id)
+        unread_only = request.GET.get('status') == 'unread'
+        if unread_only:
+            notifications = notifications.filter(notification_status='unread')
+
+        page = keyset_paginate(
+            notifications, 'notification_timestamp', request.GET.get('cursor'),
+            page_size=NOTIFICATION_PAGE_SIZE, descending=True,
+        )
+        return render(request, self.template_name, {
+            'notifications': page.items,
+            'page': page,
+            'unread_only': unread_only,
+            'unread_count': request_unread_count(request),
+        })
+
+
+@method_decorator(never_cache, name='dispatch')
+class MarkNotificationsReadView(View):
+    def post(self, request):
+        user_id = request.session.get('user_id')
+        if not user_id:
+            return redirect('login')
+
+        # Selected checkboxes, or everything unread when "all" is posted
+        ids = None
+        if not request.POST.get('all'):
+            ids = [int(i) for i in request.POST.getlist('ids') if i.isdigit()]
+
+        updated = mark_read(user_id, ids) if ids is None or ids else 0
+        messages.success(request, f"Marked {updated} notification(s) as read.")
+        return redirect('notifications')
+
+
+@method_decorator(never_cache, name='dispatch')
+class UnreadCountView(View):
+    def get(self, request):
+        user_id = request.session.get('user_id')
+        if not user_id:
+            return JsonResponse({'unread': 0}, status=401)
+        return JsonResponse({'unread': unread_count(user_id)})
 
 
 # ------------------ LOGIN / LOGOUT ------------------
@@ -672,7 +933,11 @@ class EditProfileView(View):
 
 
 # ------------------ AUDIT LOG ------------------
-@method_decorator(never_cache, name='dispatch')
+AUDIT_PAGE_SIZE = 50
+
+
+@method_decorator(conditional_page(audit_log_version), name='dispatch')
+@method_decorator(replica_reads, name='dispatch')
 class AuditLogView(View):
     template_name = 'booking_app/audit_log.html'
 
@@ -680,6 +945,36 @@ class AuditLogView(View):
         if request.session.get('role_name') != 'Admin':
             return redirect('home')
 
-        logs = ActionLog.objects.select_related('user').order_by('-action_timestamp')
+        filter_form = AuditLogFilterForm(request.GET or None)
+        logs = action_log_rows()
+        if filter_form.is_valid():
+            logs = filter_action_logs(logs, filter_form.cleaned_data)
+
+        page = keyset_paginate(
+            logs, 'action_timestamp', request.GET.get('cursor'),
+            page_size=AUDIT_PAGE_SIZE, descending=True,
+        )
+        return render(request, self.template_name, {
+            'logs': page.items,
+            'page': page,
+            'filter_form': filter_form,
+        })
+
+
+@method_decorator(never_cache, name='dispatch')
+class AuditLogExportView(View):
+    def get(self, request):
+        if request.session.get('role_name') != 'Admin':
+            return redirect('home')
 
-        return render(request, self.template_name, {'logs': logs})
+        filter_form = AuditLogFilterForm(request.GET or None)
+        logs = ActionLog.objects.all()
+        if filter_form.is_bound:
+            # A bad filter must not fall back to exporting the whole table
+            if not filter_form.is_valid():
+                return JsonResponse({'errors': filter_form.errors}, status=400)
+            logs = filter_action_logs(logs, filter_form.cleaned_data)
+
+        header = ['id', 'user_id', 'user_name', 'action', 'action_timestamp']
+        rows = chunked_values(logs, ['id', 'user_id', 'user__name', 'action', 'action_timestamp'])
+        return streaming_export('audit_log', request.GET.get('format'), header, rows)
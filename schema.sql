@@ -8,7 +8,7 @@ USE campus_room_booking;
 
 -- Drop tables if they already exist (for reset)
 SET FOREIGN_KEY_CHECKS = 0;
-DROP TABLE IF EXISTS ActionLog, Notification, Booking, RoomRoomFeature, RoomAvailability, Facility, RoomFeature, Room, RoomType, Profile, User, Role;
+DROP TABLE IF EXISTS NamespaceVersion, ActionLog, NotificationOutbox, Notification, DailyBookingSummary, Booking, BookingSeries, RoomRoomFeature, RoomAvailability, Facility, RoomFeature, Room, RoomType, Profile, User, Role;
 SET FOREIGN_KEY_CHECKS = 1;
 
 -- =========================================================
@@ -27,6 +27,8 @@ CREATE TABLE User (
     password_hash VARCHAR(255) NOT NULL,
     role_id INT NOT NULL,
     created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    -- Unread notifications, kept in step by the application and the procedures below
+    unread_notifications INT NOT NULL DEFAULT 0,
     FOREIGN KEY (role_id) REFERENCES Role(id) ON DELETE CASCADE
 );
 
@@ -82,6 +84,20 @@ CREATE TABLE RoomRoomFeature (
 -- Booking System
 -- =========================================================
 
+-- Recurring bookings: the first occurrence repeated every N days until a date
+CREATE TABLE BookingSeries (
+    id BIGINT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    room_id INT NOT NULL,
+    start_time DATETIME NOT NULL,
+    end_time DATETIME NOT NULL,
+    interval_days INT UNSIGNED NOT NULL DEFAULT 7,
+    until DATE NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (user_id) REFERENCES User(id) ON DELETE CASCADE,
+    FOREIGN KEY (room_id) REFERENCES Room(id) ON DELETE CASCADE
+);
+
 CREATE TABLE Booking (
     id INT AUTO_INCREMENT PRIMARY KEY,
     user_id INT NOT NULL,
@@ -89,7 +105,26 @@ CREATE TABLE Booking (
     start_time DATETIME NOT NULL,
     end_time DATETIME NOT NULL,
     status ENUM('pending', 'approved', 'cancelled', 'completed') DEFAULT 'pending',
+    series_id BIGINT NULL,
+    INDEX idx_booking_series (series_id),
+    -- Overlap queries only look back this far (conflicts.MAX_BOOKING_LENGTH)
+    CONSTRAINT booking_max_length CHECK (end_time <= start_time + INTERVAL 1 DAY),
     FOREIGN KEY (user_id) REFERENCES User(id) ON DELETE CASCADE,
+    FOREIGN KEY (room_id) REFERENCES Room(id) ON DELETE CASCADE,
+    FOREIGN KEY (series_id) REFERENCES BookingSeries(id) ON DELETE SET NULL
+);
+
+-- Bookings pre-aggregated per room, local date and status; maintained by the
+-- application on every booking change, rebuilt by `manage.py rebuild_summaries`
+CREATE TABLE DailyBookingSummary (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    room_id INT NOT NULL,
+    date DATE NOT NULL,
+    status ENUM('pending', 'approved', 'cancelled', 'completed') NOT NULL,
+    booked_minutes INT NOT NULL DEFAULT 0,
+    booking_count INT NOT NULL DEFAULT 0,
+    UNIQUE KEY uniq_summary_room_date_status (room_id, date, status),
+    INDEX idx_summary_date_status (date, status),
     FOREIGN KEY (room_id) REFERENCES Room(id) ON DELETE CASCADE
 );
 
@@ -108,6 +143,26 @@ CREATE TABLE Notification (
     FOREIGN KEY (booking_id) REFERENCES Booking(id) ON DELETE SET NULL
 );
 
+-- Notification fan-out queue, drained by `manage.py process_outbox`
+CREATE TABLE NotificationOutbox (
+    id INT AUTO_INCREMENT PRIMARY KEY,
+    user_id INT NOT NULL,
+    booking_id INT NULL,
+    user_message TEXT NOT NULL,
+    admin_message TEXT NOT NULL,
+    status VARCHAR(20) NOT NULL DEFAULT 'pending',
+    attempts INT UNSIGNED NOT NULL DEFAULT 0,
+    available_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    claimed_by VARCHAR(36) NOT NULL DEFAULT '',
+    claimed_at DATETIME NULL,
+    last_error TEXT NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    INDEX idx_outbox_status_available (status, available_at),
+    INDEX idx_outbox_claimed_by (claimed_by),
+    FOREIGN KEY (user_id) REFERENCES User(id) ON DELETE CASCADE,
+    FOREIGN KEY (booking_id) REFERENCES Booking(id) ON DELETE SET NULL
+);
+
 CREATE TABLE ActionLog (
     id INT AUTO_INCREMENT PRIMARY KEY,
     user_id INT NOT NULL,
@@ -126,6 +181,13 @@ CREATE TABLE RoomAvailability (
     FOREIGN KEY (room_id) REFERENCES Room(id) ON DELETE CASCADE
 );
 
+-- Cache namespace versions (time of the last change, in microseconds), used
+-- when the application's cache is per-process
+CREATE TABLE NamespaceVersion (
+    namespace VARCHAR(50) PRIMARY KEY,
+    version BIGINT NOT NULL
+);
+
 -- =========================================================
 -- Index for filtering by user and start time
 -- =========================================================
@@ -133,24 +195,37 @@ CREATE TABLE RoomAvailability (
 CREATE INDEX idx_booking_user_start
 ON Booking(user_id, start_time);
 
--- =========================================================
--- View for showing booking details
--- =========================================================
+-- Index for booking overlap checks (room, start/end range)
+CREATE INDEX idx_booking_room_start_end
+ON Booking(room_id, start_time, end_time);
+
+-- Indexes for paginated booking lists (ordered by start_time, id)
+CREATE INDEX idx_booking_start
+ON Booking(start_time);
 
-CREATE VIEW BookingSummary AS
-SELECT 
-    b.id AS booking_id,
-    u.name AS user_name,
-    r.room_number,
-    rt.room_type_name,
-    b.start_time,
-    b.end_time,
-    b.status
-FROM Booking b
-JOIN User u ON b.user_id = u.id
-JOIN Room r ON b.room_id = r.id
-JOIN RoomType rt ON r.room_type_id = rt.id;
+CREATE INDEX idx_booking_status_start
+ON Booking(status, start_time);
 
+-- Index for the complete_past_bookings sweep (approved, ended before now)
+CREATE INDEX idx_booking_status_end
+ON Booking(status, end_time);
+
+-- Indexes for the notification inbox and unread counts
+CREATE INDEX idx_notif_user_ts
+ON Notification(user_id, notification_timestamp);
+
+CREATE INDEX idx_notif_user_status_ts
+ON Notification(user_id, notification_status, notification_timestamp);
+
+-- Indexes for the audit log (newest first, by user, by action prefix)
+CREATE INDEX idx_actionlog_ts
+ON ActionLog(action_timestamp);
+
+CREATE INDEX idx_actionlog_user_ts
+ON ActionLog(user_id, action_timestamp);
+
+CREATE INDEX idx_actionlog_action_ts
+ON ActionLog(action, action_timestamp);
 
 -- =========================================================
 -- Notification Procedure
@@ -177,6 +252,10 @@ BEGIN
            'unread'
     FROM Booking b WHERE b.id = booking_id;
 
+    UPDATE User u JOIN Booking b ON b.user_id = u.id
+    SET u.unread_notifications = u.unread_notifications + 1
+    WHERE b.id = booking_id;
+
     -- Notify admins
     INSERT INTO Notification(user_id, booking_id, notification_message, notification_status)
     SELECT u.id, booking_id,
@@ -185,6 +264,10 @@ BEGIN
     FROM User u
     JOIN Role r ON u.role_id = r.id
     WHERE r.role_name = 'Admin';
+
+    UPDATE User u JOIN Role r ON u.role_id = r.id
+    SET u.unread_notifications = u.unread_notifications + 1
+    WHERE r.role_name = 'Admin';
 END$$
 
 DELIMITER ;
@@ -293,6 +376,7 @@ BEGIN
             CONCAT('Booking #', booking_id, ' was ', action, ' by user.'),
             'unread'
         );
+        UPDATE User SET unread_notifications = unread_notifications + 1 WHERE id = admin_id;
     END LOOP;
     CLOSE cur;
 END$$